@@ -0,0 +1,29 @@
+import time
+from contextvars import Context, ContextVar, copy_context
+from typing import Optional
+from app.core.exceptions import DeadlineExceededError
+
+# Monotonic time by which the current request must be answered (None: no deadline).
+# Set once per request by the router; tasks started for the request inherit it.
+_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+def set_deadline(timeout_seconds: Optional[float]) -> None:
+    _deadline.set(time.monotonic() + timeout_seconds if timeout_seconds is not None else None)
+
+def remaining() -> Optional[float]:
+    """Seconds left before the deadline, or None when the request has none."""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+def check_deadline() -> Optional[float]:
+    """Returns the remaining time, raising DeadlineExceededError once it has run out."""
+    left = remaining()
+    if left is not None and left <= 0:
+        raise DeadlineExceededError("Request deadline exceeded")
+    return left
+
+def detached_context() -> Context:
+    """Copy of the current context without a deadline, for work shared by several requests."""
+    context = copy_context()
+    context.run(_deadline.set, None)
+    return context
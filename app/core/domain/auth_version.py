@@ -0,0 +1,13 @@
+from sqlmodel import Field, SQLModel
+
+
+class AuthVersion(SQLModel, table=True):
+    """
+    Single-row counter bumped on every Project write.
+    Workers clear their API key cache when it moves ahead of the version they last saw.
+    """
+    id: int = Field(default=1, primary_key=True)
+    version: int = Field(default=0)
+
+    def __repr__(self) -> str:
+        return f"<AuthVersion version={self.version}>"
@@ -0,0 +1,43 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from uuid import UUID, uuid4
+from sqlmodel import Field, SQLModel, JSON, Column
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+
+class ChatJob(SQLModel, table=True):
+    """
+    Non-streaming chat submitted to run in the background (/v1/chat/jobs).
+
+    A worker owns a running job until `lease_expires_at`; if it dies, the
+    lease lapses and another worker picks the job up again. Finished jobs
+    keep their result until `expires_at`.
+    """
+    id: UUID = Field(default_factory=uuid4, primary_key=True)
+    project_id: UUID = Field(foreign_key="project.id", index=True)
+    model: str  # Logical model name, resolved when the job runs
+    messages: List[Dict[str, Any]] = Field(default_factory=list, sa_column=Column(JSON))
+    params: Dict[str, Any] = Field(default_factory=dict, sa_column=Column(JSON))
+    cache: Optional[bool] = None
+    callback_url: Optional[str] = None
+
+    status: str = Field(default=JOB_QUEUED, index=True)
+    attempts: int = 0
+    # Not picked up before this time (set when a job is put back after a 429/503)
+    available_at: datetime = Field(default_factory=datetime.utcnow, index=True)
+    lease_owner: Optional[str] = None
+    lease_expires_at: Optional[datetime] = Field(default=None, index=True)
+
+    result: Optional[Dict[str, Any]] = Field(default=None, sa_column=Column(JSON))
+    error: Optional[str] = None
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    expires_at: Optional[datetime] = Field(default=None, index=True)
+    callback_delivered: Optional[bool] = None
+
+    def __repr__(self) -> str:
+        return f"<ChatJob id={self.id} status={self.status} attempts={self.attempts}>"
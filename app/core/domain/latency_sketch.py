@@ -0,0 +1,23 @@
+from datetime import datetime
+from typing import Any, Dict
+from uuid import UUID
+from sqlmodel import Field, SQLModel, JSON, Column
+
+
+class LatencySketch(SQLModel, table=True):
+    """
+    Latency quantile sketch (see app.core.sketch.DDSketch) for one time bucket
+    and (project, model, endpoint), as recorded by one worker process.
+    Each worker only ever overwrites its own rows; readers merge them.
+    """
+    granularity: str = Field(primary_key=True)  # "minute" or "hour"
+    bucket_start: datetime = Field(primary_key=True)
+    project_id: UUID = Field(primary_key=True)
+    model: str = Field(primary_key=True)
+    endpoint: str = Field(primary_key=True)
+    worker_id: str = Field(primary_key=True)
+    count: int = 0
+    sketch: Dict[str, Any] = Field(default_factory=dict, sa_column=Column(JSON))
+
+    def __repr__(self) -> str:
+        return f"<LatencySketch {self.granularity} {self.bucket_start} model={self.model} worker={self.worker_id}>"
@@ -12,6 +12,10 @@ class ModelExposure(SQLModel, table=True):
     project_id: UUID = Field(foreign_key="project.id", index=True)
     logical_name: str = Field(index=True)
     backend_model: str
+    # Optional per-model budget, enforced on top of the project's rate limit
+    rate_limit_per_minute: Optional[int] = None
+    # Opt-in exact-match response cache for deterministic (temperature ~0) models
+    cache_responses: bool = False
     
     # config: JSON field for default parameters (temperature, max_tokens, etc.)
     config: Dict[str, Any] = Field(default_factory=dict, sa_column=Column(JSON))
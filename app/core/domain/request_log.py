@@ -17,6 +17,10 @@ class RequestLog(SQLModel, table=True):
     status: int  # HTTP status code
     tokens_input: Optional[int] = None
     tokens_output: Optional[int] = None
+    ttft_ms: Optional[int] = None  # Time to first token (streaming only)
+    tokens_per_second: Optional[float] = None  # Output generation speed
+    cached: bool = False  # Served from the response cache
+    coalesced: bool = False  # Shared another in-flight request's upstream call
     
     def __repr__(self) -> str:
         return f"<RequestLog project={self.project_id} model={self.model} status={self.status}>"
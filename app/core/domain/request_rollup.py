@@ -0,0 +1,77 @@
+from datetime import datetime
+from typing import Dict, List, Tuple
+from uuid import UUID
+from sqlmodel import Field, SQLModel
+from app.core.domain.request_log import RequestLog
+
+GRANULARITIES = ("minute", "hour")
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is open-ended
+LATENCY_BUCKETS_MS = (50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+HISTOGRAM_COLUMNS = tuple(f"latency_le_{bound}" for bound in LATENCY_BUCKETS_MS) + ("latency_le_inf",)
+# Columns that are summed when two rollups for the same bucket are merged
+ADDITIVE_COLUMNS = ("count", "latency_sum_ms", "tokens_input_sum", "tokens_output_sum") + HISTOGRAM_COLUMNS
+
+
+class RequestRollup(SQLModel, table=True):
+    """
+    Pre-aggregated request counters per time bucket, project, model and status.
+    Every counter is additive, so rows can be merged with a plain upsert.
+    """
+    granularity: str = Field(primary_key=True)  # "minute" or "hour"
+    bucket_start: datetime = Field(primary_key=True)
+    project_id: UUID = Field(primary_key=True)
+    model: str = Field(primary_key=True)
+    status: int = Field(primary_key=True)
+    count: int = 0
+    latency_sum_ms: int = 0
+    tokens_input_sum: int = 0
+    tokens_output_sum: int = 0
+    latency_le_50: int = 0
+    latency_le_100: int = 0
+    latency_le_250: int = 0
+    latency_le_500: int = 0
+    latency_le_1000: int = 0
+    latency_le_2500: int = 0
+    latency_le_5000: int = 0
+    latency_le_10000: int = 0
+    latency_le_30000: int = 0
+    latency_le_inf: int = 0
+
+    def __repr__(self) -> str:
+        return f"<RequestRollup {self.granularity} {self.bucket_start} model={self.model} count={self.count}>"
+
+
+def bucket_start(timestamp: datetime, granularity: str) -> datetime:
+    if granularity == "minute":
+        return timestamp.replace(second=0, microsecond=0)
+    if granularity == "hour":
+        return timestamp.replace(minute=0, second=0, microsecond=0)
+    raise ValueError(f"Unknown granularity: {granularity}")
+
+
+def histogram_column(latency_ms: int) -> str:
+    for bound, column in zip(LATENCY_BUCKETS_MS, HISTOGRAM_COLUMNS):
+        if latency_ms <= bound:
+            return column
+    return HISTOGRAM_COLUMNS[-1]
+
+
+def rollup_logs(logs: List[RequestLog]) -> List[RequestRollup]:
+    """Folds request logs into one rollup delta per (granularity, bucket, project, model, status)."""
+    rollups: Dict[Tuple, RequestRollup] = {}
+    for log in logs:
+        for granularity in GRANULARITIES:
+            key = (granularity, bucket_start(log.timestamp, granularity), log.project_id, log.model, log.status)
+            rollup = rollups.get(key)
+            if rollup is None:
+                rollup = RequestRollup(
+                    granularity=key[0], bucket_start=key[1], project_id=key[2], model=key[3], status=key[4]
+                )
+                rollups[key] = rollup
+            rollup.count += 1
+            rollup.latency_sum_ms += log.latency_ms
+            rollup.tokens_input_sum += log.tokens_input or 0
+            rollup.tokens_output_sum += log.tokens_output or 0
+            column = histogram_column(log.latency_ms)
+            setattr(rollup, column, getattr(rollup, column) + 1)
+    return list(rollups.values())
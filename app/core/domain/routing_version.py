@@ -0,0 +1,13 @@
+from sqlmodel import Field, SQLModel
+
+
+class RoutingVersion(SQLModel, table=True):
+    """
+    Single-row counter bumped on every ModelExposure write.
+    Workers compare it with their in-memory routing table to know when to reload.
+    """
+    id: int = Field(default=1, primary_key=True)
+    version: int = Field(default=0)
+
+    def __repr__(self) -> str:
+        return f"<RoutingVersion version={self.version}>"
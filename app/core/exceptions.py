@@ -0,0 +1,35 @@
+from typing import Optional
+
+
+class GatewayError(Exception):
+    """Base class for errors raised by the gateway use cases."""
+
+
+class RateLimitExceededError(GatewayError):
+    """Raised when a project (or one of its models) exceeds its rate limit."""
+    def __init__(self, message: str, limit: int, retry_after: float, reset_after: Optional[float] = None):
+        super().__init__(message)
+        self.limit = limit
+        self.retry_after = retry_after
+        self.reset_after = reset_after if reset_after is not None else retry_after
+
+
+class AdmissionRejectedError(GatewayError):
+    """Raised when a request cannot get a backend slot (queue full or wait timed out)."""
+    def __init__(self, message: str, model: str, reason: str, retry_after: float = 1.0):
+        super().__init__(message)
+        self.model = model
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class CircuitOpenError(GatewayError):
+    """Raised when every backend for a model has its circuit breaker open."""
+    def __init__(self, message: str, model: str, retry_after: float):
+        super().__init__(message)
+        self.model = model
+        self.retry_after = retry_after
+
+
+class DeadlineExceededError(GatewayError):
+    """Raised when the request's deadline (X-Request-Timeout) passes before the backend answered."""
@@ -0,0 +1,40 @@
+from typing import Any, Dict, List, Protocol, Optional, Tuple
+from uuid import UUID
+from app.core.domain.project import Project
+
+class ProjectCache(Protocol):
+    """Interface for caching API key -> Project resolutions."""
+
+    def get(self, api_key: str) -> Tuple[bool, Optional[Project]]:
+        """Returns (hit, project). A hit with `None` means the key is known to be invalid."""
+        ...
+
+    def put(self, api_key: str, project: Optional[Project], generation: Optional[int] = None) -> None:
+        """Caches a lookup unless the cache was invalidated after `generation` was read."""
+        ...
+
+    def invalidate_project(self, project_id: UUID) -> None:
+        ...
+
+    def invalidate_key(self, api_key: str) -> None:
+        ...
+
+class ResponseCache(Protocol):
+    """Interface for caching complete chat responses by request key."""
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        ...
+
+    async def put(self, key: str, response: Dict[str, Any]) -> None:
+        ...
+
+class ModelInventory(Protocol):
+    """Interface for the catalogue of models the backends serve, kept in memory."""
+
+    async def describe(self, models: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Metadata and availability of each requested backend model. Models no
+        backend has come back with `available: False`; the result is empty
+        while the catalogue has never been loaded.
+        """
+        ...
@@ -0,0 +1,26 @@
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional, Protocol, Tuple
+
+
+class RequestCoalescer(Protocol):
+    """Shares one upstream call between concurrent identical requests."""
+
+    async def run(self, key: str, call: Callable[[], Awaitable[Dict[str, Any]]]) -> Tuple[Dict[str, Any], bool]:
+        """Returns (result, shared); `shared` is True if another caller started the call."""
+        ...
+
+    def is_streaming(self, key: str) -> bool:
+        """Whether a stream with this key is in flight and can be joined."""
+        ...
+
+    def stream(
+        self,
+        key: str,
+        open_stream: Callable[[], AsyncIterator[Dict[str, Any]]],
+        on_done: Optional[Callable[[], None]] = None,
+    ) -> Tuple[AsyncIterator[Dict[str, Any]], bool]:
+        """
+        Returns (chunks, shared). Chunks are replayed from the start for late
+        joiners. `on_done` is only used (and called once the upstream stream
+        ends) when this caller started the stream.
+        """
+        ...
@@ -1,5 +1,5 @@
 from typing import List, Protocol
-from typing import Any, Dict, Generator
+from typing import Any, AsyncIterator, Dict, Generator
 
 class LLMService(Protocol):
     """Port for interacting with LLM providers."""
@@ -15,3 +15,22 @@ class LLMService(Protocol):
     def list_models(self) -> List[Dict[str, Any]]:
         """List available models in the backend."""
         ...
+
+class AsyncLLMService(Protocol):
+    """Async port for interacting with LLM providers without blocking the event loop."""
+
+    async def achat(self, model: str, messages: List[Dict[str, str]], **kwargs) -> Dict[str, Any]:
+        """Send a chat request (non-streaming)."""
+        ...
+
+    def astream_chat(self, model: str, messages: List[Dict[str, str]], **kwargs) -> AsyncIterator[Dict[str, Any]]:
+        """Send a chat request (streaming). Returns an async iterator of chunks."""
+        ...
+
+    def astream_chat_raw(self, model: str, messages: List[Dict[str, str]], **kwargs) -> AsyncIterator[bytes]:
+        """Send a chat request (streaming). Yields each upstream JSON chunk as undecoded bytes."""
+        ...
+
+    async def alist_models(self) -> List[Dict[str, Any]]:
+        """List available models in the backend."""
+        ...
@@ -0,0 +1,16 @@
+from typing import NamedTuple, Protocol
+
+
+class RateLimitResult(NamedTuple):
+    allowed: bool
+    limit: int
+    remaining: int
+    reset_after: float  # seconds until the bucket is full again
+    retry_after: float  # seconds until `cost` tokens are available (0 if allowed)
+
+
+class RateLimitStore(Protocol):
+    """Token bucket storage. Shared implementations let several workers enforce one budget."""
+
+    async def acquire(self, key: str, limit_per_minute: int, cost: int = 1) -> RateLimitResult:
+        ...
@@ -1,48 +1,141 @@
+from datetime import datetime
 from typing import Protocol, List, Optional, Dict, Any
 from uuid import UUID
 from app.core.domain.project import Project
 from app.core.domain.request_log import RequestLog
 from app.core.domain.model_exposure import ModelExposure
+from app.core.domain.latency_sketch import LatencySketch
+from app.core.domain.chat_job import ChatJob
 
 class ProjectRepository(Protocol):
     """Interface for Project persistence."""
     
-    def get_by_id(self, project_id: UUID) -> Optional[Project]:
+    async def get_by_id(self, project_id: UUID) -> Optional[Project]:
         ...
         
-    def get_by_api_key(self, api_key: str) -> Optional[Project]:
+    async def get_by_api_key(self, api_key: str) -> Optional[Project]:
         ...
         
-    def save(self, project: Project) -> Project:
+    async def save(self, project: Project) -> Project:
         ...
 
-    def list_all(self) -> List[Project]:
+    async def list_all(self) -> List[Project]:
         ...
 
-    def delete(self, project_id: UUID) -> bool:
+    async def delete(self, project_id: UUID) -> bool:
+        ...
+
+class LogSink(Protocol):
+    """Write-only destination for RequestLog entries (may persist asynchronously)."""
+    
+    def save(self, log: RequestLog) -> RequestLog:
+        ...
+
+    def save_many(self, logs: List[RequestLog]) -> None:
+        """Hands over a group of entries to be written together."""
         ...
 
 class LogRepository(Protocol):
     """Interface for RequestLog persistence."""
     
-    def save(self, log: RequestLog) -> RequestLog:
+    async def save(self, log: RequestLog) -> RequestLog:
+        ...
+
+    async def save_many(self, logs: List[RequestLog]) -> int:
+        """Bulk insert; returns the number of rows written."""
         ...
         
-    def get_by_project(self, project_id: UUID, limit: int = 100) -> List[RequestLog]:
+    async def get_by_project(self, project_id: UUID, limit: int = 100) -> List[RequestLog]:
         ...
 
-    def get_global_stats(self) -> Dict[str, Any]:
-        """Aggregate stats across all projects."""
+    async def get_model_traffic(self, since: datetime) -> Dict[str, int]:
+        """Requests per physical model since `since` (all projects)."""
+        ...
+
+    async def get_global_stats(
+        self,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        granularity: str = "hour",
+    ) -> Dict[str, Any]:
+        """Aggregate stats across all projects, optionally limited to a time range."""
         ...
 
 class ModelExposureRepository(Protocol):
     """Interface for ModelExposure persistence."""
     
-    def get_by_project(self, project_id: UUID) -> List[ModelExposure]:
+    async def get_by_project(self, project_id: UUID) -> List[ModelExposure]:
         ...
         
-    def get_by_logical_name(self, project_id: UUID, logical_name: str) -> Optional[ModelExposure]:
+    async def get_by_logical_name(self, project_id: UUID, logical_name: str) -> Optional[ModelExposure]:
         ...
         
-    def save(self, model_exposure: ModelExposure) -> ModelExposure:
+    async def list_backend_models(self) -> List[str]:
+        """Distinct physical models exposed to any project."""
+        ...
+
+    async def save(self, model_exposure: ModelExposure) -> ModelExposure:
+        ...
+
+class LatencySketchRepository(Protocol):
+    """Interface for persisted per-worker latency sketches."""
+
+    async def save_many(self, sketches: List[LatencySketch]) -> None:
+        """Inserts or replaces the given rows."""
+        ...
+
+    async def get_percentiles(
+        self,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        granularity: str = "hour",
+    ) -> Dict[str, Any]:
+        """Merges the sketches of all workers into p50/p95/p99 per (project, model, endpoint)."""
+        ...
+
+class ChatJobRepository(Protocol):
+    """
+    Interface for the durable chat job queue. State changes made by a worker
+    only apply while it still holds the job's lease.
+    """
+
+    async def create(self, job: ChatJob) -> ChatJob:
+        ...
+
+    async def get(self, job_id: UUID) -> Optional[ChatJob]:
+        ...
+
+    async def claim(self, owner: str, lease_seconds: float) -> Optional[ChatJob]:
+        """Leases the oldest runnable job (queued, or running with a lapsed lease)."""
+        ...
+
+    async def extend_lease(self, job_id: UUID, owner: str, lease_seconds: float) -> bool:
+        ...
+
+    async def release(self, job_id: UUID, owner: str, available_at: datetime, error: str) -> bool:
+        """
+        Puts a leased job back in the queue, not to run before `available_at`.
+        The attempt does not count towards the job's attempt limit.
+        """
+        ...
+
+    async def finish(
+        self,
+        job_id: UUID,
+        owner: str,
+        status: str,
+        expires_at: datetime,
+        result: Optional[Dict[str, Any]] = None,
+        error: Optional[str] = None,
+    ) -> bool:
+        ...
+
+    async def mark_callback(self, job_id: UUID, delivered: bool) -> None:
+        ...
+
+    async def purge_expired(self) -> int:
+        """Deletes finished jobs past their retention; returns how many."""
+        ...
+
+    async def count_by_status(self) -> Dict[str, int]:
         ...
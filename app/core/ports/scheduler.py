@@ -0,0 +1,14 @@
+from typing import Protocol
+from uuid import UUID
+
+
+class AdmissionScheduler(Protocol):
+    """Caps concurrent backend calls per physical model."""
+
+    async def acquire(self, model: str, project_id: UUID) -> None:
+        """Waits for a slot; raises AdmissionRejectedError if none can be granted."""
+        ...
+
+    def release(self, model: str) -> None:
+        """Returns a slot obtained with `acquire`."""
+        ...
@@ -0,0 +1,18 @@
+import json
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # optional speed-up
+    orjson = None
+
+def dumps(obj: Any) -> bytes:
+    """Compact JSON encoding; uses orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+def loads(data: Any) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
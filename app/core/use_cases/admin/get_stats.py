@@ -1,16 +1,45 @@
-from typing import Dict, Any
-from app.core.ports.repositories import LogRepository
+import re
+from datetime import datetime, timedelta
+from typing import Dict, Any, Optional
+from app.core.ports.repositories import LogRepository, LatencySketchRepository
+from app.core.domain.request_rollup import GRANULARITIES
+
+_WINDOW_RE = re.compile(r"^(\d+)([mhd])$")
+_WINDOW_UNITS = {"m": "minutes", "h": "hours", "d": "days"}
+
+def parse_window(window: str) -> timedelta:
+    """Parses windows like `15m`, `1h` or `7d`."""
+    match = _WINDOW_RE.match(window.strip())
+    if not match:
+        raise ValueError("window must look like 15m, 1h or 7d")
+    return timedelta(**{_WINDOW_UNITS[match.group(2)]: int(match.group(1))})
 
 class GetSystemStatsUseCase:
     """
     Use case for retrieving global usage statistics for administrators.
     """
-    def __init__(self, log_repo: LogRepository):
+    def __init__(self, log_repo: LogRepository, sketch_repo: Optional[LatencySketchRepository] = None):
         self.log_repo = log_repo
+        self.sketch_repo = sketch_repo
+
+    async def execute(
+        self,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        granularity: str = "hour",
+        window: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"granularity must be one of {', '.join(GRANULARITIES)}")
+        if window and since is None:
+            since = (until or datetime.utcnow()) - parse_window(window)
 
-    def execute(self) -> Dict[str, Any]:
         # Orchestrate stats retrieval
-        stats = self.log_repo.get_global_stats()
+        stats = await self.log_repo.get_global_stats(since, until, granularity)
+
+        # Tail latency comes from merged quantile sketches, not from SQL over raw logs
+        if self.sketch_repo:
+            stats["latency_percentiles"] = await self.sketch_repo.get_percentiles(since, until, granularity)
         
         # In the future, we could add more complex business logic or 
         # external monitoring data here.
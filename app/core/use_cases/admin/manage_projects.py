@@ -1,6 +1,7 @@
 from typing import List, Optional
 from uuid import UUID
 from app.core.ports.repositories import ProjectRepository
+from app.core.ports.cache import ProjectCache
 from app.core.domain.project import Project
 import secrets
 
@@ -8,13 +9,14 @@ class ProjectManagementUseCase:
     """
     Use case for handling administrative CRUD operations on projects.
     """
-    def __init__(self, project_repo: ProjectRepository):
+    def __init__(self, project_repo: ProjectRepository, project_cache: Optional[ProjectCache] = None):
         self.project_repo = project_repo
+        self.project_cache = project_cache
 
-    def list_projects(self) -> List[Project]:
-        return self.project_repo.list_all()
+    async def list_projects(self) -> List[Project]:
+        return await self.project_repo.list_all()
 
-    def create_project(self, name: str, description: Optional[str] = None, allowed_models: List[str] = []) -> Project:
+    async def create_project(self, name: str, description: Optional[str] = None, allowed_models: List[str] = []) -> Project:
         api_key = secrets.token_urlsafe(32)
         project = Project(
             name=name,
@@ -23,12 +25,19 @@ class ProjectManagementUseCase:
             allowed_models=allowed_models,
             is_active=True
         )
-        return self.project_repo.save(project)
+        project = await self.project_repo.save(project)
+        if self.project_cache:
+            # Drop any negative entry left by earlier attempts with this key
+            self.project_cache.invalidate_key(api_key)
+        return project
 
-    def toggle_project_status(self, project_id: UUID) -> Optional[Project]:
-        project = self.project_repo.get_by_id(project_id)
+    async def toggle_project_status(self, project_id: UUID) -> Optional[Project]:
+        project = await self.project_repo.get_by_id(project_id)
         if not project:
             return None
         
         project.is_active = not project.is_active
-        return self.project_repo.save(project)
+        project = await self.project_repo.save(project)
+        if self.project_cache:
+            self.project_cache.invalidate_project(project_id)
+        return project
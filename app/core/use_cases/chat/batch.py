@@ -0,0 +1,122 @@
+import asyncio
+from typing import Any, AsyncGenerator, Dict, List, NamedTuple, Optional
+from uuid import UUID
+from app.core.ports.llm_service import AsyncLLMService
+from app.core.ports.repositories import ModelExposureRepository, LogSink
+from app.core.ports.rate_limiter import RateLimitStore
+from app.core.ports.scheduler import AdmissionScheduler
+from app.core.ports.cache import ResponseCache
+from app.core.ports.coalescer import RequestCoalescer
+from app.core.domain.model_exposure import ModelExposure
+from app.core.domain.request_log import RequestLog
+from app.core.use_cases.chat.non_streaming import ChatWithModelUseCase
+
+class BatchItem(NamedTuple):
+    model: str
+    messages: List[Dict[str, str]]
+    params: Dict[str, Any]
+    cache: Optional[bool] = None
+
+class BatchResult(NamedTuple):
+    """Outcome of one item: `response` on success, `error` otherwise."""
+    index: int
+    response: Optional[Dict[str, Any]]
+    error: Optional[Exception]
+    cache_status: Optional[str]
+
+class BufferedLogSink(LogSink):
+    """Collects the logs of a batch so they can be handed over in one bulk write."""
+    def __init__(self):
+        self.logs: List[RequestLog] = []
+
+    def save(self, log: RequestLog) -> RequestLog:
+        self.logs.append(log)
+        return log
+
+class _ResolvedExposures(ModelExposureRepository):
+    """Read-only view over exposures resolved once for the whole batch."""
+    def __init__(self, exposures: Dict[str, Optional[ModelExposure]]):
+        self.exposures = exposures
+
+    async def get_by_logical_name(self, project_id: UUID, logical_name: str) -> Optional[ModelExposure]:
+        return self.exposures.get(logical_name)
+
+class BatchChatUseCase:
+    """
+    Runs many non-streaming chats for one project with bounded concurrency.
+
+    Exposures are resolved once per distinct model name, every item goes
+    through ChatWithModelUseCase (limits, scheduler, cache, coalescing), and
+    the request logs of all items are written with a single `save_many`
+    once the batch is over.
+    """
+    def __init__(
+        self,
+        llm_service: AsyncLLMService,
+        exposure_repo: ModelExposureRepository,
+        log_repo: LogSink,
+        rate_limiter: Optional[RateLimitStore] = None,
+        scheduler: Optional[AdmissionScheduler] = None,
+        response_cache: Optional[ResponseCache] = None,
+        coalescer: Optional[RequestCoalescer] = None
+    ):
+        self.llm_service = llm_service
+        self.exposure_repo = exposure_repo
+        self.log_repo = log_repo
+        self.rate_limiter = rate_limiter
+        self.scheduler = scheduler
+        self.response_cache = response_cache
+        self.coalescer = coalescer
+
+    async def execute(
+        self,
+        project_id: UUID,
+        items: List[BatchItem],
+        concurrency: int = 8
+    ) -> AsyncGenerator[BatchResult, None]:
+        exposures = {}
+        for name in {item.model for item in items}:
+            exposures[name] = await self.exposure_repo.get_by_logical_name(project_id, name)
+        return self._run(project_id, items, _ResolvedExposures(exposures), max(1, concurrency))
+
+    async def _run(
+        self,
+        project_id: UUID,
+        items: List[BatchItem],
+        exposure_repo: ModelExposureRepository,
+        concurrency: int
+    ) -> AsyncGenerator[BatchResult, None]:
+        buffer = BufferedLogSink()
+        pending = iter(enumerate(items))
+        results: asyncio.Queue = asyncio.Queue()
+
+        async def worker() -> None:
+            for index, item in pending:
+                use_case = ChatWithModelUseCase(
+                    self.llm_service, exposure_repo, buffer, self.rate_limiter,
+                    self.scheduler, self.response_cache, self.coalescer
+                )
+                use_case.endpoint = "/v1/chat/batch"
+                try:
+                    response = await use_case.execute(
+                        project_id=project_id,
+                        logical_model_name=item.model,
+                        messages=item.messages,
+                        cache=item.cache,
+                        **item.params
+                    )
+                    results.put_nowait(BatchResult(index, response, None, use_case.cache_status))
+                except Exception as e:
+                    results.put_nowait(BatchResult(index, None, e, None))
+
+        workers = [asyncio.create_task(worker()) for _ in range(min(concurrency, len(items)))]
+        try:
+            # Yield in completion order; the index tells callers which item it was
+            for _ in range(len(items)):
+                yield await results.get()
+        finally:
+            # Client went away mid-batch: stop the remaining items
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            self.log_repo.save_many(buffer.logs)
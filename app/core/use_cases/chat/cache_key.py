@@ -0,0 +1,19 @@
+import json
+import hashlib
+from typing import Any, Dict, List
+from uuid import UUID
+
+def canonical_request_key(project_id: UUID, model: str, params: Dict[str, Any], messages: List[Dict[str, Any]]) -> str:
+    """
+    Stable hash of (project, physical model, merged params, messages).
+    Keys are sorted so dict ordering in the request or config does not matter.
+    Scoped per project so cached or shared responses never cross tenants.
+    """
+    payload = json.dumps(
+        {"project_id": project_id, "model": model, "params": params, "messages": messages},
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
@@ -0,0 +1,28 @@
+from typing import Optional
+from uuid import UUID
+from app.core.domain.model_exposure import ModelExposure
+from app.core.exceptions import RateLimitExceededError
+from app.core.ports.rate_limiter import RateLimitStore
+
+async def enforce_model_rate_limit(
+    rate_limiter: Optional[RateLimitStore],
+    project_id: UUID,
+    exposure: Optional[ModelExposure]
+) -> None:
+    """
+    Applies the per-model budget of an exposure, if it defines one.
+    """
+    if not rate_limiter or not exposure or not exposure.rate_limit_per_minute:
+        return
+
+    result = await rate_limiter.acquire(
+        f"model:{project_id}:{exposure.logical_name}",
+        exposure.rate_limit_per_minute
+    )
+    if not result.allowed:
+        raise RateLimitExceededError(
+            f"Rate limit exceeded for model '{exposure.logical_name}'",
+            limit=result.limit,
+            retry_after=result.retry_after,
+            reset_after=result.reset_after,
+        )
@@ -1,6 +1,14 @@
 from typing import List, Dict, Any, Optional
-from app.core.ports.llm_service import LLMService
-from app.core.ports.repositories import ModelExposureRepository, LogRepository
+from app.core.ports.llm_service import AsyncLLMService
+from app.core.ports.repositories import ModelExposureRepository, LogSink
+from app.core.ports.rate_limiter import RateLimitStore
+from app.core.ports.scheduler import AdmissionScheduler
+from app.core.ports.cache import ResponseCache
+from app.core.ports.coalescer import RequestCoalescer
+from app.core.exceptions import AdmissionRejectedError, CircuitOpenError, DeadlineExceededError
+from app.core.use_cases.chat.limits import enforce_model_rate_limit
+from app.core.use_cases.chat.cache_key import canonical_request_key
+from app.core.use_cases.chat.tokens import usage_from_response
 from app.core.domain.request_log import RequestLog
 from uuid import UUID
 import time
@@ -9,25 +17,39 @@ class ChatWithModelUseCase:
     """
     Use case for handling non-streaming chat requests.
     """
+    # Recorded on request logs
+    endpoint = "/v1/chat"
+
     def __init__(
         self, 
-        llm_service: LLMService, 
+        llm_service: AsyncLLMService, 
         exposure_repo: ModelExposureRepository,
-        log_repo: LogRepository
+        log_repo: LogSink,
+        rate_limiter: Optional[RateLimitStore] = None,
+        scheduler: Optional[AdmissionScheduler] = None,
+        response_cache: Optional[ResponseCache] = None,
+        coalescer: Optional[RequestCoalescer] = None
     ):
         self.llm_service = llm_service
         self.exposure_repo = exposure_repo
         self.log_repo = log_repo
+        self.rate_limiter = rate_limiter
+        self.scheduler = scheduler
+        self.response_cache = response_cache
+        self.coalescer = coalescer
+        # "HIT" / "MISS" when the last execute() consulted the cache, else None
+        self.cache_status: Optional[str] = None
 
-    def execute(
+    async def execute(
         self, 
         project_id: UUID, 
         logical_model_name: str, 
         messages: List[Dict[str, str]],
+        cache: Optional[bool] = None,
         **kwargs
     ) -> Dict[str, Any]:
         # 1. Resolve logical to physical model
-        exposure = self.exposure_repo.get_by_logical_name(project_id, logical_model_name)
+        exposure = await self.exposure_repo.get_by_logical_name(project_id, logical_model_name)
         
         if exposure:
             physical_model = exposure.backend_model
@@ -40,11 +62,59 @@ class ChatWithModelUseCase:
             physical_model = logical_model_name
             params = kwargs
 
-        # 2. Call LLM
+        await enforce_model_rate_limit(self.rate_limiter, project_id, exposure)
+
+        # 2. Serve from the response cache if the exposure or request opts in
         start_time = time.time()
+        use_cache = cache if cache is not None else bool(exposure and exposure.cache_responses)
+        cache_key = None
+        if use_cache and self.response_cache:
+            cache_key = canonical_request_key(project_id, physical_model, params, messages)
+            cached_response = await self.response_cache.get(cache_key)
+            self.cache_status = "HIT" if cached_response is not None else "MISS"
+            if cached_response is not None:
+                tokens_input, tokens_output, _ = usage_from_response(cached_response, messages, 0)
+                self.log_repo.save(RequestLog(
+                    project_id=project_id,
+                    model=physical_model,
+                    endpoint=self.endpoint,
+                    latency_ms=int((time.time() - start_time) * 1000),
+                    status=200,
+                    tokens_input=tokens_input,
+                    tokens_output=tokens_output,
+                    cached=True
+                ))
+                return cached_response
+
+        # 3. Call LLM
+        async def call_upstream() -> Dict[str, Any]:
+            # Wait for a backend slot (queue time counts towards latency)
+            if self.scheduler:
+                await self.scheduler.acquire(physical_model, project_id)
+            try:
+                return await self.llm_service.achat(model=physical_model, messages=messages, **params)
+            finally:
+                if self.scheduler:
+                    self.scheduler.release(physical_model)
+
+        coalesced = False
+        usage = (None, None, None)
+        status_code = 499  # Only kept if the caller is cancelled mid-request
         try:
-            response = self.llm_service.chat(model=physical_model, messages=messages, **params)
+            if self.coalescer:
+                # Identical concurrent requests share one upstream call
+                key = cache_key or canonical_request_key(project_id, physical_model, params, messages)
+                response, coalesced = await self.coalescer.run(key, call_upstream)
+            else:
+                response = await call_upstream()
             status_code = 200
+            usage = usage_from_response(response, messages, time.time() - start_time)
+        except (AdmissionRejectedError, CircuitOpenError):
+            status_code = 503
+            raise
+        except DeadlineExceededError:
+            status_code = 504
+            raise
         except Exception as e:
             # Handle backend errors
             status_code = 500
@@ -52,14 +122,21 @@ class ChatWithModelUseCase:
         finally:
             latency = int((time.time() - start_time) * 1000)
             
-            # 3. Log the request (Omit token counts for now if not easily available)
+            # 4. Log the request with backend-reported (or estimated) token usage
+            tokens_input, tokens_output, tokens_per_second = usage
             log = RequestLog(
                 project_id=project_id,
                 model=physical_model,
-                endpoint="/v1/chat",
+                endpoint=self.endpoint,
                 latency_ms=latency,
-                status=status_code
+                status=status_code,
+                tokens_input=tokens_input,
+                tokens_output=tokens_output,
+                tokens_per_second=tokens_per_second,
+                coalesced=coalesced
             )
             self.log_repo.save(log)
 
+        if cache_key and not coalesced:
+            await self.response_cache.put(cache_key, response)
         return response
@@ -0,0 +1,124 @@
+import asyncio
+from typing import Any, AsyncGenerator, AsyncIterator, Awaitable, Callable, List, Optional, Union
+from app.core.serialization import dumps
+
+DONE_EVENT = b"data: [DONE]\n\n"
+# SSE comment line: ignored by clients, keeps proxies from closing idle streams
+HEARTBEAT_EVENT = b": keep-alive\n\n"
+
+_END = object()
+
+def encode_event(chunk: Union[bytes, Any]) -> bytes:
+    """
+    Frames one chunk as an SSE `data:` event.
+    Raw upstream JSON (bytes) is passed through without decoding it.
+    """
+    if not isinstance(chunk, bytes):
+        chunk = dumps(chunk)
+    return b"data: " + chunk + b"\n\n"
+
+async def batch_frames(
+    frames: AsyncGenerator[bytes, None],
+    flush_interval_ms: int = 0,
+    flush_bytes: int = 0,
+    heartbeat_interval: float = 0,
+    is_disconnected: Optional[Callable[[], Awaitable[bool]]] = None,
+    disconnect_poll_interval: float = 1.0,
+) -> AsyncIterator[bytes]:
+    """
+    Coalesces SSE frames into fewer writes, interleaves keep-alive comments
+    and stops early when the client goes away.
+
+    With `flush_interval_ms`, frames are buffered and written together at
+    most that long after the first buffered one (or as soon as `flush_bytes`
+    are pending). With `heartbeat_interval`, a comment line is sent whenever
+    nothing has been written for that many seconds. With `is_disconnected`,
+    the client is checked every `disconnect_poll_interval` seconds, even
+    while the upstream is silent. Frames are read from `frames` by a separate
+    task, which is cancelled on the way out so the upstream stream is closed
+    promptly. With none of these options the frames are passed through
+    untouched, without an extra task.
+    """
+    if not flush_interval_ms and not heartbeat_interval and not is_disconnected:
+        async for frame in frames:
+            yield frame
+        return
+
+    loop = asyncio.get_running_loop()
+    flush_interval = flush_interval_ms / 1000
+    queue: asyncio.Queue = asyncio.Queue(maxsize=256)
+
+    async def pump():
+        try:
+            async for frame in frames:
+                await queue.put(frame)
+        except Exception as e:
+            await queue.put(e)
+            return
+        finally:
+            # Also reached when cancelled while blocked on a full queue
+            await frames.aclose()
+        await queue.put(_END)
+
+    pump_task = asyncio.create_task(pump())
+    buffer: List[bytes] = []
+    buffered = 0
+    deadline = 0.0
+    last_write = loop.time()
+    next_poll = last_write + disconnect_poll_interval if is_disconnected else None
+    try:
+        while True:
+            if next_poll is not None and loop.time() >= next_poll:
+                if await is_disconnected():
+                    return
+                next_poll = loop.time() + disconnect_poll_interval
+
+            if not queue.empty():
+                item = queue.get_nowait()
+            else:
+                wake_at = [next_poll] if next_poll is not None else []
+                if buffer:
+                    wake_at.append(deadline)
+                elif heartbeat_interval:
+                    wake_at.append(last_write + heartbeat_interval)
+                timeout = max(0.0, min(wake_at) - loop.time()) if wake_at else None
+                try:
+                    item = await asyncio.wait_for(queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    now = loop.time()
+                    if buffer and now >= deadline:
+                        yield b"".join(buffer)
+                        buffer, buffered, last_write = [], 0, now
+                    elif not buffer and heartbeat_interval and now >= last_write + heartbeat_interval:
+                        yield HEARTBEAT_EVENT
+                        last_write = now
+                    continue
+
+            if item is _END:
+                break
+            if isinstance(item, Exception):
+                raise item
+            if not flush_interval:
+                yield item
+                last_write = loop.time()
+                continue
+
+            if not buffer:
+                deadline = loop.time() + flush_interval
+            buffer.append(item)
+            buffered += len(item)
+            if (flush_bytes and buffered >= flush_bytes) or loop.time() >= deadline:
+                yield b"".join(buffer)
+                buffer, buffered, last_write = [], 0, loop.time()
+
+        if buffer:
+            yield b"".join(buffer)
+    finally:
+        # Cancelling the pump closes `frames`, and with it the upstream stream,
+        # wherever the pump is suspended
+        if not pump_task.done():
+            pump_task.cancel()
+            try:
+                await pump_task
+            except asyncio.CancelledError:
+                pass
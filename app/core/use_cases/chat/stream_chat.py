@@ -1,10 +1,42 @@
-from typing import List, Dict, Any, Generator
-from app.core.ports.llm_service import LLMService
-from app.core.ports.repositories import ModelExposureRepository, LogRepository
+from typing import List, Dict, Any, AsyncGenerator, Awaitable, Callable, Optional
+from app.core.ports.llm_service import AsyncLLMService
+from app.core.ports.repositories import ModelExposureRepository, LogSink
+from app.core.ports.rate_limiter import RateLimitStore
+from app.core.ports.scheduler import AdmissionScheduler
+from app.core.ports.coalescer import RequestCoalescer
+from app.core.exceptions import AdmissionRejectedError, CircuitOpenError, DeadlineExceededError
+from app.core.use_cases.chat.limits import enforce_model_rate_limit
+from app.core.use_cases.chat.cache_key import canonical_request_key
+from app.core.use_cases.chat.sse import encode_event, DONE_EVENT
+from app.core.use_cases.chat.tokens import StreamUsage
 from app.core.domain.request_log import RequestLog
 from uuid import UUID
 import time
-import json
+import asyncio
+
+# Logged when the client disconnects mid-stream (nginx convention)
+CLIENT_CLOSED_REQUEST = 499
+
+class ChatStream:
+    """
+    SSE frames of one streaming chat. `aclose()` also finishes a stream
+    that was never iterated (e.g. the client left before the response
+    started), releasing its admission slot and logging it.
+    """
+    def __init__(self, frames: AsyncGenerator[bytes, None], finish: Callable[[int], Awaitable[None]]):
+        self._frames = frames
+        self._finish = finish
+
+    def __aiter__(self) -> "ChatStream":
+        return self
+
+    async def __anext__(self) -> bytes:
+        return await self._frames.__anext__()
+
+    async def aclose(self) -> None:
+        await self._frames.aclose()
+        # No-op if the frames already finished the stream
+        await self._finish(CLIENT_CLOSED_REQUEST)
 
 class StreamChatWithModelUseCase:
     """
@@ -12,23 +44,29 @@ class StreamChatWithModelUseCase:
     """
     def __init__(
         self, 
-        llm_service: LLMService, 
+        llm_service: AsyncLLMService, 
         exposure_repo: ModelExposureRepository,
-        log_repo: LogRepository
+        log_repo: LogSink,
+        rate_limiter: Optional[RateLimitStore] = None,
+        scheduler: Optional[AdmissionScheduler] = None,
+        coalescer: Optional[RequestCoalescer] = None
     ):
         self.llm_service = llm_service
         self.exposure_repo = exposure_repo
         self.log_repo = log_repo
+        self.rate_limiter = rate_limiter
+        self.scheduler = scheduler
+        self.coalescer = coalescer
 
-    def execute(
+    async def execute(
         self, 
         project_id: UUID, 
         logical_model_name: str, 
         messages: List[Dict[str, str]],
         **kwargs
-    ) -> Generator[str, None, None]:
+    ) -> ChatStream:
         # 1. Resolve logical to physical model
-        exposure = self.exposure_repo.get_by_logical_name(project_id, logical_model_name)
+        exposure = await self.exposure_repo.get_by_logical_name(project_id, logical_model_name)
         
         if exposure:
             physical_model = exposure.backend_model
@@ -37,30 +75,98 @@ class StreamChatWithModelUseCase:
             physical_model = logical_model_name
             params = kwargs
 
+        await enforce_model_rate_limit(self.rate_limiter, project_id, exposure)
+
         # 2. Call LLM Streaming
         start_time = time.time()
         
-        def generate():
+        key = canonical_request_key(project_id, physical_model, params, messages) if self.coalescer else None
+        joining = key is not None and self.coalescer.is_streaming(key)
+
+        # Admission happens before the response starts so rejections surface as 503.
+        # The slot is held for the whole stream and released when it ends, or
+        # when the caller closes a stream it never iterated. Joiners of an in-flight stream do not need a slot of their own.
+        holds_slot = False
+        if self.scheduler and not joining:
             try:
-                for chunk in self.llm_service.stream_chat(model=physical_model, messages=messages, **params):
-                    # Format as SSE
-                    yield f"data: {json.dumps(chunk)}\n\n"
-                
-                status_code = 200
-            except Exception as e:
-                status_code = 500
-                yield f"data: {json.dumps({'error': str(e)})}\n\n"
-            finally:
-                latency = int((time.time() - start_time) * 1000)
-                # Log at the end of stream
-                log = RequestLog(
+                await self.scheduler.acquire(physical_model, project_id)
+            except (AdmissionRejectedError, DeadlineExceededError) as e:
+                self.log_repo.save(RequestLog(
                     project_id=project_id,
                     model=physical_model,
                     endpoint="/v1/chat/stream",
-                    latency_ms=latency,
-                    status=status_code if 'status_code' in locals() else 500
-                )
-                self.log_repo.save(log)
-                yield "data: [DONE]\n\n"
+                    latency_ms=int((time.time() - start_time) * 1000),
+                    status=504 if isinstance(e, DeadlineExceededError) else 503
+                ))
+                raise
+            holds_slot = True
+
+        def open_stream():
+            # Raw NDJSON lines are re-framed as SSE without a decode/encode round trip
+            return self.llm_service.astream_chat_raw(model=physical_model, messages=messages, **params)
+
+        release_slot = (lambda: self.scheduler.release(physical_model)) if holds_slot else None
+        coalesced = False
+        if key:
+            # The coalescer releases the slot once the shared upstream stream ends
+            chunks, coalesced = self.coalescer.stream(key, open_stream, on_done=release_slot)
+            if coalesced and release_slot:
+                # Another request started the same stream while we were queued
+                release_slot()
+            release_slot = None
+        else:
+            chunks = open_stream()
+
+        usage = StreamUsage(messages, start_time)
+        finished = False
+
+        async def finish(status_code: int) -> None:
+            nonlocal finished
+            if finished:
+                return
+            finished = True
+            # Closing the iterator aborts the upstream HTTP stream (or
+            # detaches from a shared one) instead of letting it run on
+            await chunks.aclose()
+            if release_slot:
+                release_slot()
+            now = time.time()
+            tokens_input, tokens_output, tokens_per_second = usage.summary(now)
+            # Log at the end of stream (partial counts if the client left early)
+            log = RequestLog(
+                project_id=project_id,
+                model=physical_model,
+                endpoint="/v1/chat/stream",
+                latency_ms=int((now - start_time) * 1000),
+                status=status_code,
+                tokens_input=tokens_input,
+                tokens_output=tokens_output,
+                ttft_ms=usage.ttft_ms,
+                tokens_per_second=tokens_per_second,
+                coalesced=coalesced
+            )
+            self.log_repo.save(log)
+
+        async def generate():
+            status_code = 500
+            try:
+                async for chunk in chunks:
+                    usage.feed(chunk, time.time())
+                    yield encode_event(chunk)
+                status_code = 200
+            except (asyncio.CancelledError, GeneratorExit):
+                # The client went away before the answer was complete
+                status_code = CLIENT_CLOSED_REQUEST
+                raise
+            except Exception as e:
+                if isinstance(e, CircuitOpenError):
+                    status_code = 503
+                elif isinstance(e, DeadlineExceededError):
+                    status_code = 504
+                yield encode_event({"error": str(e)})
+            finally:
+                await finish(status_code)
+            # Not reached when the consumer closes the stream early
+            yield DONE_EVENT
 
-        return generate()
+        return ChatStream(generate(), finish)
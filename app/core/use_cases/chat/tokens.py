@@ -0,0 +1,107 @@
+import re
+import hashlib
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple, Union
+from app.core.serialization import loads
+
+# Words, numbers and single punctuation marks; long words count as several tokens
+_PIECE_RE = re.compile(r"\w+|[^\w\s]")
+# Role markers and separators the chat template adds around every message
+_MESSAGE_OVERHEAD = 4
+
+class TokenEstimator:
+    """
+    Cheap token count estimate for when the backend reports no usage.
+
+    Roughly matches BPE tokenizers (about four characters per token). Counts
+    are cached per message, so in a multi-turn conversation only the new
+    messages are tokenized on each request.
+    """
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._messages: "OrderedDict[str, int]" = OrderedDict()
+
+    def count_text(self, text: str) -> int:
+        return sum((len(piece) + 3) // 4 for piece in _PIECE_RE.findall(text or ""))
+
+    def count_messages(self, messages: List[Dict[str, Any]]) -> int:
+        return sum(self._count_message(message) for message in messages)
+
+    def _count_message(self, message: Dict[str, Any]) -> int:
+        role, content = message.get("role", ""), message.get("content") or ""
+        key = hashlib.sha1(f"{role}\0{content}".encode("utf-8")).hexdigest()
+        count = self._messages.get(key)
+        if count is None:
+            count = self.count_text(content) + _MESSAGE_OVERHEAD
+            self._messages[key] = count
+            if len(self._messages) > self.max_entries:
+                self._messages.popitem(last=False)
+        else:
+            self._messages.move_to_end(key)
+        return count
+
+# Shared by both chat use cases
+token_estimator = TokenEstimator()
+
+def _tokens_per_second(tokens: Optional[int], eval_duration_ns: Optional[int], fallback_seconds: float) -> Optional[float]:
+    seconds = eval_duration_ns / 1e9 if eval_duration_ns else fallback_seconds
+    if not tokens or seconds <= 0:
+        return None
+    return round(tokens / seconds, 2)
+
+def usage_from_response(
+    response: Dict[str, Any],
+    messages: List[Dict[str, Any]],
+    latency_seconds: float,
+) -> Tuple[int, int, Optional[float]]:
+    """
+    Returns (tokens_input, tokens_output, tokens_per_second) for a complete response.
+    Ollama's `prompt_eval_count` / `eval_count` are used when present.
+    """
+    tokens_input = response.get("prompt_eval_count") or token_estimator.count_messages(messages)
+    tokens_output = response.get("eval_count")
+    if tokens_output is None:
+        message = response.get("message")
+        tokens_output = token_estimator.count_text(message.get("content", "") if isinstance(message, dict) else "")
+    return tokens_input, tokens_output, _tokens_per_second(tokens_output, response.get("eval_duration"), latency_seconds)
+
+class StreamUsage:
+    """
+    Accumulates token counts chunk by chunk for a streamed response.
+
+    Each content chunk from Ollama carries one token, so chunks are counted
+    without decoding them; only the final chunk (which carries the
+    authoritative counts) is parsed.
+    """
+    def __init__(self, messages: List[Dict[str, Any]], started_at: float):
+        self.messages = messages
+        self.started_at = started_at
+        self.first_chunk_at: Optional[float] = None
+        self.chunks = 0
+        self.final: Dict[str, Any] = {}
+
+    def feed(self, chunk: Union[bytes, Dict[str, Any]], now: float) -> None:
+        if self.first_chunk_at is None:
+            self.first_chunk_at = now
+        if isinstance(chunk, bytes):
+            if b'"done":true' not in chunk and b'"done": true' not in chunk:
+                self.chunks += 1
+                return
+            chunk = loads(chunk)
+        if chunk.get("done"):
+            self.final = chunk
+        else:
+            self.chunks += 1
+
+    @property
+    def ttft_ms(self) -> Optional[int]:
+        if self.first_chunk_at is None:
+            return None
+        return int((self.first_chunk_at - self.started_at) * 1000)
+
+    def summary(self, now: float) -> Tuple[int, int, Optional[float]]:
+        """Returns (tokens_input, tokens_output, tokens_per_second) so far."""
+        tokens_input = self.final.get("prompt_eval_count") or token_estimator.count_messages(self.messages)
+        tokens_output = self.final.get("eval_count") or self.chunks
+        generation_seconds = now - (self.first_chunk_at or now)
+        return tokens_input, tokens_output, _tokens_per_second(tokens_output, self.final.get("eval_duration"), generation_seconds)
@@ -1,33 +1,43 @@
-from typing import List, Dict, Any
-from app.core.ports.llm_service import LLMService
+from typing import List, Dict, Any, Optional
+from app.core.ports.llm_service import AsyncLLMService
 from app.core.ports.repositories import ModelExposureRepository
+from app.core.ports.cache import ModelInventory
 from uuid import UUID
 
+# Backend model metadata shown to projects (host details stay internal)
+INVENTORY_FIELDS = ("available", "size", "family", "parameter_size", "quantization", "context_length")
+
 class ListAvailableModelsUseCase:
     """
     Use case for listing models available to a specific project.
     """
     def __init__(
         self, 
-        llm_service: LLMService, 
-        exposure_repo: ModelExposureRepository
+        llm_service: AsyncLLMService, 
+        exposure_repo: ModelExposureRepository,
+        inventory: Optional[ModelInventory] = None
     ):
         self.llm_service = llm_service
         self.exposure_repo = exposure_repo
+        self.inventory = inventory
 
-    def execute(self, project_id: UUID) -> List[Dict[str, Any]]:
+    async def execute(self, project_id: UUID) -> List[Dict[str, Any]]:
         # Get logical models defined for this project
-        exposures = self.exposure_repo.get_by_project(project_id)
+        exposures = await self.exposure_repo.get_by_project(project_id)
         
-        # Optionally cross-reference with actual available models in backend
-        # backend_models = self.llm_service.list_models()
+        # Cross-reference with the backends' models, from the in-memory inventory
+        described = await self.inventory.describe([exp.backend_model for exp in exposures]) if self.inventory else {}
         
         result = []
         for exp in exposures:
-            result.append({
+            model = {
                 "name": exp.logical_name,
                 "backend_model": exp.backend_model,
                 "config": exp.config
-            })
+            }
+            backend_info = described.get(exp.backend_model)
+            if backend_info is not None:
+                model.update({field: backend_info.get(field) for field in INVENTORY_FIELDS})
+            result.append(model)
             
         return result
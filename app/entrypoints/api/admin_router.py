@@ -1,24 +1,129 @@
-from fastapi import APIRouter, Depends
+from datetime import datetime
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Request
 from app.entrypoints.api.admin_auth import validate_admin_key
 from app.core.use_cases.admin.get_stats import GetSystemStatsUseCase
-from app.infrastructure.adapters.sql_repositories import SQLLogRepository
+from app.infrastructure.adapters.sql_repositories import SQLLogRepository, SQLLatencySketchRepository, SQLChatJobRepository
 from app.infrastructure.adapters.database import get_session
-from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 router = APIRouter(prefix="/admin", tags=["Admin"], dependencies=[Depends(validate_admin_key)])
 
 @router.get("/stats")
-async def get_stats(session: Session = Depends(get_session)):
+async def get_stats(
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    granularity: str = "hour",
+    window: Optional[str] = None,
+    session: AsyncSession = Depends(get_session)
+):
     """
     Global usage statistics for the LLM Gateway.
+    Served from per-minute / per-hour rollups; `since` and `until` are UTC.
+    `window` (e.g. 15m, 1h, 7d) is a shorthand for `since`.
     """
+    from app.infrastructure.adapters.latency_sketches import latency_sketches
+
     log_repo = SQLLogRepository(session)
-    use_case = GetSystemStatsUseCase(log_repo)
+    sketch_repo = SQLLatencySketchRepository(session)
+    # Include this worker's latest samples; other workers flush periodically
+    await latency_sketches.flush(sketch_repo)
+    use_case = GetSystemStatsUseCase(log_repo, sketch_repo)
     
-    return use_case.execute()
+    try:
+        return await use_case.execute(since, until, granularity, window)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+@router.get("/log-writer")
+async def get_log_writer_stats(request: Request):
+    """
+    Queue depth and throughput counters of this worker's request log writer.
+    """
+    return request.app.state.log_writer.stats()
+
+@router.get("/scheduler")
+async def get_scheduler_stats():
+    """
+    Per-model inflight counts, queue depth and wait times on this worker.
+    """
+    from app.infrastructure.adapters.scheduler import admission_scheduler
+    return admission_scheduler.stats() if admission_scheduler else {}
+
+@router.get("/cache")
+async def get_response_cache_stats():
+    """
+    Hit/miss counters and size of this worker's chat response cache.
+    """
+    from app.infrastructure.adapters.response_cache import response_cache
+    return response_cache.stats() if response_cache else {}
+
+@router.get("/coalescing")
+async def get_coalescing_stats():
+    """
+    Upstream calls started vs. joined by identical concurrent requests on this worker.
+    """
+    from app.infrastructure.adapters.coalescer import request_coalescer
+    return request_coalescer.stats() if request_coalescer else {}
+
+@router.get("/backends")
+async def get_backends(request: Request):
+    """
+    Health, load and model inventory of each Ollama host this worker routes to.
+    """
+    from app.infrastructure.adapters.backend_pool import BackendPool
+    llm_service = getattr(request.app.state.llm_service, "inner", request.app.state.llm_service)
+    if isinstance(llm_service, BackendPool):
+        return llm_service.stats()
+    return {"backends": [{"url": getattr(llm_service, "base_url", None)}]}
+
+@router.get("/resilience")
+async def get_resilience_stats(request: Request):
+    """
+    Circuit breaker states, retries and hedged calls of this worker's upstream calls.
+    """
+    from app.infrastructure.adapters.resilience import ResilientLLMService
+    llm_service = request.app.state.llm_service
+    return llm_service.stats() if isinstance(llm_service, ResilientLLMService) else {}
+
+@router.get("/residency")
+async def get_residency(request: Request):
+    """
+    Models loaded on each Ollama host, the hot models kept warm and observed load times.
+    """
+    residency = getattr(request.app.state, "residency", None)
+    return residency.stats() if residency else {}
+
+@router.get("/model-inventory")
+async def get_model_inventory(request: Request):
+    """
+    Cached catalogue of backend models (per-host availability included) and its freshness.
+    """
+    inventory = getattr(request.app.state, "model_inventory", None)
+    return inventory.stats() if inventory else {}
+
+@router.get("/jobs")
+async def get_job_stats(request: Request, session: AsyncSession = Depends(get_session)):
+    """
+    Chat jobs per status (all workers) and this worker's job runner counters.
+    """
+    runner = getattr(request.app.state, "job_runner", None)
+    return {
+        "jobs": await SQLChatJobRepository(session).count_by_status(),
+        "runner": runner.stats() if runner else None,
+    }
+
+@router.get("/routing")
+async def get_routing():
+    """
+    State of this worker's in-memory model routing table.
+    """
+    from app.infrastructure.adapters.routing_table import routing_table
+    return routing_table.stats()
 
 from app.core.use_cases.admin.manage_projects import ProjectManagementUseCase
 from app.infrastructure.adapters.sql_repositories import SQLProjectRepository
+from app.infrastructure.adapters.project_cache import project_cache
 from pydantic import BaseModel
 from typing import List, Optional
 
@@ -28,27 +133,27 @@ class CreateProjectRequest(BaseModel):
     allowed_models: List[str] = []
 
 @router.get("/projects")
-async def list_projects(session: Session = Depends(get_session)):
+async def list_projects(session: AsyncSession = Depends(get_session)):
     repo = SQLProjectRepository(session)
-    use_case = ProjectManagementUseCase(repo)
-    return use_case.list_projects()
+    use_case = ProjectManagementUseCase(repo, project_cache)
+    return await use_case.list_projects()
 
 @router.post("/projects")
-async def create_project(request: CreateProjectRequest, session: Session = Depends(get_session)):
+async def create_project(request: CreateProjectRequest, session: AsyncSession = Depends(get_session)):
     repo = SQLProjectRepository(session)
-    use_case = ProjectManagementUseCase(repo)
-    return use_case.create_project(
+    use_case = ProjectManagementUseCase(repo, project_cache)
+    return await use_case.create_project(
         name=request.name,
         description=request.description,
         allowed_models=request.allowed_models
     )
 
 @router.patch("/projects/{project_id}/toggle")
-async def toggle_project(project_id: str, session: Session = Depends(get_session)):
+async def toggle_project(project_id: str, session: AsyncSession = Depends(get_session)):
     from uuid import UUID
     repo = SQLProjectRepository(session)
-    use_case = ProjectManagementUseCase(repo)
-    project = use_case.toggle_project_status(UUID(project_id))
+    use_case = ProjectManagementUseCase(repo, project_cache)
+    project = await use_case.toggle_project_status(UUID(project_id))
     if not project:
         from fastapi import HTTPException
         raise HTTPException(status_code=404, detail="Project not found")
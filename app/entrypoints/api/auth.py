@@ -1,19 +1,24 @@
-from fastapi import Security, HTTPException, status, Depends
+from fastapi import Security, HTTPException, status, Depends, Request, Response
 from fastapi.security.api_key import APIKeyHeader
 from app.infrastructure.adapters.database import get_session
 from app.infrastructure.adapters.sql_repositories import SQLProjectRepository
+from app.infrastructure.adapters.project_cache import project_cache
+from app.infrastructure.adapters.rate_limiter import rate_limiter, rate_limit_headers
 from app.core.domain.project import Project
-from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 API_KEY_NAME = "X-API-Key"
 api_key_header = APIKeyHeader(name=API_KEY_NAME, auto_error=False)
 
 async def get_project_by_api_key(
+    request: Request,
+    response: Response,
     api_key: str = Security(api_key_header),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_session)
 ) -> Project:
     """
-    Dependency to validate API Key and return the associated Project.
+    Dependency to validate API Key, enforce the project's rate limit
+    and return the associated Project.
     """
     if not api_key:
         raise HTTPException(
@@ -21,8 +26,14 @@ async def get_project_by_api_key(
             detail="Missing API Key",
         )
     
-    repo = SQLProjectRepository(session)
-    project = repo.get_by_api_key(api_key)
+    hit, project = project_cache.get(api_key)
+    if not hit:
+        # Taken before the read so an invalidation racing with it wins
+        generation = project_cache.generation
+        repo = SQLProjectRepository(session)
+        project = await repo.get_by_api_key(api_key)
+        # Cache misses too, so invalid keys don't reach the DB on every attempt
+        project_cache.put(api_key, project, generation)
     
     if not project:
         raise HTTPException(
@@ -35,5 +46,21 @@ async def get_project_by_api_key(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Project is inactive",
         )
+    
+    # Picked up by the request logging middleware
+    request.state.project_id = project.id
+    
+    result = await rate_limiter.check_project(project)
+    if result:
+        headers = rate_limit_headers(result)
+        if not result.allowed:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Rate limit exceeded",
+                headers=headers,
+            )
+        response.headers.update(headers)
+        # Routes returning their own Response (e.g. streaming) copy these from request state
+        request.state.rate_limit_headers = headers
         
     return project
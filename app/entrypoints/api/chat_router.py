@@ -1,87 +1,295 @@
+import os
 from typing import List, Optional, Dict, Any
-from fastapi import APIRouter, Depends, HTTPException
+from uuid import UUID
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from app.core.domain.project import Project
 from app.entrypoints.api.auth import get_project_by_api_key
 from app.core.use_cases.chat import ChatWithModelUseCase
-from app.infrastructure.adapters.ollama_adapter import OllamaFreeAPIAdapter
-from app.infrastructure.adapters.sql_repositories import SQLModelExposureRepository, SQLLogRepository
+from app.entrypoints.api.dependencies import get_llm_service, get_log_sink, get_job_runner
+from app.entrypoints.api.errors import to_http_exception
+from app.core.exceptions import GatewayError
+from app.core.deadline import set_deadline
+from app.core.ports.llm_service import AsyncLLMService
+from app.core.ports.repositories import LogSink
+from app.infrastructure.adapters.sql_repositories import SQLModelExposureRepository
 from app.infrastructure.adapters.database import get_session
+from app.infrastructure.adapters.routing_table import routing_table, CachedModelExposureRepository
+from app.infrastructure.adapters.rate_limiter import rate_limiter, rate_limit_headers
+from app.infrastructure.adapters.scheduler import admission_scheduler
+from app.infrastructure.adapters.response_cache import response_cache
+from app.infrastructure.adapters.coalescer import request_coalescer
 from pydantic import BaseModel
-from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
 from app.core.use_cases.chat.stream_chat import StreamChatWithModelUseCase
+from app.core.use_cases.chat.sse import batch_frames
+from app.core.use_cases.chat.batch import BatchChatUseCase, BatchItem, BatchResult
+from app.core.serialization import dumps
+from app.core.domain.chat_job import ChatJob, JOB_SUCCEEDED
+from app.infrastructure.adapters.sql_repositories import SQLChatJobRepository
+from app.infrastructure.adapters.job_queue import JobRunner, job_summary
+from app.infrastructure.adapters.callback_policy import CallbackRejectedError, callback_policy
 
 router = APIRouter(prefix="/v1/chat", tags=["Chat"])
 
+# SSE write coalescing and keep-alive (0 disables each)
+SSE_FLUSH_INTERVAL_MS = int(os.getenv("SSE_FLUSH_INTERVAL_MS", "0"))
+SSE_FLUSH_BYTES = int(os.getenv("SSE_FLUSH_BYTES", "0"))
+SSE_HEARTBEAT_INTERVAL = float(os.getenv("SSE_HEARTBEAT_INTERVAL", "15"))
+# Seconds between client disconnect checks while streaming
+STREAM_DISCONNECT_POLL_INTERVAL = float(os.getenv("STREAM_DISCONNECT_POLL_INTERVAL", "1"))
+# Clients set a deadline (seconds) with this header; 0 disables the cap
+REQUEST_TIMEOUT_HEADER = "X-Request-Timeout"
+REQUEST_TIMEOUT_MAX = float(os.getenv("REQUEST_TIMEOUT_MAX", "300"))
+# Items accepted per /v1/chat/batch request and how many run at once
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "1000"))
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "8"))
+
+def request_timeout(http_request: Request) -> Optional[float]:
+    """Parses the request's deadline header, capped at REQUEST_TIMEOUT_MAX."""
+    value = http_request.headers.get(REQUEST_TIMEOUT_HEADER)
+    if value is None:
+        return None
+    try:
+        timeout = float(value)
+    except ValueError:
+        timeout = 0
+    if timeout <= 0:
+        raise HTTPException(status_code=422, detail=f"{REQUEST_TIMEOUT_HEADER} must be a positive number of seconds")
+    return min(timeout, REQUEST_TIMEOUT_MAX) if REQUEST_TIMEOUT_MAX else timeout
+
 class ChatRequest(BaseModel):
     model: str
     messages: List[Dict[str, str]]
     temperature: Optional[float] = None
     max_tokens: Optional[int] = None
     metadata: Optional[Dict[str, Any]] = None
+    # Overrides the exposure's cache_responses setting (non-streaming only)
+    cache: Optional[bool] = None
+
+class ChatBatchRequest(BaseModel):
+    items: List[ChatRequest]
+    # Capped at BATCH_MAX_CONCURRENCY
+    concurrency: Optional[int] = None
+
+class ChatJobRequest(ChatRequest):
+    # Receives the job summary and result (POST, JSON) once the job has finished
+    callback_url: Optional[str] = None
+
+def chat_params(request: ChatRequest) -> Dict[str, Any]:
+    params = {}
+    if request.temperature is not None:
+        params["temperature"] = request.temperature
+    if request.max_tokens is not None:
+        params["max_tokens"] = request.max_tokens
+    return params
+
+def ndjson_line(result: BatchResult) -> bytes:
+    """One NDJSON record per finished item, carrying the /v1/chat response or error."""
+    if result.error is None:
+        record = {"index": result.index, "status": 200, "response": result.response}
+        if result.cache_status:
+            record["cache"] = result.cache_status
+    elif isinstance(result.error, GatewayError):
+        error = to_http_exception(result.error)
+        record = {"index": result.index, "status": error.status_code, "error": error.detail}
+    else:
+        record = {"index": result.index, "status": 500, "error": str(result.error)}
+    return dumps(record) + b"\n"
 
 @router.post("")
 async def chat(
     request: ChatRequest,
+    response: Response,
+    http_request: Request,
     project: Project = Depends(get_project_by_api_key),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_session),
+    llm_service: AsyncLLMService = Depends(get_llm_service),
+    log_repo: LogSink = Depends(get_log_sink)
 ):
     """
     Unified chat endpoint (non-streaming).
     """
+    # Upstream calls made for this request (and its retries) share the deadline
+    set_deadline(request_timeout(http_request))
     # Dependencies injection (manual for now, could use a container)
-    llm_service = OllamaFreeAPIAdapter()
-    exposure_repo = SQLModelExposureRepository(session)
-    log_repo = SQLLogRepository(session)
+    exposure_repo = CachedModelExposureRepository(routing_table, SQLModelExposureRepository(session))
     
-    use_case = ChatWithModelUseCase(llm_service, exposure_repo, log_repo)
+    use_case = ChatWithModelUseCase(
+        llm_service, exposure_repo, log_repo, rate_limiter, admission_scheduler, response_cache, request_coalescer
+    )
     
     # Prepare optional params
-    params = {}
-    if request.temperature is not None:
-        params["temperature"] = request.temperature
-    if request.max_tokens is not None:
-        params["max_tokens"] = request.max_tokens
+    params = chat_params(request)
 
     try:
-        response = use_case.execute(
+        result = await use_case.execute(
             project_id=project.id,
             logical_model_name=request.model,
             messages=request.messages,
+            cache=request.cache,
             **params
         )
-        return response
+        if use_case.cache_status:
+            response.headers["X-Cache"] = use_case.cache_status
+        return result
+    except GatewayError as e:
+        raise to_http_exception(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/stream")
 async def stream_chat(
     request: ChatRequest,
+    http_request: Request,
     project: Project = Depends(get_project_by_api_key),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_session),
+    llm_service: AsyncLLMService = Depends(get_llm_service),
+    log_repo: LogSink = Depends(get_log_sink)
 ):
     """
     Unified chat endpoint (streaming via SSE).
     """
-    llm_service = OllamaFreeAPIAdapter()
-    exposure_repo = SQLModelExposureRepository(session)
-    log_repo = SQLLogRepository(session)
+    set_deadline(request_timeout(http_request))
+    exposure_repo = CachedModelExposureRepository(routing_table, SQLModelExposureRepository(session))
     
-    use_case = StreamChatWithModelUseCase(llm_service, exposure_repo, log_repo)
+    use_case = StreamChatWithModelUseCase(
+        llm_service, exposure_repo, log_repo, rate_limiter, admission_scheduler, request_coalescer
+    )
     
-    params = {}
-    if request.temperature is not None:
-        params["temperature"] = request.temperature
-    if request.max_tokens is not None:
-        params["max_tokens"] = request.max_tokens
+    params = chat_params(request)
 
     try:
-        generator = use_case.execute(
+        stream = await use_case.execute(
             project_id=project.id,
             logical_model_name=request.model,
             messages=request.messages,
             **params
         )
-        return StreamingResponse(generator, media_type="text/event-stream")
+    except GatewayError as e:
+        raise to_http_exception(e)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    # From here the stream holds an admission slot: close it on every path,
+    # including a response whose body is never iterated (client left early)
+    try:
+        frames = batch_frames(
+            stream,
+            SSE_FLUSH_INTERVAL_MS,
+            SSE_FLUSH_BYTES,
+            SSE_HEARTBEAT_INTERVAL,
+            is_disconnected=http_request.is_disconnected,
+            disconnect_poll_interval=STREAM_DISCONNECT_POLL_INTERVAL,
+        )
+        headers = getattr(http_request.state, "rate_limit_headers", None)
+        return StreamingResponse(
+            frames, media_type="text/event-stream", headers=headers, background=BackgroundTask(stream.aclose)
+        )
     except Exception as e:
+        await stream.aclose()
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/batch")
+async def batch_chat(
+    request: ChatBatchRequest,
+    http_request: Request,
+    project: Project = Depends(get_project_by_api_key),
+    session: AsyncSession = Depends(get_session),
+    llm_service: AsyncLLMService = Depends(get_llm_service),
+    log_repo: LogSink = Depends(get_log_sink)
+):
+    """
+    Runs many non-streaming chats in one request and streams each result as
+    an NDJSON line (with its `index`) as soon as it finishes.
+    """
+    if not request.items:
+        raise HTTPException(status_code=422, detail="items must not be empty")
+    if len(request.items) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=422, detail=f"At most {BATCH_MAX_ITEMS} items per batch")
+    # Authentication charged one request against the project budget; charge the rest
+    if len(request.items) > 1:
+        result = await rate_limiter.check_project(project, cost=len(request.items) - 1)
+        if result and not result.allowed:
+            raise HTTPException(status_code=429, detail="Rate limit exceeded", headers=rate_limit_headers(result))
+
+    # The deadline covers the whole batch
+    set_deadline(request_timeout(http_request))
+    exposure_repo = CachedModelExposureRepository(routing_table, SQLModelExposureRepository(session))
+    use_case = BatchChatUseCase(
+        llm_service, exposure_repo, log_repo, rate_limiter, admission_scheduler, response_cache, request_coalescer
+    )
+    items = [BatchItem(item.model, item.messages, chat_params(item), item.cache) for item in request.items]
+    concurrency = min(request.concurrency or BATCH_MAX_CONCURRENCY, BATCH_MAX_CONCURRENCY)
+
+    try:
+        results = await use_case.execute(project.id, items, concurrency)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    async def lines():
+        async for result in results:
+            yield ndjson_line(result)
+
+    headers = getattr(http_request.state, "rate_limit_headers", None)
+    return StreamingResponse(lines(), media_type="application/x-ndjson", headers=headers)
+
+@router.post("/jobs", status_code=202)
+async def submit_chat_job(
+    request: ChatJobRequest,
+    response: Response,
+    project: Project = Depends(get_project_by_api_key),
+    session: AsyncSession = Depends(get_session),
+    job_runner: Optional[JobRunner] = Depends(get_job_runner)
+):
+    """
+    Queues a non-streaming chat to run in the background. Poll
+    `/v1/chat/jobs/{id}` for its status and fetch `/v1/chat/jobs/{id}/result`.
+    """
+    if request.callback_url:
+        try:
+            await callback_policy.check(request.callback_url)
+        except CallbackRejectedError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+    job = await SQLChatJobRepository(session).create(ChatJob(
+        project_id=project.id,
+        model=request.model,
+        messages=request.messages,
+        params=chat_params(request),
+        cache=request.cache,
+        callback_url=request.callback_url,
+    ))
+    if job_runner:
+        job_runner.notify()
+    response.headers["Location"] = f"{router.prefix}/jobs/{job.id}"
+    return job_summary(job)
+
+async def get_project_job(job_id: UUID, project: Project, session: AsyncSession) -> ChatJob:
+    job = await SQLChatJobRepository(session).get(job_id)
+    # Other projects' jobs are indistinguishable from missing ones
+    if job is None or job.project_id != project.id:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@router.get("/jobs/{job_id}")
+async def get_chat_job(
+    job_id: UUID,
+    project: Project = Depends(get_project_by_api_key),
+    session: AsyncSession = Depends(get_session)
+):
+    """Status of a submitted job."""
+    return job_summary(await get_project_job(job_id, project, session))
+
+@router.get("/jobs/{job_id}/result")
+async def get_chat_job_result(
+    job_id: UUID,
+    project: Project = Depends(get_project_by_api_key),
+    session: AsyncSession = Depends(get_session)
+):
+    """The chat response of a finished job (same shape as `/v1/chat`)."""
+    job = await get_project_job(job_id, project, session)
+    if job.status != JOB_SUCCEEDED:
+        detail = f"Job {job.status}: {job.error}" if job.error else f"Job is {job.status}"
+        raise HTTPException(status_code=409, detail=detail)
+    return job.result
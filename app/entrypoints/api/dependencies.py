@@ -0,0 +1,30 @@
+from typing import Optional
+from fastapi import Request
+from app.core.ports.llm_service import AsyncLLMService
+from app.core.ports.repositories import LogSink
+from app.core.ports.cache import ModelInventory
+from app.infrastructure.adapters.job_queue import JobRunner
+
+def get_llm_service(request: Request) -> AsyncLLMService:
+    """
+    Dependency returning the process-wide LLM adapter created in the app lifespan.
+    """
+    return request.app.state.llm_service
+
+def get_log_sink(request: Request) -> LogSink:
+    """
+    Dependency returning the background RequestLog writer started in the app lifespan.
+    """
+    return request.app.state.log_writer
+
+def get_job_runner(request: Request) -> Optional[JobRunner]:
+    """
+    Dependency returning this process's chat job workers (None when jobs are disabled).
+    """
+    return getattr(request.app.state, "job_runner", None)
+
+def get_model_inventory(request: Request) -> Optional[ModelInventory]:
+    """
+    Dependency returning the cached backend model inventory (None when disabled).
+    """
+    return getattr(request.app.state, "model_inventory", None)
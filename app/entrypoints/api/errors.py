@@ -0,0 +1,30 @@
+import math
+from fastapi import HTTPException, status
+from app.core.exceptions import (
+    GatewayError, RateLimitExceededError, AdmissionRejectedError, CircuitOpenError, DeadlineExceededError
+)
+
+def to_http_exception(error: GatewayError) -> HTTPException:
+    """
+    Maps gateway use case errors to HTTP responses.
+    """
+    if isinstance(error, RateLimitExceededError):
+        return HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=str(error),
+            headers={
+                "Retry-After": str(max(1, math.ceil(error.retry_after))),
+                "X-RateLimit-Limit": str(error.limit),
+                "X-RateLimit-Remaining": "0",
+                "X-RateLimit-Reset": str(math.ceil(error.reset_after)),
+            },
+        )
+    if isinstance(error, (AdmissionRejectedError, CircuitOpenError)):
+        return HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(error),
+            headers={"Retry-After": str(max(1, math.ceil(error.retry_after)))},
+        )
+    if isinstance(error, DeadlineExceededError):
+        return HTTPException(status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail=str(error))
+    return HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(error))
@@ -0,0 +1,13 @@
+from fastapi import APIRouter, Request, Response
+from app.infrastructure.adapters.metrics import refresh_runtime_metrics, render_metrics
+
+router = APIRouter(tags=["Monitoring"])
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics(request: Request):
+    """
+    Prometheus / OpenMetrics scrape endpoint (aggregated across workers in multiprocess mode).
+    """
+    refresh_runtime_metrics(request.app)
+    body, content_type = render_metrics(request.headers.get("accept", ""))
+    return Response(content=body, media_type=content_type)
@@ -1,26 +1,48 @@
-from fastapi import APIRouter, Depends
+import hashlib
+from typing import Optional
+from fastapi import APIRouter, Depends, Request, Response
 from app.core.domain.project import Project
 from app.entrypoints.api.auth import get_project_by_api_key
 from app.core.use_cases.models import ListAvailableModelsUseCase
-from app.infrastructure.adapters.ollama_adapter import OllamaFreeAPIAdapter
+from app.entrypoints.api.dependencies import get_llm_service, get_model_inventory
+from app.core.ports.llm_service import AsyncLLMService
+from app.core.ports.cache import ModelInventory
+from app.core.serialization import dumps
 from app.infrastructure.adapters.sql_repositories import SQLModelExposureRepository
 from app.infrastructure.adapters.database import get_session
-from sqlmodel import Session
+from app.infrastructure.adapters.routing_table import routing_table, CachedModelExposureRepository
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 router = APIRouter(prefix="/v1/models", tags=["Models"])
 
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match check (weak comparison, as RFC 9110 asks for GET)."""
+    if not if_none_match:
+        return False
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags
+
 @router.get("")
 async def list_models(
+    http_request: Request,
     project: Project = Depends(get_project_by_api_key),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_session),
+    llm_service: AsyncLLMService = Depends(get_llm_service),
+    inventory: Optional[ModelInventory] = Depends(get_model_inventory)
 ):
     """
-    Returns models available to the project.
+    Returns models available to the project, with backend metadata and availability.
+    Carries an ETag; pollers sending it back in If-None-Match get 304 while nothing changed.
     """
-    llm_service = OllamaFreeAPIAdapter()
-    exposure_repo = SQLModelExposureRepository(session)
+    exposure_repo = CachedModelExposureRepository(routing_table, SQLModelExposureRepository(session))
     
-    use_case = ListAvailableModelsUseCase(llm_service, exposure_repo)
+    use_case = ListAvailableModelsUseCase(llm_service, exposure_repo, inventory)
     
-    models = use_case.execute(project.id)
-    return {"data": models}
+    models = await use_case.execute(project.id)
+    body = dumps({"data": models})
+    etag = f'"{hashlib.sha1(body).hexdigest()}"'
+    # Returned responses bypass the injected Response, so carry the rate limit headers over
+    headers = {**(getattr(http_request.state, "rate_limit_headers", None) or {}), "ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(http_request.headers.get("If-None-Match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
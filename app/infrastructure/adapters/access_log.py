@@ -0,0 +1,89 @@
+import os
+import asyncio
+from collections import deque
+from typing import Any, Deque, Dict, NamedTuple, Optional
+from uuid import UUID
+from loguru import logger
+
+
+class AccessRecord(NamedTuple):
+    method: str
+    path: str
+    route: str
+    status: int
+    project_id: Optional[UUID]
+    first_byte_ms: Optional[float]  # until the response headers were sent
+    last_byte_ms: float  # until the last body chunk was sent (full stream duration)
+    bytes_sent: int
+
+
+class AccessLogSink:
+    """
+    Non-blocking sink for HTTP access records.
+
+    `record` only appends to a bounded buffer (the oldest entry is dropped
+    when it is full); a background task formats and emits the buffered
+    records every `flush_interval_ms`, so string formatting and log I/O stay
+    off the request path.
+    """
+    def __init__(self, max_queue_size: int = 10000, flush_interval_ms: int = 500):
+        self.flush_interval = flush_interval_ms / 1000
+        self._buffer: Deque[AccessRecord] = deque(maxlen=max_queue_size)
+        self._task: Optional[asyncio.Task] = None
+        self.recorded = 0
+        self.dropped = 0
+
+    def record(self, entry: AccessRecord) -> None:
+        if len(self._buffer) == self._buffer.maxlen:
+            self.dropped += 1
+        self._buffer.append(entry)
+        self.recorded += 1
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self.flush()
+
+    def flush(self) -> int:
+        emitted = 0
+        while self._buffer:
+            entry = self._buffer.popleft()
+            logger.info(
+                f"{entry.method} {entry.path} | Status: {entry.status} | Project: {entry.project_id} "
+                f"| TTFB: {_ms(entry.first_byte_ms)} | Latency: {_ms(entry.last_byte_ms)} | Bytes: {entry.bytes_sent}"
+            )
+            emitted += 1
+        return emitted
+
+    def stats(self) -> Dict[str, Any]:
+        return {"queued": len(self._buffer), "recorded": self.recorded, "dropped": self.dropped}
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except Exception as e:
+                logger.warning(f"Access log flush failed: {e}")
+
+
+def _ms(value: Optional[float]) -> str:
+    return "-" if value is None else f"{value:.1f}ms"
+
+
+def create_access_log_from_env() -> AccessLogSink:
+    return AccessLogSink(
+        max_queue_size=int(os.getenv("ACCESS_LOG_MAX_QUEUE_SIZE", "10000")),
+        flush_interval_ms=int(os.getenv("ACCESS_LOG_FLUSH_INTERVAL_MS", "500")),
+    )
+
+# Process-wide sink fed by RequestLoggingMiddleware
+access_log = create_access_log_from_env()
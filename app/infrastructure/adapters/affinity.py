@@ -0,0 +1,114 @@
+import os
+import time
+import hashlib
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+def conversation_fingerprint(model: str, messages: List[Dict[str, Any]]) -> Optional[str]:
+    """
+    Identifies a conversation by its leading messages: the system prompt(s)
+    and the first user turn. These stay the same on every later turn, while
+    the rest of the history grows, so all turns share one fingerprint.
+    """
+    digest = hashlib.sha1(model.encode("utf-8"))
+    for message in messages:
+        digest.update(b"\0" + str(message.get("role", "")).encode("utf-8"))
+        digest.update(b"\0" + str(message.get("content") or "").encode("utf-8"))
+        if message.get("role") != "system":
+            return digest.hexdigest()
+    return None
+
+
+class AffinityTable:
+    """
+    Bounded LRU of conversation fingerprint -> backend URL that last served
+    it, with the conversation's context length in tokens as that backend
+    reported it.
+
+    Entries expire after `ttl` (roughly how long the backend keeps the model
+    and its prompt cache loaded). Also tallies how often routing followed
+    the affinity and how much prompt evaluation that saved.
+    """
+    def __init__(
+        self,
+        max_entries: int = 10000,
+        ttl: float = 600.0,
+        max_outstanding: int = 4,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        # A preferred host with this many requests in flight is considered saturated
+        self.max_outstanding = max_outstanding
+        self.clock = clock
+        # fingerprint -> (url, expires_at, context tokens after the last turn)
+        self._entries: "OrderedDict[str, Tuple[str, float, int]]" = OrderedDict()
+        self.routed = 0
+        self.spilled = 0
+        self.prompt_tokens_reused = 0
+        self.prompt_eval_ms_saved = 0.0
+
+    def _entry(self, fingerprint: str) -> Optional[Tuple[str, float, int]]:
+        entry = self._entries.get(fingerprint)
+        if entry is None:
+            return None
+        if self.clock() >= entry[1]:
+            del self._entries[fingerprint]
+            return None
+        self._entries.move_to_end(fingerprint)
+        return entry
+
+    def get(self, fingerprint: str) -> Optional[str]:
+        entry = self._entry(fingerprint)
+        return entry[0] if entry else None
+
+    def put(self, fingerprint: str, url: str, context_tokens: int = 0) -> None:
+        self._entries[fingerprint] = (url, self.clock() + self.ttl, context_tokens)
+        self._entries.move_to_end(fingerprint)
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def observe_turn(self, fingerprint: str, url: str, fields: Dict[str, Any]) -> None:
+        """
+        Pins the conversation to `url` after a finished turn. A later turn
+        counts as routed when it ran where the previous one did, or spilled
+        when it ran elsewhere (saturated or failing host); routed turns also
+        count the prompt work the backend's cache skipped: the whole context
+        it held after that turn (its prompt plus its answer, in the backend's
+        own token counts), priced at this turn's per-token
+        `prompt_eval_duration`.
+        """
+        previous = self._entry(fingerprint)
+        evaluated = fields.get("prompt_eval_count") or 0
+        reused = 0
+        if previous and previous[0] == url:
+            self.routed += 1
+            reused = previous[2]
+        elif previous:
+            self.spilled += 1
+        if reused:
+            self.prompt_tokens_reused += reused
+            duration_ns = fields.get("prompt_eval_duration")
+            if evaluated and duration_ns:
+                self.prompt_eval_ms_saved += reused * duration_ns / evaluated / 1e6
+        self.put(fingerprint, url, reused + evaluated + (fields.get("eval_count") or 0))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "routed": self.routed,
+            "spilled": self.spilled,
+            "prompt_tokens_reused": self.prompt_tokens_reused,
+            "prompt_eval_ms_saved": round(self.prompt_eval_ms_saved, 1),
+        }
+
+
+def create_affinity_table_from_env() -> Optional[AffinityTable]:
+    if os.getenv("AFFINITY_ENABLED", "true").lower() != "true":
+        return None
+    return AffinityTable(
+        max_entries=int(os.getenv("AFFINITY_MAX_ENTRIES", "10000")),
+        ttl=float(os.getenv("AFFINITY_TTL", "600")),
+        max_outstanding=int(os.getenv("AFFINITY_MAX_OUTSTANDING", "4")),
+    )
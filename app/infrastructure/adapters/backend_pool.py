@@ -0,0 +1,373 @@
+import os
+import time
+import asyncio
+import hashlib
+from functools import partial
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, NamedTuple, Optional, Set
+import httpx
+from loguru import logger
+from app.core.ports.llm_service import AsyncLLMService
+from app.core.serialization import loads
+from app.infrastructure.adapters.ollama_http_adapter import OllamaHTTPAdapter
+from app.infrastructure.adapters.affinity import AffinityTable, conversation_fingerprint, create_affinity_table_from_env
+
+LEAST_OUTSTANDING = "least_outstanding"
+EWMA = "ewma"
+
+def normalize_model_name(name: str) -> str:
+    """Ollama treats an untagged model name as `<name>:latest`."""
+    return name if ":" in name else f"{name}:latest"
+
+def _rendezvous_score(model: str, url: str) -> int:
+    # hashlib rather than hash(): every worker must rank hosts the same way
+    return int.from_bytes(hashlib.blake2b(f"{model}|{url}".encode(), digest_size=8).digest(), "big")
+
+def is_backend_failure(error: BaseException) -> bool:
+    """Connection problems and 5xx count against a host; client errors (4xx) don't."""
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code >= 500
+    return isinstance(error, (httpx.TransportError, asyncio.TimeoutError))
+
+
+class UpstreamTarget(NamedTuple):
+    """One host a request can be sent to, as seen by the resilience layer."""
+    key: str
+    achat: Callable[..., Awaitable[Dict[str, Any]]]
+    astream_chat_raw: Callable[..., AsyncIterator[bytes]]
+
+
+class _Backend:
+    """Routing state for one Ollama host."""
+    def __init__(self, adapter: OllamaHTTPAdapter):
+        self.adapter = adapter
+        self.url = adapter.base_url
+        # Raw /api/tags entries and their normalized names; None until the first probe
+        self.inventory: List[Dict[str, Any]] = []
+        self.models: Optional[Set[str]] = None
+        self.outstanding = 0
+        self.ewma_ms: Optional[float] = None
+        self.consecutive_failures = 0
+        self.consecutive_ejections = 0
+        self.ejected_until = 0.0
+        # Ejected because the probe failed, not because requests did
+        self.ejected_by_probe = False
+        self.requests = 0
+        self.errors = 0
+        self.ejections = 0
+
+    def available(self, now: float) -> bool:
+        return now >= self.ejected_until
+
+    def serves(self, model: str) -> bool:
+        return self.models is None or model in self.models
+
+
+class BackendPool(AsyncLLMService):
+    """
+    AsyncLLMService spreading requests over several Ollama hosts.
+
+    A physical model is routed to the hosts whose inventory (from their
+    `/api/tags`) lists it. Hosts are ranked per model by rendezvous hashing
+    and only the top `replicas_per_model` take its traffic, so each model
+    stays loaded on a few hosts instead of all of them. Among those, the
+    least loaded host wins: fewest outstanding requests, or lowest
+    EWMA latency weighted by outstanding requests with the "ewma" strategy.
+
+    A host that fails `failure_threshold` times in a row (connection errors
+    or 5xx) is ejected for `ejection_seconds`, doubling on each consecutive
+    ejection up to `max_ejection_seconds`. Active probes refresh inventories
+    every `probe_interval`; a host ejected by a failed probe is reinstated as
+    soon as it answers one again, but a host ejected for failing requests
+    serves out its ejection (it may still list models while unable to run
+    them). If every candidate is ejected, requests go to them anyway rather
+    than failing.
+
+    With an `affinity` table, every turn of a conversation goes to the host
+    that served the previous one (or, for a new conversation, the replica
+    its fingerprint hashes to), so Ollama can reuse the cached prompt
+    prefix. If that host already has `affinity.max_outstanding` requests in
+    flight, the turn spills over to the least loaded replica instead.
+
+    With a `residency` tracker (see ResidencyManager), hosts that have the
+    model loaded rank ahead of those that would have to load it first.
+    """
+    def __init__(
+        self,
+        adapters: List[OllamaHTTPAdapter],
+        strategy: str = LEAST_OUTSTANDING,
+        replicas_per_model: int = 2,
+        failure_threshold: int = 3,
+        ejection_seconds: float = 30.0,
+        max_ejection_seconds: float = 300.0,
+        probe_interval: float = 10.0,
+        probe_timeout: float = 5.0,
+        ewma_decay: float = 0.3,
+        affinity: Optional[AffinityTable] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if not adapters:
+            raise ValueError("BackendPool needs at least one backend")
+        if strategy not in (LEAST_OUTSTANDING, EWMA):
+            raise ValueError(f"Unknown balancing strategy: {strategy}")
+        self.backends = [_Backend(adapter) for adapter in adapters]
+        self.strategy = strategy
+        self.replicas_per_model = replicas_per_model
+        self.failure_threshold = failure_threshold
+        self.ejection_seconds = ejection_seconds
+        self.max_ejection_seconds = max_ejection_seconds
+        self.probe_interval = probe_interval
+        self.probe_timeout = probe_timeout
+        self.ewma_decay = ewma_decay
+        self.affinity = affinity
+        # Set once the residency manager is built on top of this pool
+        self.residency = None
+        self.clock = clock
+        self._probe_task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        """Learns every host's models before taking traffic, then keeps probing in the background."""
+        await self.probe()
+        self._probe_task = asyncio.create_task(self._probe_loop())
+
+    async def aclose(self) -> None:
+        if self._probe_task:
+            self._probe_task.cancel()
+            self._probe_task = None
+        closed = set()
+        for backend in self.backends:
+            # Adapters usually share one connection pool; close each client once
+            if id(backend.adapter.client) not in closed:
+                closed.add(id(backend.adapter.client))
+                await backend.adapter.aclose()
+
+    def _candidates(self, name: str) -> List[_Backend]:
+        """Hosts that may serve the (normalized) model, in rendezvous order."""
+        now = self.clock()
+        # A model no host lists (e.g. inventories not loaded yet) may be anywhere
+        candidates = [backend for backend in self.backends if backend.serves(name)] or self.backends
+        candidates = [backend for backend in candidates if backend.available(now)] or candidates
+        candidates.sort(key=lambda backend: _rendezvous_score(name, backend.url), reverse=True)
+        return candidates
+
+    def replicas(self, model: str) -> List[_Backend]:
+        """The hosts that normally take `model`'s traffic."""
+        return self._candidates(normalize_model_name(model))[:self.replicas_per_model]
+
+    def rank(self, model: str, messages: Optional[List[Dict[str, str]]] = None) -> List[_Backend]:
+        """
+        Hosts to try for `model`, best first: the conversation's host if it
+        has spare capacity, then its sticky replicas ordered by load, then
+        the remaining candidates (used for retries and hedges). Hosts with
+        the model loaded go ahead of the others, keeping that order.
+        """
+        name = normalize_model_name(model)
+        candidates = self._candidates(name)
+        replicas = candidates[:self.replicas_per_model]
+        ranked = sorted(replicas, key=self._load) + candidates[self.replicas_per_model:]
+        if self.residency:
+            ranked.sort(key=lambda backend: not self.residency.is_resident(backend.url, name))
+
+        fingerprint = conversation_fingerprint(name, messages) if self.affinity and messages else None
+        if fingerprint:
+            pinned = self.affinity.get(fingerprint)
+            preferred = next((backend for backend in candidates if backend.url == pinned), None) or max(
+                replicas, key=lambda backend: _rendezvous_score(fingerprint, backend.url)
+            )
+            # Routed/spilled are counted once the turn completes (see _remember):
+            # retries and hedges rank the hosts again for the same request
+            if preferred.outstanding < self.affinity.max_outstanding:
+                ranked.remove(preferred)
+                ranked.insert(0, preferred)
+        return ranked
+
+    def pick(self, model: str, messages: Optional[List[Dict[str, str]]] = None) -> _Backend:
+        return self.rank(model, messages)[0]
+
+    def targets(self, model: str, messages: Optional[List[Dict[str, str]]] = None) -> List[UpstreamTarget]:
+        return [
+            UpstreamTarget(backend.url, partial(self._achat_on, backend), partial(self._astream_chat_raw_on, backend))
+            for backend in self.rank(model, messages)
+        ]
+
+    def _remember(self, backend: _Backend, model: str, messages: List[Dict[str, str]], fields: Dict[str, Any]) -> None:
+        """
+        Pins the conversation to the host that now holds its prompt cache,
+        and notes that the host has the model loaded.
+        """
+        if self.affinity:
+            fingerprint = conversation_fingerprint(normalize_model_name(model), messages)
+            if fingerprint:
+                self.affinity.observe_turn(fingerprint, backend.url, fields)
+        if self.residency:
+            self.residency.observe(backend.url, model, fields)
+
+    def _load(self, backend: _Backend):
+        if self.strategy == EWMA:
+            return (backend.ewma_ms or 0.0) * (backend.outstanding + 1)
+        return (backend.outstanding, backend.ewma_ms or 0.0)
+
+    def _record_latency(self, backend: _Backend, seconds: float) -> None:
+        sample = seconds * 1000
+        if backend.ewma_ms is None:
+            backend.ewma_ms = sample
+        else:
+            backend.ewma_ms = self.ewma_decay * sample + (1 - self.ewma_decay) * backend.ewma_ms
+
+    def _record_success(self, backend: _Backend) -> None:
+        backend.consecutive_failures = 0
+        backend.consecutive_ejections = 0
+
+    def _record_failure(self, backend: _Backend, error: BaseException) -> None:
+        if not is_backend_failure(error):
+            return
+        backend.errors += 1
+        backend.consecutive_failures += 1
+        if backend.consecutive_failures >= self.failure_threshold:
+            self._eject(backend, f"{backend.consecutive_failures} consecutive failures ({error!r})")
+
+    def _eject(self, backend: _Backend, reason: str, by_probe: bool = False) -> None:
+        duration = min(self.max_ejection_seconds, self.ejection_seconds * 2 ** backend.consecutive_ejections)
+        backend.ejected_until = self.clock() + duration
+        backend.ejected_by_probe = by_probe
+        backend.consecutive_ejections += 1
+        backend.consecutive_failures = 0
+        backend.ejections += 1
+        logger.warning(f"Ejecting backend {backend.url} for {duration:.0f}s: {reason}")
+
+    async def achat(self, model: str, messages: List[Dict[str, str]], **kwargs) -> Dict[str, Any]:
+        return await self._achat_on(self.pick(model, messages), model, messages, **kwargs)
+
+    async def _achat_on(self, backend: _Backend, model: str, messages: List[Dict[str, str]], **kwargs) -> Dict[str, Any]:
+        backend.outstanding += 1
+        backend.requests += 1
+        started = self.clock()
+        try:
+            response = await backend.adapter.achat(model, messages, **kwargs)
+        except Exception as e:
+            self._record_failure(backend, e)
+            raise
+        finally:
+            backend.outstanding -= 1
+        self._record_latency(backend, self.clock() - started)
+        self._record_success(backend)
+        if self.affinity or self.residency:
+            self._remember(backend, model, messages, response)
+        return response
+
+    async def astream_chat(self, model: str, messages: List[Dict[str, str]], **kwargs) -> AsyncIterator[Dict[str, Any]]:
+        async for line in self.astream_chat_raw(model, messages, **kwargs):
+            yield loads(line)
+
+    def astream_chat_raw(self, model: str, messages: List[Dict[str, str]], **kwargs) -> AsyncIterator[bytes]:
+        return self._astream_chat_raw_on(self.pick(model, messages), model, messages, **kwargs)
+
+    async def _astream_chat_raw_on(
+        self, backend: _Backend, model: str, messages: List[Dict[str, str]], **kwargs
+    ) -> AsyncIterator[bytes]:
+        """Streams from one host; its latency sample is the time to the first chunk."""
+        backend.outstanding += 1
+        backend.requests += 1
+        started = self.clock()
+        first = True
+        line = b""
+        try:
+            async for line in backend.adapter.astream_chat_raw(model, messages, **kwargs):
+                if first:
+                    self._record_latency(backend, self.clock() - started)
+                    first = False
+                yield line
+        except Exception as e:
+            self._record_failure(backend, e)
+            raise
+        finally:
+            backend.outstanding -= 1
+        self._record_success(backend)
+        if self.affinity or self.residency:
+            # Ollama reports prompt evaluation and load time in the final chunk
+            self._remember(backend, model, messages, loads(line) if b'"prompt_eval_count"' in line else {})
+
+    async def alist_models(self) -> List[Dict[str, Any]]:
+        """Refreshes every host's inventory and returns the models available on at least one."""
+        errors = await self.probe()
+        if len(errors) == len(self.backends):
+            raise errors[0]
+        models: Dict[str, Dict[str, Any]] = {}
+        now = self.clock()
+        for backend in self.backends:
+            if backend.available(now):
+                for entry in backend.inventory:
+                    models.setdefault(entry.get("name"), entry)
+        return list(models.values())
+
+    async def probe(self) -> List[BaseException]:
+        """
+        Fetches each host's model list. Hosts that don't answer are ejected;
+        hosts the probe itself ejected are reinstated once they answer.
+        """
+        async def probe_one(backend: _Backend) -> Optional[BaseException]:
+            try:
+                inventory = await asyncio.wait_for(backend.adapter.alist_models(), self.probe_timeout)
+            except Exception as e:
+                if backend.available(self.clock()):
+                    self._eject(backend, f"probe failed ({e!r})", by_probe=True)
+                return e
+            backend.inventory = inventory
+            backend.models = {
+                normalize_model_name(entry[field]) for entry in inventory for field in ("name", "model") if entry.get(field)
+            }
+            if backend.ejected_by_probe:
+                backend.ejected_until = 0.0
+                backend.ejected_by_probe = False
+            return None
+
+        results = await asyncio.gather(*(probe_one(backend) for backend in self.backends))
+        return [error for error in results if error is not None]
+
+    async def _probe_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.probe_interval)
+            try:
+                await self.probe()
+            except Exception as e:
+                logger.warning(f"Backend probe failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        now = self.clock()
+        return {
+            "strategy": self.strategy,
+            "replicas_per_model": self.replicas_per_model,
+            "affinity": self.affinity.stats() if self.affinity else None,
+            "backends": [
+                {
+                    "url": backend.url,
+                    "healthy": backend.available(now),
+                    "ejected_for_seconds": round(max(0.0, backend.ejected_until - now), 1),
+                    "outstanding": backend.outstanding,
+                    "ewma_ms": round(backend.ewma_ms, 1) if backend.ewma_ms is not None else None,
+                    "requests": backend.requests,
+                    "errors": backend.errors,
+                    "ejections": backend.ejections,
+                    "models": sorted(backend.models) if backend.models is not None else None,
+                }
+                for backend in self.backends
+            ],
+        }
+
+
+def create_llm_service_from_env(client: httpx.AsyncClient) -> AsyncLLMService:
+    """
+    One adapter for OLLAMA_BASE_URL, or a BackendPool when OLLAMA_BASE_URLS
+    lists several hosts (all sharing `client`'s connection pool).
+    """
+    urls = [url.strip() for url in os.getenv("OLLAMA_BASE_URLS", "").split(",") if url.strip()]
+    if len(urls) <= 1:
+        return OllamaHTTPAdapter(base_url=urls[0] if urls else None, client=client)
+    return BackendPool(
+        [OllamaHTTPAdapter(base_url=url, client=client) for url in urls],
+        strategy=os.getenv("BACKEND_POOL_STRATEGY", LEAST_OUTSTANDING),
+        replicas_per_model=int(os.getenv("BACKEND_POOL_REPLICAS_PER_MODEL", "2")),
+        failure_threshold=int(os.getenv("BACKEND_POOL_FAILURE_THRESHOLD", "3")),
+        ejection_seconds=float(os.getenv("BACKEND_POOL_EJECTION_SECONDS", "30")),
+        probe_interval=float(os.getenv("BACKEND_POOL_PROBE_INTERVAL", "10")),
+        affinity=create_affinity_table_from_env(),
+    )
@@ -0,0 +1,114 @@
+import os
+import socket
+import asyncio
+import ipaddress
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from urllib.parse import urlsplit, urlunsplit
+
+# (host, port) -> IP addresses it resolves to
+Resolver = Callable[[str, int], Awaitable[List[str]]]
+
+
+class CallbackRejectedError(ValueError):
+    """Raised when a job callback URL is not one the gateway may call."""
+
+
+async def resolve_host(host: str, port: int) -> List[str]:
+    infos = await asyncio.get_running_loop().getaddrinfo(host, port, type=socket.SOCK_STREAM)
+    return [info[4][0] for info in infos]
+
+
+def is_public_address(address: str) -> bool:
+    ip = ipaddress.ip_address(address.split("%", 1)[0])
+    if ip.version == 6 and ip.ipv4_mapped:
+        ip = ip.ipv4_mapped
+    return ip.is_global and not ip.is_multicast
+
+
+class CallbackPolicy:
+    """
+    Decides which callback URLs job results may be POSTed to, so tenants
+    cannot point the gateway at internal services (SSRF).
+
+    A URL must be http(s), its host must match `allowed_hosts` when that is
+    set (exact names, or `*.example.com` for subdomains), and every address
+    the host resolves to must be public: loopback, link-local, private and
+    other reserved ranges are refused unless `allow_private` is set.
+    Deliveries connect to the address that was checked (see `pinned`), so
+    the name cannot be re-resolved to an internal address in between.
+    """
+    def __init__(
+        self,
+        allowed_hosts: Optional[List[str]] = None,
+        allow_private: bool = False,
+        resolve: Resolver = resolve_host,
+    ):
+        self.allowed_hosts = [host.lower() for host in allowed_hosts or []]
+        self.allow_private = allow_private
+        self.resolve = resolve
+
+    def host_allowed(self, host: str) -> bool:
+        if not self.allowed_hosts:
+            return True
+        for pattern in self.allowed_hosts:
+            if pattern.startswith("*.") and host.endswith(pattern[1:]):
+                return True
+            if host == pattern:
+                return True
+        return False
+
+    async def check(self, url: str) -> Optional[str]:
+        """
+        Validates `url` and returns the address to connect to (None when
+        private addresses are allowed and nothing needs pinning).
+        """
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            raise CallbackRejectedError("callback_url must be an http(s) URL")
+        host = parts.hostname.lower().rstrip(".")
+        if not self.host_allowed(host):
+            raise CallbackRejectedError(f"callback_url host '{host}' is not allowed")
+        if self.allow_private:
+            return None
+        try:
+            port = parts.port or (443 if parts.scheme == "https" else 80)
+        except ValueError:
+            raise CallbackRejectedError("callback_url has an invalid port")
+        try:
+            addresses = await self.resolve(host, port)
+        except OSError:
+            raise CallbackRejectedError(f"callback_url host '{host}' could not be resolved")
+        if not addresses or not all(is_public_address(address) for address in addresses):
+            raise CallbackRejectedError("callback_url must not point to a loopback, link-local or private address")
+        return addresses[0]
+
+    @staticmethod
+    def pinned(url: str, address: Optional[str]) -> Dict[str, Any]:
+        """Request arguments sending `url` to `address`, keeping its Host header and TLS name."""
+        if address is None:
+            return {"url": url}
+        parts = urlsplit(url)
+        netloc = f"[{address}]" if ":" in address else address
+        if parts.port:
+            netloc += f":{parts.port}"
+        if parts.username:
+            userinfo = parts.username + (f":{parts.password}" if parts.password else "")
+            netloc = f"{userinfo}@{netloc}"
+        host_header = f"[{parts.hostname}]" if ":" in parts.hostname else parts.hostname
+        if parts.port:
+            host_header += f":{parts.port}"
+        return {
+            "url": urlunsplit(parts._replace(netloc=netloc)),
+            "headers": {"Host": host_header},
+            "extensions": {"sni_hostname": parts.hostname},
+        }
+
+
+def create_callback_policy_from_env() -> CallbackPolicy:
+    return CallbackPolicy(
+        allowed_hosts=[host.strip() for host in os.getenv("JOB_CALLBACK_ALLOWED_HOSTS", "").split(",") if host.strip()],
+        allow_private=os.getenv("JOB_CALLBACK_ALLOW_PRIVATE", "false").lower() == "true",
+    )
+
+# Process-wide policy shared by job submission and callback delivery
+callback_policy = create_callback_policy_from_env()
@@ -0,0 +1,185 @@
+import os
+import asyncio
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+from app.core.deadline import check_deadline, detached_context
+from app.core.exceptions import DeadlineExceededError
+from app.core.ports.coalescer import RequestCoalescer
+
+class _SharedCall:
+    """One in-flight upstream call and the number of callers awaiting it."""
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+class _Broadcast:
+    """Fans one upstream chunk stream out to any number of subscribers."""
+    def __init__(self):
+        self.chunks: List[Dict[str, Any]] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.subscribers = 0
+        self.task: Optional[asyncio.Task] = None
+        self._changed = asyncio.Event()
+
+    def _notify(self) -> None:
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def produce(self, open_stream: Callable[[], AsyncIterator[Dict[str, Any]]]) -> None:
+        try:
+            async for chunk in open_stream():
+                self.chunks.append(chunk)
+                self._notify()
+        except asyncio.CancelledError:
+            self.error = RuntimeError("Upstream stream was cancelled")
+            raise
+        except Exception as e:
+            self.error = e
+        finally:
+            self.done = True
+            self._notify()
+
+    async def replay(self) -> AsyncIterator[Dict[str, Any]]:
+        position = 0
+        while True:
+            while position < len(self.chunks):
+                yield self.chunks[position]
+                position += 1
+            if self.done:
+                if self.error:
+                    raise self.error
+                return
+            if position:
+                await self._changed.wait()
+                continue
+            # Like an unshared stream, the first chunk must arrive within this subscriber's deadline
+            try:
+                await asyncio.wait_for(self._changed.wait(), check_deadline())
+            except asyncio.TimeoutError:
+                raise DeadlineExceededError("Request deadline exceeded waiting for the backend")
+
+class _Subscription:
+    """
+    One subscriber's iterator over a broadcast. It leaves the broadcast
+    when iteration ends or on `aclose()`, even if it was never iterated.
+    """
+    def __init__(self, broadcast: _Broadcast, on_leave: Callable[[_Broadcast], None]):
+        self._broadcast = broadcast
+        self._chunks = broadcast.replay()
+        self._on_leave = on_leave
+        self._left = False
+
+    def __aiter__(self) -> "_Subscription":
+        return self
+
+    async def __anext__(self) -> Dict[str, Any]:
+        try:
+            return await self._chunks.__anext__()
+        except BaseException:
+            self._leave()
+            raise
+
+    async def aclose(self) -> None:
+        await self._chunks.aclose()
+        self._leave()
+
+    def _leave(self) -> None:
+        if not self._left:
+            self._left = True
+            self._on_leave(self._broadcast)
+
+class SingleFlightCoalescer(RequestCoalescer):
+    """
+    In-process single-flight for chat calls.
+
+    The first caller for a key starts the upstream call as a separate task;
+    concurrent callers with the same key await that task instead of issuing
+    their own. A caller that is cancelled only detaches itself; the shared
+    call is cancelled once nobody is waiting for it anymore. Shared calls
+    run without any caller's deadline; each caller only bounds its own wait
+    by its own request deadline. Finished calls
+    are forgotten immediately, so this never serves stale results (that is
+    the response cache's job).
+    """
+    def __init__(self):
+        self._calls: Dict[str, _SharedCall] = {}
+        self._streams: Dict[str, _Broadcast] = {}
+        self.started = 0
+        self.joined = 0
+
+    async def run(self, key: str, call: Callable[[], Awaitable[Dict[str, Any]]]) -> Tuple[Dict[str, Any], bool]:
+        shared_call = self._calls.get(key)
+        shared = shared_call is not None
+        if shared:
+            self.joined += 1
+        else:
+            shared_call = _SharedCall(asyncio.create_task(call(), context=detached_context()))
+            self._calls[key] = shared_call
+            shared_call.task.add_done_callback(lambda _: self._forget(self._calls, key, shared_call))
+            self.started += 1
+
+        shared_call.waiters += 1
+        try:
+            # wait() never cancels the shared task, whether this caller times out or is cancelled
+            await asyncio.wait({shared_call.task}, timeout=check_deadline())
+            if not shared_call.task.done():
+                raise DeadlineExceededError("Request deadline exceeded waiting for a shared upstream call")
+            try:
+                return shared_call.task.result(), shared
+            except asyncio.TimeoutError as e:
+                raise DeadlineExceededError("Shared upstream call timed out") from e
+        finally:
+            shared_call.waiters -= 1
+            if shared_call.waiters == 0 and not shared_call.task.done():
+                shared_call.task.cancel()
+
+    def is_streaming(self, key: str) -> bool:
+        return key in self._streams
+
+    def stream(
+        self,
+        key: str,
+        open_stream: Callable[[], AsyncIterator[Dict[str, Any]]],
+        on_done: Optional[Callable[[], None]] = None,
+    ) -> Tuple[AsyncIterator[Dict[str, Any]], bool]:
+        broadcast = self._streams.get(key)
+        shared = broadcast is not None
+        if shared:
+            self.joined += 1
+        else:
+            broadcast = _Broadcast()
+            self._streams[key] = broadcast
+            broadcast.task = asyncio.create_task(broadcast.produce(open_stream), context=detached_context())
+            broadcast.task.add_done_callback(lambda _: self._forget(self._streams, key, broadcast))
+            if on_done:
+                broadcast.task.add_done_callback(lambda _: on_done())
+            self.started += 1
+
+        broadcast.subscribers += 1
+        return _Subscription(broadcast, self._leave), shared
+
+    def _leave(self, broadcast: _Broadcast) -> None:
+        broadcast.subscribers -= 1
+        if broadcast.subscribers == 0 and not broadcast.done:
+            broadcast.task.cancel()
+
+    @staticmethod
+    def _forget(registry: Dict[str, Any], key: str, entry: Any) -> None:
+        if registry.get(key) is entry:
+            del registry[key]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "inflight_calls": len(self._calls),
+            "inflight_streams": len(self._streams),
+            "started": self.started,
+            "joined": self.joined,
+        }
+
+def create_coalescer_from_env() -> Optional[SingleFlightCoalescer]:
+    if os.getenv("COALESCING_ENABLED", "true").lower() != "true":
+        return None
+    return SingleFlightCoalescer()
+
+# Process-wide coalescer shared by both chat use cases
+request_coalescer = create_coalescer_from_env()
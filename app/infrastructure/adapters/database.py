@@ -1,36 +1,151 @@
 import os
-from typing import Generator
-from sqlalchemy.ext.asyncio import create_async_engine
-from sqlalchemy.orm import sessionmaker
-from sqlmodel import SQLModel, create_engine, Session
+import time
+from typing import AsyncGenerator
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
 from dotenv import load_dotenv
 
 load_dotenv()
 
 # We'll use SQLite for development if DATABASE_URL is not provided
-# But use psycopg2-binary for prod as per specs
+# Postgres goes through asyncpg, SQLite through aiosqlite
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./llm_gateway.db")
 
-# For SQLModel sync usage (common with FastAPI dependencies)
-engine = create_engine(DATABASE_URL, echo=True)
+_ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
 
-import time
+def to_async_url(database_url: str) -> str:
+    """Maps a sync DATABASE_URL (as in .env / docker-compose) to its async driver."""
+    url = make_url(database_url)
+    driver = _ASYNC_DRIVERS.get(url.drivername)
+    if driver:
+        url = url.set(drivername=driver)
+    return url.render_as_string(hide_password=False)
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """Async queue pool that reports how long each checkout waited for a connection."""
+    def _do_get(self):
+        from app.infrastructure.adapters.metrics import observe_pool_checkout
+
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            observe_pool_checkout(time.perf_counter() - started)
+
+def create_engine_from_env(database_url: str = DATABASE_URL) -> AsyncEngine:
+    """
+    Builds the async engine with explicit pool settings. SQL echo is off
+    unless SQL_ECHO=true.
+    """
+    url = make_url(to_async_url(database_url))
+    kwargs = {
+        "echo": os.getenv("SQL_ECHO", "false").lower() == "true",
+        "pool_pre_ping": os.getenv("DATABASE_POOL_PRE_PING", "true").lower() == "true",
+    }
+    if url.get_backend_name() == "sqlite":
+        kwargs["connect_args"] = {"check_same_thread": False}
+    else:
+        kwargs.update(
+            poolclass=TimedQueuePool,
+            pool_size=int(os.getenv("DATABASE_POOL_SIZE", "10")),
+            max_overflow=int(os.getenv("DATABASE_MAX_OVERFLOW", "20")),
+            pool_timeout=float(os.getenv("DATABASE_POOL_TIMEOUT", "30")),
+            pool_recycle=int(os.getenv("DATABASE_POOL_RECYCLE", "1800")),
+        )
+        if url.get_driver_name() == "asyncpg":
+            # Per-connection prepared statement cache (asyncpg dialect option)
+            url = url.update_query_dict({
+                "prepared_statement_cache_size": os.getenv("DATABASE_STATEMENT_CACHE_SIZE", "500"),
+            })
+    return create_async_engine(url, **kwargs)
+
+engine = create_engine_from_env()
+async_session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+import asyncio
+from typing import List
+from sqlalchemy import inspect
 from loguru import logger
 
-def create_db_and_tables():
+def add_missing_columns(connection) -> List[str]:
+    """
+    Adds columns introduced after a table was first created (create_all never
+    alters existing tables). Idempotent: only columns absent from the live
+    schema are added. Columns with a scalar default get it as a server default
+    so existing rows are filled; the rest are added as nullable.
+    """
+    dialect = connection.dialect
+    quote = dialect.identifier_preparer.quote
+    inspector = inspect(connection)
+    existing_tables = set(inspector.get_table_names())
+    added = []
+    for table in SQLModel.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            ddl = f"ALTER TABLE {quote(table.name)} ADD COLUMN {quote(column.name)} {column.type.compile(dialect=dialect)}"
+            default = column.default.arg if column.default is not None and column.default.is_scalar else None
+            if default is not None:
+                literal = column.type.literal_processor(dialect)(default)
+                ddl += f" DEFAULT {literal}"
+                if not column.nullable:
+                    ddl += " NOT NULL"
+            connection.exec_driver_sql(ddl)
+            added.append(f"{table.name}.{column.name}")
+    return added
+
+def migrate_schema(connection) -> List[str]:
+    """
+    Creates missing tables, adds missing columns and, when the rollup table
+    is new, folds the request logs already stored into it. Runs in one
+    transaction, so a worker racing another one fails and retries instead of
+    backfilling twice.
+    """
+    from app.core.domain.request_log import RequestLog
+    from app.core.domain.request_rollup import RequestRollup
+    from app.infrastructure.adapters.sql_repositories import backfill_request_rollups
+
+    existing_tables = set(inspect(connection).get_table_names())
+    SQLModel.metadata.create_all(connection)
+    changes = [f"added column {column}" for column in add_missing_columns(connection)]
+    if RequestLog.__tablename__ in existing_tables and RequestRollup.__tablename__ not in existing_tables:
+        folded = backfill_request_rollups(connection)
+        changes.append(f"backfilled rollups from {folded} request logs")
+    return changes
+
+async def create_db_and_tables():
     """Initializes the database schema with retry logic."""
     # Import all models to ensure they are registered with SQLModel.metadata
     from app.core.domain.project import Project
     from app.core.domain.request_log import RequestLog
     from app.core.domain.model_exposure import ModelExposure
-    
+    from app.core.domain.routing_version import RoutingVersion
+    from app.core.domain.auth_version import AuthVersion
+    from app.core.domain.request_rollup import RequestRollup
+    from app.core.domain.latency_sketch import LatencySketch
+    from app.core.domain.chat_job import ChatJob
+
     max_retries = 10
     retry_delay = 5  # seconds
-    
+
     for attempt in range(1, max_retries + 1):
         try:
             logger.info(f"Attempting to connect to database (attempt {attempt}/{max_retries})...")
-            SQLModel.metadata.create_all(engine)
+            async with engine.begin() as conn:
+                changes = await conn.run_sync(migrate_schema)
+            if changes:
+                logger.info(f"Schema upgraded: {'; '.join(changes)}")
             logger.success("Database connection established and tables created.")
             break
         except Exception as e:
@@ -38,9 +153,9 @@ def create_db_and_tables():
                 logger.error(f"Failed to connect to database after {max_retries} attempts.")
                 raise e
             logger.warning(f"Database connection failed: {e}. Retrying in {retry_delay}s...")
-            time.sleep(retry_delay)
+            await asyncio.sleep(retry_delay)
 
-def get_session() -> Generator[Session, None, None]:
+async def get_session() -> AsyncGenerator[AsyncSession, None]:
     """FastAPI dependency for database sessions."""
-    with Session(engine) as session:
+    async with async_session_factory() as session:
         yield session
@@ -0,0 +1,267 @@
+import os
+import socket
+import asyncio
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+import httpx
+from loguru import logger
+from app.core.deadline import set_deadline
+from app.core.exceptions import RateLimitExceededError, AdmissionRejectedError, CircuitOpenError
+from app.core.domain.chat_job import ChatJob, JOB_SUCCEEDED, JOB_FAILED
+from app.core.ports.llm_service import AsyncLLMService
+from app.core.ports.repositories import ChatJobRepository, LogSink
+from app.core.use_cases.chat import ChatWithModelUseCase
+from app.infrastructure.adapters.sql_repositories import SQLChatJobRepository, SQLModelExposureRepository
+from app.infrastructure.adapters.routing_table import routing_table, CachedModelExposureRepository
+from app.infrastructure.adapters.rate_limiter import rate_limiter
+from app.infrastructure.adapters.scheduler import admission_scheduler
+from app.infrastructure.adapters.response_cache import response_cache
+from app.infrastructure.adapters.coalescer import request_coalescer
+from app.infrastructure.adapters.callback_policy import CallbackPolicy, CallbackRejectedError, callback_policy
+
+# "Not now" rather than "never": the job goes back to the queue until the hinted retry time
+_BACKPRESSURE_ERRORS = (RateLimitExceededError, AdmissionRejectedError, CircuitOpenError)
+
+def job_summary(job: ChatJob) -> Dict[str, Any]:
+    """Public view of a job (API responses and completion callbacks), without its result."""
+    def iso(value: Optional[datetime]) -> Optional[str]:
+        return value.isoformat() if value else None
+
+    return {
+        "id": str(job.id),
+        "status": job.status,
+        "model": job.model,
+        "attempts": job.attempts,
+        "error": job.error,
+        "created_at": iso(job.created_at),
+        "started_at": iso(job.started_at),
+        "finished_at": iso(job.finished_at),
+        "expires_at": iso(job.expires_at),
+    }
+
+class JobRunner:
+    """
+    Background workers executing queued chat jobs with ChatWithModelUseCase.
+
+    Each worker leases one job at a time and renews the lease while it runs;
+    a job whose worker died is picked up again once the lease lapses, up to
+    `max_attempts` times. Jobs rejected by rate limits, admission control or
+    open circuits are put back in the queue until their retry hint. Results
+    are kept for `result_ttl` seconds, then purged. Jobs with a callback URL
+    get their summary and result POSTed there once finished, if the
+    `callback_policy` still accepts the URL (redirects are not followed).
+    """
+    def __init__(
+        self,
+        session_factory,
+        llm_service: AsyncLLMService,
+        log_sink: LogSink,
+        workers: int = 2,
+        lease_seconds: float = 60.0,
+        max_attempts: int = 3,
+        result_ttl: float = 86400.0,
+        timeout: Optional[float] = 600.0,
+        poll_interval: float = 1.0,
+        purge_interval: float = 60.0,
+        callback_client: Optional[httpx.AsyncClient] = None,
+        callback_max_attempts: int = 3,
+        callback_policy: Optional[CallbackPolicy] = None,
+        worker_id: Optional[str] = None,
+    ):
+        self.session_factory = session_factory
+        self.llm_service = llm_service
+        self.log_sink = log_sink
+        self.workers = workers
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.result_ttl = result_ttl
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self.purge_interval = purge_interval
+        self.callback_client = callback_client or httpx.AsyncClient(timeout=10.0)
+        self.callback_max_attempts = callback_max_attempts
+        self.callback_policy = callback_policy or CallbackPolicy()
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self._wakeup = asyncio.Event()
+        self._tasks: List[asyncio.Task] = []
+        self.running = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.requeued = 0
+        self.callbacks_failed = 0
+
+    def start(self) -> None:
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._purge()))
+
+    async def close(self) -> None:
+        """Stops the workers; jobs they were running go straight back to the queue."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        await self.callback_client.aclose()
+
+    def notify(self) -> None:
+        """Wakes idle workers of this process (called when a job is submitted)."""
+        self._wakeup.set()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "worker_id": self.worker_id,
+            "workers": self.workers,
+            "running": self.running,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "requeued": self.requeued,
+            "callbacks_failed": self.callbacks_failed,
+        }
+
+    async def _jobs(self, call: Callable[[ChatJobRepository], Awaitable[Any]]) -> Any:
+        # Short-lived session per queue operation; nothing is held open while a job runs
+        async with self.session_factory() as session:
+            return await call(SQLChatJobRepository(session))
+
+    async def run_once(self) -> bool:
+        """Claims and executes one job; False when there was nothing to run."""
+        job = await self._jobs(lambda repo: repo.claim(self.worker_id, self.lease_seconds))
+        if job is None:
+            return False
+        self.running += 1
+        try:
+            await self._execute(job)
+        finally:
+            self.running -= 1
+        return True
+
+    async def _work(self) -> None:
+        while True:
+            try:
+                if await self.run_once():
+                    continue
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Job worker iteration failed: {e}")
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _execute(self, job: ChatJob) -> None:
+        if job.attempts > self.max_attempts:
+            # Its workers kept dying (or being cut off) mid-run
+            await self._finish(job, JOB_FAILED, error=f"Gave up after {self.max_attempts} attempts")
+            return
+
+        heartbeat = asyncio.create_task(self._renew_lease(job))
+        try:
+            set_deadline(self.timeout)
+            async with self.session_factory() as session:
+                exposure_repo = CachedModelExposureRepository(routing_table, SQLModelExposureRepository(session))
+                use_case = ChatWithModelUseCase(
+                    self.llm_service, exposure_repo, self.log_sink, rate_limiter,
+                    admission_scheduler, response_cache, request_coalescer
+                )
+                use_case.endpoint = "/v1/chat/jobs"
+                response = await use_case.execute(
+                    project_id=job.project_id,
+                    logical_model_name=job.model,
+                    messages=job.messages,
+                    cache=job.cache,
+                    **job.params
+                )
+        except _BACKPRESSURE_ERRORS as e:
+            retry_at = datetime.utcnow() + timedelta(seconds=e.retry_after)
+            if await self._jobs(lambda repo: repo.release(job.id, self.worker_id, retry_at, str(e))):
+                self.requeued += 1
+            return
+        except asyncio.CancelledError:
+            # Shutting down: hand the job to another worker without waiting for the lease to lapse
+            await asyncio.shield(self._jobs(lambda repo: repo.release(job.id, self.worker_id, datetime.utcnow(), "Worker stopped")))
+            raise
+        except Exception as e:
+            await self._finish(job, JOB_FAILED, error=str(e))
+            return
+        finally:
+            heartbeat.cancel()
+        await self._finish(job, JOB_SUCCEEDED, result=response)
+
+    async def _finish(self, job: ChatJob, status: str, result: Optional[Dict[str, Any]] = None, error: Optional[str] = None) -> None:
+        expires_at = datetime.utcnow() + timedelta(seconds=self.result_ttl)
+        finished = await self._jobs(lambda repo: repo.finish(job.id, self.worker_id, status, expires_at, result, error))
+        if not finished:
+            logger.warning(f"Lost the lease on job {job.id}; discarding its outcome")
+            return
+        if status == JOB_SUCCEEDED:
+            self.succeeded += 1
+        else:
+            self.failed += 1
+        if job.callback_url:
+            job = await self._jobs(lambda repo: repo.get(job.id))
+            await self._deliver_callback(job)
+
+    async def _renew_lease(self, job: ChatJob) -> None:
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                if not await self._jobs(lambda repo: repo.extend_lease(job.id, self.worker_id, self.lease_seconds)):
+                    logger.warning(f"Could not renew the lease on job {job.id}")
+            except Exception as e:
+                logger.warning(f"Lease renewal for job {job.id} failed: {e}")
+
+    async def _deliver_callback(self, job: ChatJob) -> None:
+        payload = {**job_summary(job), "result": job.result}
+        delivered = False
+        for attempt in range(self.callback_max_attempts):
+            if attempt:
+                await asyncio.sleep(2 ** (attempt - 1))
+            try:
+                # Checked on every attempt and pinned to the checked address
+                address = await self.callback_policy.check(job.callback_url)
+                response = await self.callback_client.post(
+                    **self.callback_policy.pinned(job.callback_url, address), json=payload, follow_redirects=False
+                )
+                if response.status_code < 400:
+                    delivered = True
+                    break
+                logger.warning(f"Callback for job {job.id} answered {response.status_code}")
+            except CallbackRejectedError as e:
+                logger.warning(f"Callback for job {job.id} refused: {e}")
+                break
+            except httpx.HTTPError as e:
+                logger.warning(f"Callback for job {job.id} failed: {e}")
+        if not delivered:
+            self.callbacks_failed += 1
+        await self._jobs(lambda repo: repo.mark_callback(job.id, delivered))
+
+    async def _purge(self) -> None:
+        while True:
+            await asyncio.sleep(self.purge_interval)
+            try:
+                purged = await self._jobs(lambda repo: repo.purge_expired())
+                if purged:
+                    logger.info(f"Purged {purged} expired chat jobs")
+            except Exception as e:
+                logger.warning(f"Chat job purge failed: {e}")
+
+def create_job_runner_from_env(session_factory, llm_service: AsyncLLMService, log_sink: LogSink) -> Optional[JobRunner]:
+    if os.getenv("JOBS_ENABLED", "true").lower() != "true":
+        return None
+    timeout = float(os.getenv("JOB_TIMEOUT", "600"))
+    return JobRunner(
+        session_factory,
+        llm_service,
+        log_sink,
+        workers=int(os.getenv("JOB_WORKERS", "2")),
+        lease_seconds=float(os.getenv("JOB_LEASE_SECONDS", "60")),
+        max_attempts=int(os.getenv("JOB_MAX_ATTEMPTS", "3")),
+        result_ttl=float(os.getenv("JOB_RESULT_TTL", "86400")),
+        timeout=timeout or None,
+        poll_interval=float(os.getenv("JOB_POLL_INTERVAL", "1")),
+        purge_interval=float(os.getenv("JOB_PURGE_INTERVAL", "60")),
+        callback_client=httpx.AsyncClient(timeout=float(os.getenv("JOB_CALLBACK_TIMEOUT", "10"))),
+        callback_max_attempts=int(os.getenv("JOB_CALLBACK_MAX_ATTEMPTS", "3")),
+        callback_policy=callback_policy,
+    )
@@ -0,0 +1,100 @@
+import os
+import socket
+import asyncio
+from datetime import datetime, timedelta
+from typing import Dict, List, Set, Tuple
+from uuid import UUID, uuid4
+from loguru import logger
+from app.core.sketch import DDSketch
+from app.core.domain.request_log import RequestLog
+from app.core.domain.request_rollup import GRANULARITIES, bucket_start
+from app.core.domain.latency_sketch import LatencySketch
+from app.core.ports.repositories import LatencySketchRepository
+from app.infrastructure.adapters.sql_repositories import SQLLatencySketchRepository
+
+SketchKey = Tuple[str, datetime, UUID, str, str]
+
+class LatencySketchRecorder:
+    """
+    Per-worker latency sketches per (granularity, bucket, project, model, endpoint).
+
+    Requests are recorded in memory; `flush` writes the sketches that changed
+    since the last flush as this worker's rows, overwriting its previous
+    version. Buckets are kept for `grace` after they end so late logs still
+    land in them, then forgotten. Logs for a forgotten bucket are ignored,
+    because recording them would overwrite the persisted sketch with a
+    partial one.
+    """
+    def __init__(self, worker_id: str, relative_accuracy: float = 0.01, grace: timedelta = timedelta(minutes=2)):
+        self.worker_id = worker_id
+        self.relative_accuracy = relative_accuracy
+        self.grace = grace
+        self._sketches: Dict[SketchKey, DDSketch] = {}
+        self._dirty: Set[SketchKey] = set()
+        self._forgotten_before: Dict[str, datetime] = {}
+        self.late = 0
+
+    def record_many(self, logs: List[RequestLog]) -> None:
+        for log in logs:
+            for granularity in GRANULARITIES:
+                start = bucket_start(log.timestamp, granularity)
+                if start < self._forgotten_before.get(granularity, datetime.min):
+                    self.late += 1
+                    continue
+                key = (granularity, start, log.project_id, log.model, log.endpoint)
+                sketch = self._sketches.get(key)
+                if sketch is None:
+                    sketch = self._sketches[key] = DDSketch(self.relative_accuracy)
+                sketch.add(log.latency_ms)
+                self._dirty.add(key)
+
+    async def flush(self, repo: LatencySketchRepository) -> int:
+        dirty, self._dirty = self._dirty, set()
+        rows = [
+            LatencySketch(
+                granularity=key[0],
+                bucket_start=key[1],
+                project_id=key[2],
+                model=key[3],
+                endpoint=key[4],
+                worker_id=self.worker_id,
+                count=self._sketches[key].count,
+                sketch=self._sketches[key].to_dict(),
+            )
+            for key in dirty
+        ]
+        try:
+            await repo.save_many(rows)
+        except Exception:
+            self._dirty |= dirty
+            raise
+        self._forget_closed_buckets(datetime.utcnow())
+        return len(rows)
+
+    def _forget_closed_buckets(self, now: datetime) -> None:
+        for granularity in GRANULARITIES:
+            # Buckets that started before this one ended at least `grace` ago
+            self._forgotten_before[granularity] = bucket_start(now - self.grace, granularity)
+        for key in [key for key in self._sketches if key not in self._dirty and key[1] < self._forgotten_before[key[0]]]:
+            del self._sketches[key]
+
+async def run_flush_loop(recorder: LatencySketchRecorder, session_factory, interval: float) -> None:
+    """Periodically persists this worker's sketches so other workers can merge them."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            async with session_factory() as session:
+                await recorder.flush(SQLLatencySketchRepository(session))
+        except Exception as e:
+            logger.warning(f"Latency sketch flush failed: {e}")
+
+def create_recorder_from_env() -> LatencySketchRecorder:
+    return LatencySketchRecorder(
+        # Random suffix: a restarted worker may reuse the PID (containers start at 1)
+        # and must not overwrite the previous process's rows for the same bucket
+        worker_id=f"{socket.gethostname()}:{os.getpid()}:{uuid4().hex[:8]}",
+        relative_accuracy=float(os.getenv("LATENCY_SKETCH_ACCURACY", "0.01")),
+    )
+
+# Process-wide recorder fed by the request log writer
+latency_sketches = create_recorder_from_env()
@@ -0,0 +1,132 @@
+import asyncio
+from typing import Any, Callable, Dict, List, Optional, Set
+from loguru import logger
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.core.domain.request_log import RequestLog
+from app.core.ports.repositories import LogSink
+from app.infrastructure.adapters.sql_repositories import SQLLogRepository
+
+DROP_NEWEST = "drop_newest"
+DROP_OLDEST = "drop_oldest"
+
+class BatchingLogWriter(LogSink):
+    """
+    Background RequestLog sink.
+
+    `save` only enqueues (it must be called from the event loop thread); a
+    worker task drains the bounded queue and writes rows with one bulk
+    INSERT every `batch_size` rows or `flush_interval_ms`, whichever comes
+    first. When the queue is full, `drop_policy` decides whether the
+    incoming entry or the oldest queued one is discarded.
+    """
+    def __init__(
+        self,
+        engine,
+        batch_size: int = 500,
+        flush_interval_ms: int = 200,
+        max_queue_size: int = 10000,
+        drop_policy: str = DROP_NEWEST,
+        observers: Optional[List[Callable[[List[RequestLog]], None]]] = None,
+    ):
+        if drop_policy not in (DROP_NEWEST, DROP_OLDEST):
+            raise ValueError(f"Unknown drop policy: {drop_policy}")
+        self.engine = engine
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000
+        self.drop_policy = drop_policy
+        # Called with every drained batch (sketches, metrics), off the request path
+        self.observers = observers or []
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue_size)
+        self._task: Optional[asyncio.Task] = None
+        # Bulk writes handed over with save_many, awaited on close
+        self._bulk_writes: Set[asyncio.Task] = set()
+        self._stopping = False
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+
+    def save(self, log: RequestLog) -> RequestLog:
+        try:
+            self._queue.put_nowait(log)
+        except asyncio.QueueFull:
+            if self.drop_policy == DROP_OLDEST:
+                self._queue.get_nowait()
+                self._queue.put_nowait(log)
+            self.dropped += 1
+        return log
+
+    def save_many(self, logs: List[RequestLog]) -> None:
+        """
+        Writes a group of entries (e.g. a whole batch request) as one bulk
+        INSERT in the background, bypassing the queue and its drop policy.
+        """
+        if not logs:
+            return
+        task = asyncio.create_task(self._write_batch(list(logs)))
+        self._bulk_writes.add(task)
+        task.add_done_callback(self._bulk_writes.discard)
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        """Stops accepting new batches and flushes whatever is still queued."""
+        self._stopping = True
+        if self._task:
+            await self._task
+            self._task = None
+        if self._bulk_writes:
+            await asyncio.gather(*self._bulk_writes)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queued": self._queue.qsize(),
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+        }
+
+    async def _run(self) -> None:
+        while not (self._stopping and self._queue.empty()):
+            batch = await self._next_batch()
+            if batch:
+                await self._write_batch(batch)
+
+    async def _next_batch(self) -> List[RequestLog]:
+        loop = asyncio.get_running_loop()
+        try:
+            first = await asyncio.wait_for(self._queue.get(), timeout=self.flush_interval)
+        except asyncio.TimeoutError:
+            return []
+
+        batch = [first]
+        deadline = loop.time() + self.flush_interval
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            remaining = deadline - loop.time()
+            if remaining <= 0 or self._stopping:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout=remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _write_batch(self, batch: List[RequestLog]) -> None:
+        for observer in self.observers:
+            try:
+                observer(batch)
+            except Exception as e:
+                logger.warning(f"Request log observer failed: {e}")
+        try:
+            async with AsyncSession(self.engine) as session:
+                written = await SQLLogRepository(session).save_many(batch)
+            # Bulk writes from save_many may run alongside the worker
+            self.written += written
+        except Exception as e:
+            self.failed += len(batch)
+            logger.error(f"Failed to write {len(batch)} request logs: {e}")
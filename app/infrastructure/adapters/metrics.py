@@ -0,0 +1,190 @@
+"""
+Prometheus metrics for the gateway.
+
+Nothing on the request path takes more than one metric update: per-request
+chat metrics are recorded from the log writer's batches, and queue depths,
+pool usage and cache counters are sampled from the components' own stats by
+`refresh_runtime_metrics` (on scrape and periodically). Labels stay
+bounded (model, endpoint, status, backend); per-project breakdowns come
+from /admin/stats rather than one series per project. With
+PROMETHEUS_MULTIPROC_DIR set, prometheus_client keeps values in per-process
+files and `/metrics` aggregates all workers.
+"""
+
+import os
+import asyncio
+from typing import Dict, List, Tuple
+from loguru import logger
+from prometheus_client import REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, multiprocess
+from prometheus_client.exposition import choose_encoder
+from app.core.domain.request_log import RequestLog
+
+
+_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+HTTP_REQUESTS = Counter("gateway_http_requests_total", "HTTP requests handled", ["route", "method", "status"])
+HTTP_LATENCY = Histogram(
+    "gateway_http_request_duration_seconds", "Time until the response completed", ["route", "status"],
+    buckets=_LATENCY_BUCKETS,
+)
+HTTP_INFLIGHT = Gauge("gateway_http_inflight_requests", "Requests currently being handled", multiprocess_mode="livesum")
+
+CHAT_REQUESTS = Counter("gateway_chat_requests_total", "Chat requests by outcome", ["model", "endpoint", "status"])
+CHAT_LATENCY = Histogram(
+    "gateway_chat_duration_seconds", "End-to-end chat latency", ["model", "endpoint"], buckets=_LATENCY_BUCKETS
+)
+UPSTREAM_TTFT = Histogram(
+    "gateway_upstream_ttft_seconds", "Time to first token from the backend", ["model"], buckets=_LATENCY_BUCKETS
+)
+CHAT_TOKENS = Counter("gateway_chat_tokens_total", "Tokens processed", ["model", "direction"])
+
+DB_POOL_CHECKOUT = Histogram(
+    "gateway_db_pool_checkout_seconds", "Time spent waiting for a pooled DB connection",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30),
+)
+DB_POOL_CHECKED_OUT = Gauge("gateway_db_pool_checked_out", "DB connections in use", multiprocess_mode="livesum")
+DB_POOL_OVERFLOW = Gauge("gateway_db_pool_overflow", "DB connections above pool_size", multiprocess_mode="livesum")
+
+LOG_QUEUE_DEPTH = Gauge("gateway_log_queue_depth", "Request logs waiting to be written", multiprocess_mode="livesum")
+LOG_EVENTS = Counter("gateway_log_writer_events_total", "Request log writer outcomes", ["result"])
+
+SCHEDULER_INFLIGHT = Gauge(
+    "gateway_scheduler_inflight", "Backend calls in flight per model", ["model"], multiprocess_mode="livesum"
+)
+SCHEDULER_QUEUE_DEPTH = Gauge(
+    "gateway_scheduler_queue_depth", "Requests waiting for a backend slot", ["model"], multiprocess_mode="livesum"
+)
+
+CACHE_LOOKUPS = Counter("gateway_cache_lookups_total", "Cache lookups by result", ["cache", "result"])
+
+BACKEND_OUTSTANDING = Gauge(
+    "gateway_backend_outstanding", "Requests in flight per Ollama host", ["backend"], multiprocess_mode="livesum"
+)
+BACKEND_HEALTHY = Gauge(
+    "gateway_backend_healthy", "Whether the host is taking traffic (not ejected)", ["backend"], multiprocess_mode="livemin"
+)
+BACKEND_EJECTIONS = Counter("gateway_backend_ejections_total", "Times a host was ejected", ["backend"])
+MODEL_LOADS = Counter(
+    "gateway_model_loads_total", "Model loads on a host: warm-ups, and requests that found the model cold",
+    ["backend", "kind"],
+)
+AFFINITY_ROUTING = Counter(
+    "gateway_affinity_routing_total", "Conversation turns routed to their affine host or spilled over", ["result"]
+)
+PROMPT_TOKENS_REUSED = Counter("gateway_prompt_tokens_reused_total", "Prompt tokens served from backend prompt caches")
+PROMPT_EVAL_SAVED = Counter("gateway_prompt_eval_saved_seconds_total", "Estimated prompt evaluation time saved")
+UPSTREAM_EXTRA_CALLS = Counter("gateway_upstream_extra_calls_total", "Retried and hedged upstream calls", ["kind"])
+CIRCUIT_OPEN = Gauge(
+    "gateway_circuit_open", "Whether the breaker for a backend and model is open", ["backend", "model"],
+    multiprocess_mode="livemax",
+)
+
+def observe_pool_checkout(seconds: float) -> None:
+    DB_POOL_CHECKOUT.observe(seconds)
+
+def observe_request_logs(logs: List[RequestLog]) -> None:
+    """Records chat metrics for a batch of completed requests (called by the log writer)."""
+    for log in logs:
+        CHAT_REQUESTS.labels(log.model, log.endpoint, str(log.status)).inc()
+        CHAT_LATENCY.labels(log.model, log.endpoint).observe(log.latency_ms / 1000)
+        if log.ttft_ms is not None:
+            UPSTREAM_TTFT.labels(log.model).observe(log.ttft_ms / 1000)
+        if log.tokens_input:
+            CHAT_TOKENS.labels(log.model, "input").inc(log.tokens_input)
+        if log.tokens_output:
+            CHAT_TOKENS.labels(log.model, "output").inc(log.tokens_output)
+
+# Last cumulative values seen per counter, so stats() totals become counter increments
+_last_seen: Dict[Tuple, float] = {}
+
+def _advance(counter: Counter, labels: Tuple[str, ...], total: float) -> None:
+    key = (id(counter), labels)
+    delta = total - _last_seen.get(key, 0)
+    if delta > 0:
+        (counter.labels(*labels) if labels else counter).inc(delta)
+    _last_seen[key] = total
+
+def refresh_runtime_metrics(app) -> None:
+    """Samples gauges and counters kept by the gateway's own components."""
+    from app.infrastructure.adapters.database import engine
+    from app.infrastructure.adapters.scheduler import admission_scheduler
+    from app.infrastructure.adapters.project_cache import project_cache
+    from app.infrastructure.adapters.response_cache import response_cache
+    from app.infrastructure.adapters.backend_pool import BackendPool
+    from app.infrastructure.adapters.resilience import ResilientLLMService
+
+    pool = engine.pool
+    if hasattr(pool, "checkedout"):
+        DB_POOL_CHECKED_OUT.set(pool.checkedout())
+        DB_POOL_OVERFLOW.set(max(0, pool.overflow()))
+
+    log_writer = getattr(app.state, "log_writer", None)
+    if log_writer is not None:
+        stats = log_writer.stats()
+        LOG_QUEUE_DEPTH.set(stats["queued"])
+        for result in ("written", "dropped", "failed"):
+            _advance(LOG_EVENTS, (result,), stats[result])
+
+    if admission_scheduler:
+        for model, stats in admission_scheduler.stats().items():
+            SCHEDULER_INFLIGHT.labels(model).set(stats["inflight"])
+            SCHEDULER_QUEUE_DEPTH.labels(model).set(stats["queue_depth"])
+
+    llm_service = getattr(app.state, "llm_service", None)
+    if isinstance(llm_service, ResilientLLMService):
+        stats = llm_service.stats()
+        _advance(UPSTREAM_EXTRA_CALLS, ("retry",), stats["retries"])
+        _advance(UPSTREAM_EXTRA_CALLS, ("hedge",), stats["hedges"])
+        for breaker in stats["breakers"]:
+            CIRCUIT_OPEN.labels(breaker["backend"], breaker["model"]).set(1 if breaker["state"] == "open" else 0)
+        llm_service = llm_service.inner
+    if isinstance(llm_service, BackendPool):
+        stats = llm_service.stats()
+        if stats["affinity"]:
+            _advance(AFFINITY_ROUTING, ("routed",), stats["affinity"]["routed"])
+            _advance(AFFINITY_ROUTING, ("spilled",), stats["affinity"]["spilled"])
+            _advance(PROMPT_TOKENS_REUSED, (), stats["affinity"]["prompt_tokens_reused"])
+            _advance(PROMPT_EVAL_SAVED, (), stats["affinity"]["prompt_eval_ms_saved"] / 1000)
+        for backend in stats["backends"]:
+            BACKEND_OUTSTANDING.labels(backend["url"]).set(backend["outstanding"])
+            BACKEND_HEALTHY.labels(backend["url"]).set(1 if backend["healthy"] else 0)
+            _advance(BACKEND_EJECTIONS, (backend["url"],), backend["ejections"])
+
+    residency = getattr(app.state, "residency", None)
+    if residency is not None:
+        for host in residency.stats()["hosts"]:
+            _advance(MODEL_LOADS, (host["url"], "warmup"), host["warmups"])
+            _advance(MODEL_LOADS, (host["url"], "cold_start"), host["cold_starts"])
+
+    _advance(CACHE_LOOKUPS, ("auth", "hit"), project_cache.hits)
+    _advance(CACHE_LOOKUPS, ("auth", "miss"), project_cache.misses)
+    if response_cache:
+        _advance(CACHE_LOOKUPS, ("response", "hit"), response_cache.memory_hits + response_cache.disk_hits)
+        _advance(CACHE_LOOKUPS, ("response", "miss"), response_cache.misses)
+
+async def run_refresh_loop(app, interval: float) -> None:
+    """Keeps this worker's sampled values current for multiprocess scrapes served by other workers."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            refresh_runtime_metrics(app)
+        except Exception as e:
+            logger.warning(f"Metrics refresh failed: {e}")
+
+def multiprocess_enabled() -> bool:
+    return bool(os.getenv("PROMETHEUS_MULTIPROC_DIR"))
+
+def mark_worker_dead() -> None:
+    """Drops this worker's live gauges from multiprocess aggregation."""
+    if multiprocess_enabled():
+        multiprocess.mark_process_dead(os.getpid())
+
+def render_metrics(accept_header: str) -> Tuple[bytes, str]:
+    """Returns (body, content type) in Prometheus text or OpenMetrics format, per Accept."""
+    if multiprocess_enabled():
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    encoder, content_type = choose_encoder(accept_header)
+    return encoder(registry), content_type
@@ -1,32 +1,69 @@
 import time
-from fastapi import Request
-from starlette.middleware.base import BaseHTTPMiddleware
-from app.infrastructure.adapters.database import get_session
-from app.infrastructure.adapters.sql_repositories import SQLLogRepository
-from app.core.domain.request_log import RequestLog
-from loguru import logger
-from uuid import UUID
-
-class RequestLoggingMiddleware(BaseHTTPMiddleware):
+from typing import Optional
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.infrastructure.adapters.access_log import AccessLogSink, AccessRecord, access_log
+from app.infrastructure.adapters.metrics import HTTP_INFLIGHT, HTTP_LATENCY, HTTP_REQUESTS
+
+class RequestLoggingMiddleware:
     """
-    Middleware to log every request to the database and stdout.
+    Pure ASGI middleware recording every request's full response lifecycle.
+
+    It wraps `send` instead of buffering the response, so streaming responses
+    pass through untouched and latency runs until the last body chunk. HTTP
+    metrics cover every route; API requests (`path_prefix`) are also handed
+    to the access log sink, with the project the auth dependency resolved.
     """
-    async def dispatch(self, request: Request, call_next):
-        start_time = time.time()
-        
-        # Process request
-        response = await call_next(request)
-        
-        process_time = time.time() - start_time
-        latency_ms = int(process_time * 1000)
-        
-        # We only log API endpoints (v1)
-        if request.url.path.startswith("/v1/"):
-            # Attempt to get project_id from request state (if set by auth dependency)
-            # However, middleware runs before/after the route handler, and get_project_by_api_key 
-            # is a dependency. We might need a better way to link them.
-            # For now, we'll log what we can.
-            
-            logger.info(f"Path: {request.url.path} | Status: {response.status_code} | Latency: {latency_ms}ms")
-            
-        return response
+    def __init__(self, app: ASGIApp, sink: Optional[AccessLogSink] = None, path_prefix: str = "/v1/"):
+        self.app = app
+        self.sink = sink if sink is not None else access_log
+        self.path_prefix = path_prefix
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500
+        first_byte: Optional[float] = None
+        last_byte: Optional[float] = None
+        bytes_sent = 0
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status, first_byte, last_byte, bytes_sent
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                first_byte = time.perf_counter()
+            elif message["type"] == "http.response.body":
+                bytes_sent += len(message.get("body", b""))
+                if not message.get("more_body", False):
+                    last_byte = time.perf_counter()
+            await send(message)
+
+        HTTP_INFLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_INFLIGHT.dec()
+            end = last_byte or time.perf_counter()
+
+            # Label by route template, not raw path, to keep metric cardinality bounded
+            route = getattr(scope.get("route"), "path", "unmatched")
+            status_label = str(status)
+            HTTP_REQUESTS.labels(route, scope["method"], status_label).inc()
+            HTTP_LATENCY.labels(route, status_label).observe(end - start)
+
+            path = scope["path"]
+            if path.startswith(self.path_prefix):
+                # Request.state is backed by scope["state"], where auth stores the project
+                state = scope.get("state") or {}
+                self.sink.record(AccessRecord(
+                    method=scope["method"],
+                    path=path,
+                    route=route,
+                    status=status,
+                    project_id=state.get("project_id"),
+                    first_byte_ms=None if first_byte is None else (first_byte - start) * 1000,
+                    last_byte_ms=(end - start) * 1000,
+                    bytes_sent=bytes_sent,
+                ))
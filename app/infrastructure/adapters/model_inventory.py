@@ -0,0 +1,183 @@
+import os
+import time
+import asyncio
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from loguru import logger
+from app.core.ports.cache import ModelInventory
+from app.core.ports.llm_service import AsyncLLMService
+from app.infrastructure.adapters.ollama_http_adapter import OllamaHTTPAdapter
+from app.infrastructure.adapters.backend_pool import BackendPool, normalize_model_name
+
+def _context_length(model_info: Dict[str, Any]) -> Optional[int]:
+    # Keyed by architecture, e.g. "llama.context_length"
+    return next((value for key, value in model_info.items() if key.endswith(".context_length")), None)
+
+
+class ModelInventoryCache(ModelInventory):
+    """
+    In-memory catalogue of the models every backend serves, with size,
+    quantization, parameter count, context length and which hosts have them.
+
+    Reads are stale-while-revalidate: data younger than `ttl` is served as
+    is, older data is served while one background refresh runs, and only
+    data older than `max_stale` makes the caller wait for the refresh.
+    Before the first load reads get an empty catalogue at once, so a slow
+    or unreachable backend at startup never stalls a request; the
+    background loop fills it in. A failed refresh keeps the previous one. Model
+    metadata (`/api/show`) is fetched once per model digest.
+    """
+    def __init__(
+        self,
+        llm_service: AsyncLLMService,
+        ttl: float = 30.0,
+        max_stale: float = 600.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.llm_service = getattr(llm_service, "inner", llm_service)
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self.clock = clock
+        self._models: Dict[str, Dict[str, Any]] = {}
+        self._loaded_at: Optional[float] = None
+        # (model, digest) -> metadata from /api/show
+        self._details: Dict[Tuple[str, Optional[str]], Dict[str, Any]] = {}
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._loop_task: Optional[asyncio.Task] = None
+        self.refreshes = 0
+        self.failures = 0
+        self.last_error: Optional[str] = None
+
+    def start(self) -> None:
+        """Loads the catalogue in the background and keeps it fresh without waiting for reads."""
+        self._loop_task = asyncio.create_task(self._loop())
+
+    async def aclose(self) -> None:
+        for task in (self._loop_task, self._refresh_task):
+            if task:
+                task.cancel()
+        self._loop_task = self._refresh_task = None
+
+    async def describe(self, models: List[str]) -> Dict[str, Dict[str, Any]]:
+        catalogue = await self.get()
+        if self._loaded_at is None:
+            return {}
+        return {model: catalogue.get(normalize_model_name(model), {"available": False}) for model in models}
+
+    async def get(self) -> Dict[str, Dict[str, Any]]:
+        if self._loaded_at is None:
+            self._revalidate()
+            return self._models
+        age = self.clock() - self._loaded_at
+        if age > self.max_stale:
+            # Shielded: a cancelled request must not cancel the shared refresh
+            await asyncio.shield(self._revalidate())
+        elif age > self.ttl:
+            self._revalidate()
+        return self._models
+
+    def _revalidate(self) -> asyncio.Task:
+        """Starts a refresh unless one is already running (single flight)."""
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self.refresh())
+        return self._refresh_task
+
+    async def refresh(self) -> bool:
+        """Rebuilds the catalogue; on failure the previous one stays in place."""
+        try:
+            listings = await self._list_backends()
+            models: Dict[str, Dict[str, Any]] = {}
+            for url, available, inventory in listings:
+                for entry in inventory:
+                    name = normalize_model_name(entry.get("model") or entry.get("name"))
+                    model = models.setdefault(name, {
+                        "name": entry.get("name") or name,
+                        "size": entry.get("size"),
+                        "digest": entry.get("digest"),
+                        "details": entry.get("details") or {},
+                        "backends": [],
+                    })
+                    model["backends"].append({"url": url, "available": available})
+            await self._fetch_details(models, {url: available for url, available, _ in listings})
+        except Exception as e:
+            self.failures += 1
+            self.last_error = repr(e)
+            logger.warning(f"Model inventory refresh failed: {e!r}")
+            return False
+        self._models = {name: self._describe(name, model) for name, model in models.items()}
+        self._loaded_at = self.clock()
+        self.refreshes += 1
+        self.last_error = None
+        return True
+
+    async def _list_backends(self) -> List[Tuple[str, bool, List[Dict[str, Any]]]]:
+        """(url, taking traffic, /api/tags entries) per backend."""
+        if isinstance(self.llm_service, BackendPool):
+            # The pool's own probes keep host inventories and health current
+            pool = self.llm_service
+            now = pool.clock()
+            listings = [
+                (backend.url, backend.available(now), backend.inventory)
+                for backend in pool.backends if backend.models is not None
+            ]
+            if not listings:
+                raise RuntimeError("No backend has reported its models yet")
+            return listings
+        return [(self.llm_service.base_url, True, await self.llm_service.alist_models())]
+
+    def _adapter(self, url: str) -> OllamaHTTPAdapter:
+        if isinstance(self.llm_service, BackendPool):
+            return next(backend.adapter for backend in self.llm_service.backends if backend.url == url)
+        return self.llm_service
+
+    async def _fetch_details(self, models: Dict[str, Dict[str, Any]], available: Dict[str, bool]) -> None:
+        async def fetch(name: str, model: Dict[str, Any]) -> None:
+            urls = [backend["url"] for backend in model["backends"] if available[backend["url"]]]
+            if not urls:
+                return
+            try:
+                self._details[(name, model["digest"])] = await self._adapter(urls[0]).ashow_model(model["name"])
+            except Exception as e:
+                logger.warning(f"Could not read metadata of {name}: {e!r}")
+
+        missing = [(name, model) for name, model in models.items() if (name, model["digest"]) not in self._details]
+        await asyncio.gather(*(fetch(name, model) for name, model in missing))
+
+    def _describe(self, name: str, model: Dict[str, Any]) -> Dict[str, Any]:
+        shown = self._details.get((name, model["digest"]), {})
+        details = {**(shown.get("details") or {}), **model["details"]}
+        return {
+            "available": any(backend["available"] for backend in model["backends"]),
+            "size": model["size"],
+            "family": details.get("family"),
+            "parameter_size": details.get("parameter_size"),
+            "quantization": details.get("quantization_level"),
+            "context_length": _context_length(shown.get("model_info") or {}),
+            "backends": model["backends"],
+        }
+
+    async def _loop(self) -> None:
+        while True:
+            await self._revalidate()
+            await asyncio.sleep(self.ttl)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "models": self._models,
+            "age_seconds": round(self.clock() - self._loaded_at, 1) if self._loaded_at is not None else None,
+            "refreshes": self.refreshes,
+            "failures": self.failures,
+            "last_error": self.last_error,
+        }
+
+
+def create_model_inventory_from_env(llm_service: AsyncLLMService) -> Optional[ModelInventoryCache]:
+    service = getattr(llm_service, "inner", llm_service)
+    if os.getenv("MODEL_INVENTORY_ENABLED", "true").lower() != "true":
+        return None
+    if not isinstance(service, (BackendPool, OllamaHTTPAdapter)):
+        return None
+    return ModelInventoryCache(
+        llm_service,
+        ttl=float(os.getenv("MODEL_INVENTORY_TTL", "30")),
+        max_stale=float(os.getenv("MODEL_INVENTORY_MAX_STALE", "600")),
+    )
@@ -0,0 +1,147 @@
+import os
+from typing import List, Dict, Any, AsyncIterator, Optional
+import httpx
+from app.core.ports.llm_service import AsyncLLMService
+from app.core.serialization import loads
+
+# Gateway-level parameter names that Ollama spells differently in `options`.
+_OPTION_ALIASES = {"max_tokens": "num_predict"}
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+def keep_alive_seconds(value: Any, default: float = 300.0) -> float:
+    """Parses Ollama's keep_alive: seconds as a number, or a duration such as "30s", "10m", "1h"."""
+    if value is None:
+        return default
+    if isinstance(value, (int, float)):
+        return float(value)
+    units = {"s": 1, "m": 60, "h": 3600}
+    if value and value[-1] in units:
+        return float(value[:-1]) * units[value[-1]]
+    return float(value)
+
+def create_http_client() -> httpx.AsyncClient:
+    """
+    Builds the pooled client used to talk to the LLM backend.
+    Created once per process (see `app.main.lifespan`) so keep-alive
+    connections are reused across requests instead of re-handshaking.
+    """
+    use_http2 = os.getenv("OLLAMA_HTTP2", "true").lower() == "true" and _http2_available()
+    return httpx.AsyncClient(
+        timeout=httpx.Timeout(float(os.getenv("OLLAMA_API_TIMEOUT", "60")), connect=10.0),
+        limits=httpx.Limits(
+            max_connections=int(os.getenv("OLLAMA_MAX_CONNECTIONS", "100")),
+            max_keepalive_connections=int(os.getenv("OLLAMA_MAX_KEEPALIVE_CONNECTIONS", "20")),
+            keepalive_expiry=float(os.getenv("OLLAMA_KEEPALIVE_EXPIRY", "30")),
+        ),
+        http2=use_http2,
+    )
+
+class OllamaHTTPAdapter(AsyncLLMService):
+    """Async adapter speaking the Ollama HTTP API (`/api/chat`, `/api/tags`)."""
+
+    def __init__(self, base_url: str = None, client: httpx.AsyncClient = None):
+        self.base_url = (base_url or os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")).rstrip("/")
+        self.client = client or create_http_client()
+
+    async def aclose(self) -> None:
+        """Closes the underlying connection pool, waiting for in-flight connections to drain."""
+        await self.client.aclose()
+
+    def _build_payload(self, model: str, messages: List[Dict[str, str]], stream: bool, **kwargs) -> Dict[str, Any]:
+        options = {_OPTION_ALIASES.get(key, key): value for key, value in kwargs.items()}
+        return {
+            "model": model,
+            "messages": messages,
+            "stream": stream,
+            "options": options,
+        }
+
+    async def achat(self, model: str, messages: List[Dict[str, str]], **kwargs) -> Dict[str, Any]:
+        """
+        Sends a non-streaming chat request and returns the decoded response.
+        """
+        response = await self.client.post(
+            f"{self.base_url}/api/chat",
+            json=self._build_payload(model, messages, stream=False, **kwargs),
+        )
+        response.raise_for_status()
+        return response.json()
+
+    async def astream_chat(self, model: str, messages: List[Dict[str, str]], **kwargs) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Streams a chat request, yielding one decoded chunk per NDJSON line.
+        """
+        async for line in self.astream_chat_raw(model, messages, **kwargs):
+            yield loads(line)
+
+    async def astream_chat_raw(self, model: str, messages: List[Dict[str, str]], **kwargs) -> AsyncIterator[bytes]:
+        """
+        Streams a chat request, yielding each NDJSON line as bytes without decoding it.
+        Only lines that may carry an error are parsed.
+        """
+        async with self.client.stream(
+            "POST",
+            f"{self.base_url}/api/chat",
+            json=self._build_payload(model, messages, stream=True, **kwargs),
+        ) as response:
+            response.raise_for_status()
+            pending = b""
+            async for data in response.aiter_bytes():
+                pending += data
+                *lines, pending = pending.split(b"\n")
+                for line in lines:
+                    if line.strip():
+                        yield self._check_line(line)
+            if pending.strip():
+                yield self._check_line(pending)
+
+    @staticmethod
+    def _check_line(line: bytes) -> bytes:
+        if b'"error"' in line:
+            chunk = loads(line)
+            if "error" in chunk:
+                raise RuntimeError(chunk["error"])
+        return line
+
+    async def alist_models(self) -> List[Dict[str, Any]]:
+        """
+        Returns the models available on the backend.
+        """
+        response = await self.client.get(f"{self.base_url}/api/tags")
+        response.raise_for_status()
+        return response.json().get("models", [])
+
+    async def ashow_model(self, model: str) -> Dict[str, Any]:
+        """
+        Returns a model's metadata (`/api/show`): `details` and `model_info`.
+        """
+        response = await self.client.post(f"{self.base_url}/api/show", json={"model": model})
+        response.raise_for_status()
+        return response.json()
+
+    async def alist_running_models(self) -> List[Dict[str, Any]]:
+        """
+        Returns the models currently loaded in memory (`/api/ps`), with their `expires_at`.
+        """
+        response = await self.client.get(f"{self.base_url}/api/ps")
+        response.raise_for_status()
+        return response.json().get("models", [])
+
+    async def aload_model(self, model: str, keep_alive: str, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Loads `model` without generating anything (empty `/api/generate`) and
+        keeps it loaded for `keep_alive`. The response carries `load_duration`.
+        """
+        response = await self.client.post(
+            f"{self.base_url}/api/generate",
+            json={"model": model, "keep_alive": keep_alive},
+            timeout=timeout or httpx.USE_CLIENT_DEFAULT,
+        )
+        response.raise_for_status()
+        return response.json()
@@ -0,0 +1,121 @@
+import os
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from uuid import UUID
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.core.domain.project import Project
+from app.core.domain.auth_version import AuthVersion
+from app.core.ports.cache import ProjectCache
+
+class TTLProjectCache(ProjectCache):
+    """
+    Bounded LRU cache of resolved projects keyed by a SHA-256 of the API key.
+
+    Invalid keys are cached too (as `None`, with a shorter TTL) so repeated
+    guesses don't reach the database. Entries are detached snapshots, never
+    live session objects.
+
+    Admin writes invalidate this worker's entries directly. Other workers
+    clear their whole cache when `sync` sees the persisted AuthVersion move,
+    so they may serve a deactivated project or rotated key for up to their
+    sync interval (or the TTL, if syncing fails). A `put` whose database read
+    began before an invalidation is dropped rather than caching stale data.
+    """
+    def __init__(self, max_size: int = 10000, ttl_seconds: float = 60.0, negative_ttl_seconds: float = 10.0):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, Optional[Project]]]" = OrderedDict()
+        self._keys_by_project: Dict[UUID, str] = {}
+        self._lock = threading.Lock()
+        # Bumped on every invalidation; see `put`
+        self.generation = 0
+        # Persisted AuthVersion last seen by `sync`
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _hash(api_key: str) -> str:
+        return hashlib.sha256(api_key.encode("utf-8")).hexdigest()
+
+    def get(self, api_key: str) -> Tuple[bool, Optional[Project]]:
+        key = self._hash(api_key)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return False, None
+            expires_at, project = entry
+            if expires_at <= time.monotonic():
+                self._evict(key)
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, project
+
+    def put(self, api_key: str, project: Optional[Project], generation: Optional[int] = None) -> None:
+        """
+        Caches a lookup. Pass the `generation` read before querying the
+        database; the entry is skipped if anything was invalidated since.
+        """
+        key = self._hash(api_key)
+        ttl = self.ttl_seconds if project is not None else self.negative_ttl_seconds
+        snapshot = Project.model_validate(project.model_dump()) if project is not None else None
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._evict(key)
+            self._entries[key] = (time.monotonic() + ttl, snapshot)
+            if snapshot is not None:
+                self._keys_by_project[snapshot.id] = key
+            while len(self._entries) > self.max_size:
+                oldest = next(iter(self._entries))
+                self._evict(oldest)
+
+    def invalidate_project(self, project_id: UUID) -> None:
+        with self._lock:
+            self.generation += 1
+            key = self._keys_by_project.get(project_id)
+            if key is not None:
+                self._evict(key)
+
+    def invalidate_key(self, api_key: str) -> None:
+        with self._lock:
+            self.generation += 1
+            self._evict(self._hash(api_key))
+
+    def clear(self) -> None:
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+            self._keys_by_project.clear()
+
+    async def sync(self, session: AsyncSession) -> bool:
+        """Clears the cache if another worker changed a project. Returns True if it cleared."""
+        version_row = await session.get(AuthVersion, 1)
+        persisted = version_row.version if version_row else 0
+        if persisted == self.version:
+            return False
+        self.clear()
+        self.version = persisted
+        return True
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+    def _evict(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None and entry[1] is not None:
+            self._keys_by_project.pop(entry[1].id, None)
+
+# Process-wide instance shared by the auth dependency and admin use cases
+project_cache = TTLProjectCache(
+    max_size=int(os.getenv("AUTH_CACHE_MAX_SIZE", "10000")),
+    ttl_seconds=float(os.getenv("AUTH_CACHE_TTL", "60")),
+    negative_ttl_seconds=float(os.getenv("AUTH_CACHE_NEGATIVE_TTL", "10")),
+)
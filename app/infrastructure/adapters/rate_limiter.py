@@ -0,0 +1,133 @@
+import os
+import math
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from app.core.domain.project import Project
+from app.core.ports.rate_limiter import RateLimitResult, RateLimitStore
+
+def _refill(tokens: float, updated_at: float, now: float, limit_per_minute: int) -> float:
+    rate = limit_per_minute / 60.0
+    return min(float(limit_per_minute), tokens + max(0.0, now - updated_at) * rate)
+
+def _result(allowed: bool, tokens: float, limit_per_minute: int, cost: int) -> RateLimitResult:
+    rate = limit_per_minute / 60.0
+    return RateLimitResult(
+        allowed=allowed,
+        limit=limit_per_minute,
+        remaining=int(tokens),
+        reset_after=(limit_per_minute - tokens) / rate,
+        retry_after=0.0 if allowed else (cost - tokens) / rate,
+    )
+
+class InMemoryRateLimitStore(RateLimitStore):
+    """
+    Per-process token buckets (capacity = one minute of budget).
+    Also serves as the local fake for the shared store in tests.
+    Idle buckets are evicted LRU-style once `max_keys` is reached.
+    """
+    def __init__(self, max_keys: int = 100000, clock=time.monotonic):
+        self.max_keys = max_keys
+        self.clock = clock
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    async def acquire(self, key: str, limit_per_minute: int, cost: int = 1) -> RateLimitResult:
+        now = self.clock()
+        tokens, updated_at = self._buckets.get(key, (float(limit_per_minute), now))
+        tokens = _refill(tokens, updated_at, now, limit_per_minute)
+
+        allowed = tokens >= cost
+        if allowed:
+            tokens -= cost
+        self._buckets[key] = (tokens, now)
+        self._buckets.move_to_end(key)
+        if len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return _result(allowed, tokens, limit_per_minute, cost)
+
+    def clear(self) -> None:
+        self._buckets.clear()
+
+# Atomic refill-and-take; returns {allowed, tokens * 1000}
+_REDIS_TOKEN_BUCKET = """
+local limit = tonumber(ARGV[1])
+local cost = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local rate = limit / 60.0
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or limit
+local ts = tonumber(state[2]) or now
+tokens = math.min(limit, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+if tokens >= cost then
+  tokens = tokens - cost
+  allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], 120)
+return {allowed, math.floor(tokens * 1000)}
+"""
+
+class RedisRateLimitStore(RateLimitStore):
+    """
+    Token buckets shared by all workers through Redis (optional dependency).
+    """
+    def __init__(self, url: str, prefix: str = "llmgw:ratelimit:"):
+        try:
+            from redis import asyncio as redis_asyncio
+        except ImportError as e:
+            raise RuntimeError("RATE_LIMIT_REDIS_URL is set but the 'redis' package is not installed") from e
+        self.prefix = prefix
+        self.client = redis_asyncio.from_url(url)
+        self._script = self.client.register_script(_REDIS_TOKEN_BUCKET)
+
+    async def acquire(self, key: str, limit_per_minute: int, cost: int = 1) -> RateLimitResult:
+        allowed, tokens_milli = await self._script(
+            keys=[self.prefix + key],
+            args=[limit_per_minute, cost, time.time()],
+        )
+        return _result(bool(allowed), tokens_milli / 1000, limit_per_minute, cost)
+
+class RateLimiter:
+    """
+    Applies project-level and per-model budgets on top of a RateLimitStore.
+    """
+    def __init__(self, store: RateLimitStore, enabled: bool = True, default_limit_per_minute: Optional[int] = None):
+        self.store = store
+        self.enabled = enabled
+        self.default_limit_per_minute = default_limit_per_minute
+
+    async def check_project(self, project: Project, cost: int = 1) -> Optional[RateLimitResult]:
+        limit = project.rate_limit_per_minute or self.default_limit_per_minute
+        if not self.enabled or not limit:
+            return None
+        return await self.store.acquire(f"project:{project.id}", limit, cost)
+
+    async def acquire(self, key: str, limit_per_minute: int, cost: int = 1) -> RateLimitResult:
+        """Raw access for callers with their own keys (e.g. per-model limits)."""
+        if not self.enabled:
+            return RateLimitResult(True, limit_per_minute, limit_per_minute, 0.0, 0.0)
+        return await self.store.acquire(key, limit_per_minute, cost)
+
+def rate_limit_headers(result: RateLimitResult) -> Dict[str, str]:
+    headers = {
+        "X-RateLimit-Limit": str(result.limit),
+        "X-RateLimit-Remaining": str(result.remaining),
+        "X-RateLimit-Reset": str(math.ceil(result.reset_after)),
+    }
+    if not result.allowed:
+        headers["Retry-After"] = str(max(1, math.ceil(result.retry_after)))
+    return headers
+
+def create_rate_limiter_from_env() -> RateLimiter:
+    redis_url = os.getenv("RATE_LIMIT_REDIS_URL")
+    store = RedisRateLimitStore(redis_url) if redis_url else InMemoryRateLimitStore()
+    default_limit = os.getenv("DEFAULT_RATE_LIMIT_PER_MINUTE")
+    return RateLimiter(
+        store,
+        enabled=os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true",
+        default_limit_per_minute=int(default_limit) if default_limit else None,
+    )
+
+# Process-wide limiter used by the auth dependency and chat use cases
+rate_limiter = create_rate_limiter_from_env()
@@ -0,0 +1,223 @@
+import os
+import time
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional
+from loguru import logger
+from app.core.ports.llm_service import AsyncLLMService
+from app.infrastructure.adapters.ollama_http_adapter import OllamaHTTPAdapter, keep_alive_seconds
+from app.infrastructure.adapters.backend_pool import BackendPool, normalize_model_name
+from app.infrastructure.adapters.sql_repositories import SQLLogRepository, SQLModelExposureRepository
+
+# A request whose backend reports a longer load_duration paid for loading the model
+COLD_START_MS = 1000
+
+
+class _HostResidency:
+    """What one Ollama host has loaded, as last seen by `/api/ps`, warm-ups and requests."""
+    def __init__(self, adapter: OllamaHTTPAdapter):
+        self.adapter = adapter
+        self.url = adapter.base_url
+        # Normalized model name -> clock() time Ollama unloads it
+        self.resident: Dict[str, float] = {}
+        # Last observed load time per model (warm-up or cold request)
+        self.load_ms: Dict[str, float] = {}
+        self.warmups = 0
+        self.warmup_failures = 0
+        self.cold_starts = 0
+        self.refresh_error: Optional[str] = None
+
+
+class ResidencyManager:
+    """
+    Keeps hot models loaded on the Ollama hosts that serve them.
+
+    Every `interval` it reads each host's loaded models (`/api/ps`) and
+    works out the hot models: every `ModelExposure.backend_model` plus the
+    models with traffic in the last `hot_window` seconds, busiest first.
+    Each hot model is placed on its replicas (all of them for a single
+    host), at most `max_models_per_host` per host, and loaded there with an
+    empty generate request and `keep_alive` if it is not resident or about
+    to be unloaded. The first cycle runs at startup.
+
+    A BackendPool given this manager as `residency` ranks hosts that have
+    the model loaded first, so requests skip the load instead of paying it.
+    """
+    def __init__(
+        self,
+        llm_service: AsyncLLMService,
+        session_factory,
+        keep_alive: str = "30m",
+        interval: float = 60.0,
+        hot_window: float = 3600.0,
+        max_models_per_host: int = 3,
+        warmup_timeout: float = 120.0,
+        request_keep_alive: float = 300.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.pool = llm_service if isinstance(llm_service, BackendPool) else None
+        adapters = [backend.adapter for backend in self.pool.backends] if self.pool else [llm_service]
+        self.hosts = {adapter.base_url: _HostResidency(adapter) for adapter in adapters}
+        self.session_factory = session_factory
+        self.keep_alive = keep_alive
+        self.keep_alive_seconds = keep_alive_seconds(keep_alive)
+        self.interval = interval
+        self.hot_window = hot_window
+        self.max_models_per_host = max_models_per_host
+        self.warmup_timeout = warmup_timeout
+        # How long the backend keeps a model after a request that sets no keep_alive (Ollama's default)
+        self.request_keep_alive = request_keep_alive
+        self.clock = clock
+        self.hot_models: List[str] = []
+        self.last_cycle_at: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._loop())
+
+    async def aclose(self) -> None:
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    def is_resident(self, url: str, model: str) -> bool:
+        host = self.hosts.get(url)
+        return host is not None and host.resident.get(normalize_model_name(model), 0.0) > self.clock()
+
+    def observe(self, url: str, model: str, fields: Dict[str, Any]) -> None:
+        """Records a finished request: the model is now loaded there, and maybe it had to be."""
+        host = self.hosts.get(url)
+        if host is None:
+            return
+        name = normalize_model_name(model)
+        host.resident[name] = self.clock() + self.request_keep_alive
+        load_ms = (fields.get("load_duration") or 0) / 1e6
+        if load_ms >= COLD_START_MS:
+            host.cold_starts += 1
+            host.load_ms[name] = load_ms
+
+    async def run_cycle(self) -> None:
+        await self.refresh()
+        self.hot_models = await self._find_hot_models()
+        plan = self._placement(self.hot_models)
+        await asyncio.gather(*(self._warm(host, models) for host, models in plan.items() if models))
+        self.last_cycle_at = self.clock()
+
+    async def refresh(self) -> None:
+        """Replaces each host's resident set with what its `/api/ps` reports."""
+        async def refresh_one(host: _HostResidency) -> None:
+            try:
+                running = await host.adapter.alist_running_models()
+            except Exception as e:
+                host.refresh_error = repr(e)
+                return
+            host.refresh_error = None
+            now, wall_now = self.clock(), datetime.now(timezone.utc)
+            host.resident = {}
+            for entry in running:
+                expires_at = _parse_time(entry.get("expires_at"))
+                remaining = (expires_at - wall_now).total_seconds() if expires_at else self.request_keep_alive
+                host.resident[normalize_model_name(entry.get("model") or entry.get("name"))] = now + remaining
+
+        await asyncio.gather(*(refresh_one(host) for host in self.hosts.values()))
+
+    async def _find_hot_models(self) -> List[str]:
+        since = datetime.utcnow() - timedelta(seconds=self.hot_window)
+        async with self.session_factory() as session:
+            exposed = await SQLModelExposureRepository(session).list_backend_models()
+            traffic = await SQLLogRepository(session).get_model_traffic(since)
+        requests: Dict[str, int] = {}
+        for model in exposed:
+            requests.setdefault(normalize_model_name(model), 0)
+        for model, count in traffic.items():
+            name = normalize_model_name(model)
+            requests[name] = requests.get(name, 0) + count
+        return sorted(requests, key=lambda name: (-requests[name], name))
+
+    def _placement(self, models: List[str]) -> Dict[_HostResidency, List[str]]:
+        """Hot models per host, busiest first, within `max_models_per_host`."""
+        plan: Dict[_HostResidency, List[str]] = {host: [] for host in self.hosts.values()}
+        for model in models:
+            if self.pool:
+                # Only hosts known to have the model, among the ones routing sends it to
+                urls = [
+                    backend.url for backend in self.pool.replicas(model)
+                    if backend.models is not None and model in backend.models
+                ]
+            else:
+                urls = list(self.hosts)
+            for url in urls:
+                if len(plan[self.hosts[url]]) < self.max_models_per_host:
+                    plan[self.hosts[url]].append(model)
+        return plan
+
+    async def _warm(self, host: _HostResidency, models: List[str]) -> None:
+        # One load at a time per host: concurrent loads compete for the same memory
+        for model in models:
+            if host.resident.get(model, 0.0) > self.clock() + 2 * self.interval:
+                continue
+            try:
+                response = await host.adapter.aload_model(model, self.keep_alive, timeout=self.warmup_timeout)
+            except Exception as e:
+                host.warmup_failures += 1
+                logger.warning(f"Warm-up of {model} on {host.url} failed: {e!r}")
+                continue
+            host.warmups += 1
+            host.resident[model] = self.clock() + self.keep_alive_seconds
+            host.load_ms[model] = (response.get("load_duration") or 0) / 1e6
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                await self.run_cycle()
+            except Exception as e:
+                logger.warning(f"Model residency cycle failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    def stats(self) -> Dict[str, Any]:
+        now = self.clock()
+        return {
+            "keep_alive": self.keep_alive,
+            "interval": self.interval,
+            "hot_models": self.hot_models,
+            "last_cycle_seconds_ago": round(now - self.last_cycle_at, 1) if self.last_cycle_at is not None else None,
+            "hosts": [
+                {
+                    "url": host.url,
+                    # Model -> seconds until the backend unloads it
+                    "resident": {
+                        model: round(expires - now, 1) for model, expires in sorted(host.resident.items()) if expires > now
+                    },
+                    "load_ms": {model: round(ms, 1) for model, ms in sorted(host.load_ms.items())},
+                    "warmups": host.warmups,
+                    "warmup_failures": host.warmup_failures,
+                    "cold_starts": host.cold_starts,
+                    "refresh_error": host.refresh_error,
+                }
+                for host in self.hosts.values()
+            ],
+        }
+
+
+def _parse_time(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    # Python 3.11 accepts Ollama's nanosecond fractions and offsets
+    parsed = datetime.fromisoformat(value)
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def create_residency_manager_from_env(llm_service: AsyncLLMService, session_factory) -> Optional[ResidencyManager]:
+    if os.getenv("RESIDENCY_ENABLED", "true").lower() != "true":
+        return None
+    if not isinstance(llm_service, (BackendPool, OllamaHTTPAdapter)):
+        return None
+    return ResidencyManager(
+        llm_service,
+        session_factory,
+        keep_alive=os.getenv("RESIDENCY_KEEP_ALIVE", "30m"),
+        interval=float(os.getenv("RESIDENCY_INTERVAL", "60")),
+        hot_window=float(os.getenv("RESIDENCY_HOT_WINDOW", "3600")),
+        max_models_per_host=int(os.getenv("RESIDENCY_MAX_MODELS_PER_HOST", "3")),
+        warmup_timeout=float(os.getenv("RESIDENCY_WARMUP_TIMEOUT", "120")),
+    )
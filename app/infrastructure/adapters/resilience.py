@@ -0,0 +1,415 @@
+import os
+import time
+import random
+import asyncio
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Set, Tuple
+from loguru import logger
+from app.core.deadline import check_deadline
+from app.core.exceptions import CircuitOpenError, DeadlineExceededError
+from app.core.ports.llm_service import AsyncLLMService
+from app.core.serialization import loads
+from app.core.sketch import DDSketch
+from app.infrastructure.adapters.backend_pool import UpstreamTarget, is_backend_failure
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Breaker for one (backend, model).
+
+    While closed, calls flow and `failure_threshold` backend failures in a
+    row open it. While open, calls are refused for `open_seconds`. Then it
+    is half-open: up to `half_open_max_calls` trial calls go through, a
+    success closes the breaker and a failure opens it again.
+    """
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        open_seconds: float = 30.0,
+        half_open_max_calls: int = 1,
+        clock: Callable[[], float] = time.monotonic,
+        name: str = "",
+    ):
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+        self.half_open_max_calls = half_open_max_calls
+        self.clock = clock
+        self.name = name
+        self._state = CLOSED
+        self._failures = 0
+        self._trials = 0
+        self._opened_until = 0.0
+        self.opens = 0
+
+    @property
+    def state(self) -> str:
+        if self._state == OPEN and self.clock() >= self._opened_until:
+            self._state = HALF_OPEN
+            self._trials = 0
+        return self._state
+
+    def allow(self) -> bool:
+        """Whether a call may go through now; in half-open this reserves a trial."""
+        state = self.state
+        if state == CLOSED:
+            return True
+        if state == OPEN or self._trials >= self.half_open_max_calls:
+            return False
+        self._trials += 1
+        return True
+
+    def retry_after(self) -> float:
+        return max(0.0, self._opened_until - self.clock())
+
+    def on_success(self) -> None:
+        self._state = CLOSED
+        self._failures = 0
+        self._trials = 0
+
+    def on_failure(self) -> None:
+        if self.state == HALF_OPEN:
+            self._open()
+            return
+        self._failures += 1
+        if self._failures >= self.failure_threshold:
+            self._open()
+
+    def on_abandon(self) -> None:
+        """The call ended without a verdict (cancelled); frees its half-open trial."""
+        if self._state == HALF_OPEN and self._trials:
+            self._trials -= 1
+
+    def _open(self) -> None:
+        self._state = OPEN
+        self._opened_until = self.clock() + self.open_seconds
+        self._failures = 0
+        self._trials = 0
+        self.opens += 1
+        logger.warning(f"Circuit opened for {self.name or 'backend'} for {self.open_seconds:.0f}s")
+
+
+class RetryBudget:
+    """
+    Caps retries and hedges to `ratio` extra upstream calls per request.
+
+    Every request deposits `ratio` tokens (up to `reserve`) and every extra
+    call withdraws one. When the backend is failing, retries therefore stop
+    at a fixed share of traffic instead of multiplying it.
+    """
+    def __init__(self, ratio: float = 0.2, reserve: float = 10.0):
+        self.ratio = ratio
+        self.reserve = reserve
+        self.tokens = reserve
+        self.exhausted = 0
+
+    def deposit(self) -> None:
+        self.tokens = min(self.reserve, self.tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        self.exhausted += 1
+        return False
+
+
+class _LatencyWindow:
+    """Recent successful call latencies for one model (the last one to two `window` periods)."""
+    def __init__(self, window: float, clock: Callable[[], float]):
+        self.window = window
+        self.clock = clock
+        self._current = DDSketch()
+        self._previous = DDSketch()
+        self._rotated_at = clock()
+
+    def add(self, seconds: float) -> None:
+        self._rotate()
+        self._current.add(seconds)
+
+    def quantile(self, q: float, min_samples: int) -> Optional[float]:
+        self._rotate()
+        merged = DDSketch()
+        merged.merge(self._current)
+        merged.merge(self._previous)
+        return merged.quantile(q) if merged.count >= min_samples else None
+
+    def _rotate(self) -> None:
+        now = self.clock()
+        if now - self._rotated_at >= self.window:
+            self._previous = self._current if now - self._rotated_at < 2 * self.window else DDSketch()
+            self._current = DDSketch()
+            self._rotated_at = now
+
+
+class ResilientLLMService(AsyncLLMService):
+    """
+    Resilience layer around the upstream AsyncLLMService.
+
+    - Circuit breakers per (backend, model) stop sending requests to a
+      failing host until a half-open trial succeeds.
+    - Failures before any output (connection errors and 5xx; for streams,
+      before the first chunk) are retried on another backend if there is
+      one, after a full-jitter backoff, within the shared RetryBudget.
+    - The request deadline (see app.core.deadline) bounds every attempt and
+      the backoff between them; running out raises DeadlineExceededError.
+    - With `hedge`, a non-streaming call still running after the model's
+      recent `hedge_quantile` latency is duplicated on another backend;
+      the first answer wins and the other call is cancelled.
+
+    Backends come from the wrapped service's `targets(model)` when it is a
+    BackendPool, otherwise the wrapped service is the only target.
+    """
+    def __init__(
+        self,
+        inner: AsyncLLMService,
+        max_retries: int = 2,
+        backoff_base: float = 0.1,
+        backoff_max: float = 2.0,
+        retry_budget: Optional[RetryBudget] = None,
+        breaker_failure_threshold: int = 5,
+        breaker_open_seconds: float = 30.0,
+        hedge: bool = False,
+        hedge_quantile: float = 0.95,
+        hedge_min_delay: float = 0.05,
+        hedge_min_samples: int = 20,
+        latency_window: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+        rng: Optional[random.Random] = None,
+    ):
+        self.inner = inner
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.retry_budget = retry_budget or RetryBudget()
+        self.breaker_failure_threshold = breaker_failure_threshold
+        self.breaker_open_seconds = breaker_open_seconds
+        self.hedge = hedge
+        self.hedge_quantile = hedge_quantile
+        self.hedge_min_delay = hedge_min_delay
+        self.hedge_min_samples = hedge_min_samples
+        self.latency_window = latency_window
+        self.clock = clock
+        self.rng = rng or random.Random()
+        self._breakers: Dict[Tuple[str, str], CircuitBreaker] = {}
+        self._latencies: Dict[str, _LatencyWindow] = {}
+        self.retries = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    async def aclose(self) -> None:
+        await self.inner.aclose()
+
+    async def alist_models(self) -> List[Dict[str, Any]]:
+        return await self.inner.alist_models()
+
+    def _breaker(self, key: str, model: str) -> CircuitBreaker:
+        breaker = self._breakers.get((key, model))
+        if breaker is None:
+            breaker = CircuitBreaker(
+                self.breaker_failure_threshold, self.breaker_open_seconds, clock=self.clock, name=f"{key} {model}"
+            )
+            self._breakers[(key, model)] = breaker
+        return breaker
+
+    def _targets(self, model: str, messages: List[Dict[str, str]]) -> List[UpstreamTarget]:
+        targets = getattr(self.inner, "targets", None)
+        if targets is not None:
+            return targets(model, messages)
+        return [UpstreamTarget(getattr(self.inner, "base_url", "default"), self.inner.achat, self.inner.astream_chat_raw)]
+
+    def _select(
+        self, model: str, messages: List[Dict[str, str]], tried: Set[str]
+    ) -> Tuple[UpstreamTarget, CircuitBreaker]:
+        """Best target whose breaker lets the call through, preferring ones not tried yet."""
+        targets = sorted(self._targets(model, messages), key=lambda target: target.key in tried)
+        for target in targets:
+            breaker = self._breaker(target.key, model)
+            if breaker.allow():
+                tried.add(target.key)
+                return target, breaker
+        retry_after = min(self._breaker(target.key, model).retry_after() for target in targets)
+        raise CircuitOpenError(
+            f"All backends for model '{model}' are failing (circuit open)", model=model, retry_after=retry_after
+        )
+
+    def _should_retry(self, error: Exception, attempt: int) -> bool:
+        if attempt >= self.max_retries or not is_backend_failure(error):
+            return False
+        if not self.retry_budget.withdraw():
+            return False
+        self.retries += 1
+        return True
+
+    async def _backoff(self, attempt: int) -> None:
+        delay = self.rng.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1)))
+        left = check_deadline()
+        await asyncio.sleep(delay if left is None else min(delay, left))
+
+    async def _within_deadline(self, awaitable):
+        left = check_deadline()
+        if left is None:
+            return await awaitable
+        timeout = asyncio.timeout(left)
+        try:
+            async with timeout:
+                return await awaitable
+        except TimeoutError:
+            if timeout.expired():
+                raise DeadlineExceededError("Request deadline exceeded waiting for the backend")
+            raise
+
+    def _latency(self, model: str) -> _LatencyWindow:
+        window = self._latencies.get(model)
+        if window is None:
+            window = self._latencies[model] = _LatencyWindow(self.latency_window, self.clock)
+        return window
+
+    def _hedge_delay(self, model: str) -> Optional[float]:
+        if not self.hedge:
+            return None
+        latency = self._latency(model).quantile(self.hedge_quantile, self.hedge_min_samples)
+        return None if latency is None else max(self.hedge_min_delay, latency)
+
+    async def achat(self, model: str, messages: List[Dict[str, str]], **kwargs) -> Dict[str, Any]:
+        self.retry_budget.deposit()
+        tried: Set[str] = set()
+        attempt = 0
+        while True:
+            try:
+                return await self._within_deadline(self._hedged_call(model, messages, kwargs, tried))
+            except Exception as e:
+                if not self._should_retry(e, attempt):
+                    raise
+            attempt += 1
+            await self._backoff(attempt)
+
+    async def _call(
+        self, target: UpstreamTarget, breaker: CircuitBreaker, model: str, messages: List[Dict[str, str]],
+        kwargs: Dict[str, Any],
+    ) -> Dict[str, Any]:
+        started = self.clock()
+        try:
+            response = await target.achat(model, messages, **kwargs)
+        except asyncio.CancelledError:
+            breaker.on_abandon()
+            raise
+        except Exception as e:
+            # A 4xx still means the host is answering
+            breaker.on_failure() if is_backend_failure(e) else breaker.on_success()
+            raise
+        breaker.on_success()
+        self._latency(model).add(self.clock() - started)
+        return response
+
+    async def _hedged_call(
+        self, model: str, messages: List[Dict[str, str]], kwargs: Dict[str, Any], tried: Set[str]
+    ) -> Dict[str, Any]:
+        target, breaker = self._select(model, messages, tried)
+        delay = self._hedge_delay(model)
+        if delay is None:
+            return await self._call(target, breaker, model, messages, kwargs)
+
+        primary = asyncio.ensure_future(self._call(target, breaker, model, messages, kwargs))
+        tasks = [primary]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if not done and self.retry_budget.withdraw():
+                try:
+                    hedge_target, hedge_breaker = self._select(model, messages, tried)
+                except CircuitOpenError:
+                    hedge_target = None
+                if hedge_target:
+                    self.hedges += 1
+                    tasks.append(asyncio.ensure_future(
+                        self._call(hedge_target, hedge_breaker, model, messages, kwargs)
+                    ))
+            pending = set(tasks)
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not primary:
+                            self.hedge_wins += 1
+                        return task.result()
+                    error = error or task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+                elif not task.cancelled():
+                    task.exception()  # Retrieved so a losing failure isn't reported as unhandled
+
+    async def astream_chat(self, model: str, messages: List[Dict[str, str]], **kwargs) -> AsyncIterator[Dict[str, Any]]:
+        async for line in self.astream_chat_raw(model, messages, **kwargs):
+            yield loads(line)
+
+    async def astream_chat_raw(self, model: str, messages: List[Dict[str, str]], **kwargs) -> AsyncIterator[bytes]:
+        """Retries only until the first chunk; after that, failures reach the client."""
+        self.retry_budget.deposit()
+        tried: Set[str] = set()
+        attempt = 0
+        while True:
+            target, breaker = self._select(model, messages, tried)
+            stream = target.astream_chat_raw(model, messages, **kwargs)
+            try:
+                first = await self._within_deadline(stream.__anext__())
+            except StopAsyncIteration:
+                breaker.on_success()
+                return
+            except (asyncio.CancelledError, DeadlineExceededError):
+                breaker.on_abandon()
+                await stream.aclose()
+                raise
+            except Exception as e:
+                breaker.on_failure() if is_backend_failure(e) else breaker.on_success()
+                await stream.aclose()
+                if not self._should_retry(e, attempt):
+                    raise
+                attempt += 1
+                await self._backoff(attempt)
+                continue
+
+            breaker.on_success()
+            try:
+                yield first
+                async for line in stream:
+                    yield line
+            except Exception as e:
+                if is_backend_failure(e):
+                    breaker.on_failure()
+                raise
+            finally:
+                await stream.aclose()
+            return
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "retries": self.retries,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "retry_budget": {"tokens": round(self.retry_budget.tokens, 2), "exhausted": self.retry_budget.exhausted},
+            "breakers": [
+                {"backend": key, "model": model, "state": breaker.state, "opens": breaker.opens}
+                for (key, model), breaker in self._breakers.items()
+            ],
+        }
+
+
+def create_resilient_service_from_env(inner: AsyncLLMService) -> ResilientLLMService:
+    return ResilientLLMService(
+        inner,
+        max_retries=int(os.getenv("UPSTREAM_MAX_RETRIES", "2")),
+        backoff_base=float(os.getenv("UPSTREAM_RETRY_BACKOFF_MS", "100")) / 1000,
+        backoff_max=float(os.getenv("UPSTREAM_RETRY_BACKOFF_MAX_MS", "2000")) / 1000,
+        retry_budget=RetryBudget(ratio=float(os.getenv("UPSTREAM_RETRY_BUDGET_RATIO", "0.2"))),
+        breaker_failure_threshold=int(os.getenv("CIRCUIT_BREAKER_FAILURE_THRESHOLD", "5")),
+        breaker_open_seconds=float(os.getenv("CIRCUIT_BREAKER_OPEN_SECONDS", "30")),
+        hedge=os.getenv("HEDGING_ENABLED", "false").lower() == "true",
+        hedge_quantile=float(os.getenv("HEDGE_QUANTILE", "0.95")),
+        hedge_min_delay=float(os.getenv("HEDGE_MIN_DELAY_MS", "50")) / 1000,
+    )
@@ -0,0 +1,147 @@
+import os
+import json
+import time
+import asyncio
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+from loguru import logger
+from app.core.ports.cache import ResponseCache
+
+class TieredResponseCache(ResponseCache):
+    """
+    Exact-match chat response cache.
+
+    The memory tier is an LRU bounded by the serialized size of its entries
+    (`max_bytes`). When `disk_dir` is set, entries are also written there as
+    JSON files, so they survive restarts and are shared by workers on the
+    same host; disk hits are promoted back into memory. Both tiers expire
+    entries after `ttl_seconds`.
+    """
+    def __init__(
+        self,
+        max_bytes: int = 64 * 1024 * 1024,
+        ttl_seconds: float = 300.0,
+        disk_dir: Optional[str] = None,
+        clock=time.time,
+    ):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.disk_dir = disk_dir
+        self.clock = clock
+        # key -> (expires_at, size, serialized response)
+        self._entries: "OrderedDict[str, Tuple[float, int, bytes]]" = OrderedDict()
+        self._bytes = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, _, data = entry
+            if expires_at > self.clock():
+                self._entries.move_to_end(key)
+                self.memory_hits += 1
+                return json.loads(data)
+            self._remove(key)
+
+        if self.disk_dir:
+            stored = await asyncio.to_thread(self._read_file, key)
+            if stored is not None:
+                expires_at, data = stored
+                self._store(key, expires_at, data)
+                self.disk_hits += 1
+                return json.loads(data)
+
+        self.misses += 1
+        return None
+
+    async def put(self, key: str, response: Dict[str, Any]) -> None:
+        data = json.dumps(response).encode("utf-8")
+        expires_at = self.clock() + self.ttl_seconds
+        self._store(key, expires_at, data)
+        if self.disk_dir:
+            await asyncio.to_thread(self._write_file, key, expires_at, data)
+
+    def stats(self) -> Dict[str, Any]:
+        hits = self.memory_hits + self.disk_hits
+        lookups = hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+        }
+
+    def clear(self) -> None:
+        """Drops the memory tier and resets counters (disk files are left alone)."""
+        self._entries.clear()
+        self._bytes = 0
+        self.memory_hits = self.disk_hits = self.misses = self.evictions = 0
+
+    def _store(self, key: str, expires_at: float, data: bytes) -> None:
+        if len(data) > self.max_bytes:
+            return
+        self._remove(key)
+        self._entries[key] = (expires_at, len(data), data)
+        self._bytes += len(data)
+        while self._bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[1]
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, f"{key}.json")
+
+    def _read_file(self, key: str) -> Optional[Tuple[float, bytes]]:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                stored = json.loads(f.read())
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Unreadable response cache file {path}: {e}")
+            return None
+        if stored["expires_at"] <= self.clock():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+        return stored["expires_at"], json.dumps(stored["response"]).encode("utf-8")
+
+    def _write_file(self, key: str, expires_at: float, data: bytes) -> None:
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(b'{"expires_at": ' + repr(expires_at).encode() + b', "response": ' + data + b"}")
+            # Atomic rename so concurrent readers never see a partial file
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Failed to write response cache file {path}: {e}")
+
+def create_response_cache_from_env() -> Optional[TieredResponseCache]:
+    if os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() != "true":
+        return None
+    return TieredResponseCache(
+        max_bytes=int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(64 * 1024 * 1024))),
+        ttl_seconds=float(os.getenv("RESPONSE_CACHE_TTL", "300")),
+        disk_dir=os.getenv("RESPONSE_CACHE_DIR") or None,
+    )
+
+# Process-wide cache used by the non-streaming chat use case
+response_cache = create_response_cache_from_env()
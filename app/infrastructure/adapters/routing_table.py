@@ -0,0 +1,132 @@
+import asyncio
+import threading
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from loguru import logger
+from app.core.domain.model_exposure import ModelExposure
+from app.core.domain.routing_version import RoutingVersion
+from app.core.ports.repositories import ModelExposureRepository
+
+RouteKey = Tuple[UUID, str]
+
+class ModelRoutingTable:
+    """
+    In-memory (project_id, logical_name) -> ModelExposure routing table.
+
+    Loaded in bulk at startup, patched incrementally on local writes and
+    reloaded whenever the persisted RoutingVersion moves ahead of ours
+    (i.e. another worker or process wrote an exposure).
+    """
+    def __init__(self):
+        self._routes: Dict[RouteKey, ModelExposure] = {}
+        self._by_project: Dict[UUID, List[ModelExposure]] = {}
+        self._lock = threading.Lock()
+        self.version = 0
+        self.loaded = False
+
+    @staticmethod
+    def _snapshot(exposure: ModelExposure) -> ModelExposure:
+        return ModelExposure.model_validate(exposure.model_dump())
+
+    async def load(self, session: AsyncSession) -> None:
+        """Rebuilds the whole table from the database."""
+        version_row = await session.get(RoutingVersion, 1)
+        exposures = (await session.exec(select(ModelExposure))).all()
+
+        routes: Dict[RouteKey, ModelExposure] = {}
+        by_project: Dict[UUID, List[ModelExposure]] = {}
+        for exposure in exposures:
+            snapshot = self._snapshot(exposure)
+            routes[(snapshot.project_id, snapshot.logical_name)] = snapshot
+            by_project.setdefault(snapshot.project_id, []).append(snapshot)
+
+        with self._lock:
+            self._routes = routes
+            self._by_project = by_project
+            self.version = version_row.version if version_row else 0
+            self.loaded = True
+        logger.info(f"Routing table loaded: {len(routes)} routes (version {self.version})")
+
+    async def sync(self, session: AsyncSession) -> bool:
+        """Reloads if the persisted version differs from ours. Returns True if it reloaded."""
+        version_row = await session.get(RoutingVersion, 1)
+        persisted = version_row.version if version_row else 0
+        if self.loaded and persisted == self.version:
+            return False
+        await self.load(session)
+        return True
+
+    def apply(self, exposure: ModelExposure, version: int) -> None:
+        """Upserts a single route after a local write."""
+        if not self.loaded:
+            return
+        snapshot = self._snapshot(exposure)
+        key = (snapshot.project_id, snapshot.logical_name)
+        with self._lock:
+            # Copy-on-write so concurrent readers never see a half-updated list
+            project_routes = [e for e in self._by_project.get(snapshot.project_id, []) if e.id != snapshot.id]
+            project_routes.append(snapshot)
+            # Drop the route under its previous key, in case the logical name changed
+            routes = {k: e for k, e in self._routes.items() if e.id != snapshot.id}
+            routes[key] = snapshot
+            self._by_project[snapshot.project_id] = project_routes
+            self._routes = routes
+            # A version gap means someone else also wrote; let the next sync reload
+            if version == self.version + 1:
+                self.version = version
+
+    def resolve(self, project_id: UUID, logical_name: str) -> Optional[ModelExposure]:
+        return self._routes.get((project_id, logical_name))
+
+    def list_project(self, project_id: UUID) -> List[ModelExposure]:
+        return list(self._by_project.get(project_id, []))
+
+    def stats(self) -> Dict[str, int]:
+        return {"version": self.version, "routes": len(self._routes), "loaded": self.loaded}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._routes = {}
+            self._by_project = {}
+            self.version = 0
+            self.loaded = False
+
+class CachedModelExposureRepository(ModelExposureRepository):
+    """
+    ModelExposureRepository serving reads from the routing table.
+    Falls back to the wrapped repository until the table has been loaded.
+    """
+    def __init__(self, table: ModelRoutingTable, repo: ModelExposureRepository):
+        self.table = table
+        self.repo = repo
+
+    async def get_by_project(self, project_id: UUID) -> List[ModelExposure]:
+        if self.table.loaded:
+            return self.table.list_project(project_id)
+        return await self.repo.get_by_project(project_id)
+
+    async def get_by_logical_name(self, project_id: UUID, logical_name: str) -> Optional[ModelExposure]:
+        if self.table.loaded:
+            return self.table.resolve(project_id, logical_name)
+        return await self.repo.get_by_logical_name(project_id, logical_name)
+
+    async def list_backend_models(self) -> List[str]:
+        return await self.repo.list_backend_models()
+
+    async def save(self, model_exposure: ModelExposure) -> ModelExposure:
+        return await self.repo.save(model_exposure)
+
+async def run_sync_loop(table, session_factory, interval: float, label: str = "Routing table") -> None:
+    """Periodically reconciles an in-memory table (anything with `sync(session)`) with its persisted version."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            async with session_factory() as session:
+                await table.sync(session)
+        except Exception as e:
+            logger.warning(f"{label} sync failed: {e}")
+
+# Process-wide routing table
+routing_table = ModelRoutingTable()
@@ -0,0 +1,174 @@
+import os
+import time
+import heapq
+import asyncio
+import itertools
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID
+from app.core.deadline import check_deadline
+from app.core.exceptions import AdmissionRejectedError, DeadlineExceededError
+from app.core.ports.scheduler import AdmissionScheduler
+
+class _ModelQueue:
+    """Admission state for one physical model."""
+    def __init__(self, max_inflight: int):
+        self.max_inflight = max_inflight
+        self.inflight = 0
+        self.waiting = 0
+        # (virtual finish tag, sequence, future); cancelled futures are skipped lazily
+        self.heap: List[Tuple[float, int, asyncio.Future]] = []
+        self.virtual_time = 0.0
+        self.last_finish: Dict[UUID, float] = {}
+        self.admitted = 0
+        self.rejected = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record_wait(self, wait: float) -> None:
+        self.admitted += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+
+class FairScheduler(AdmissionScheduler):
+    """
+    Per-model admission control with weighted fair queuing across projects.
+
+    Each model allows `max_inflight` concurrent backend calls. Extra
+    requests queue up and are admitted in order of their virtual finish
+    tag (start-time fair queuing). A project that bursts therefore only
+    delays its own requests, and other projects keep their share. When the
+    queue is already `max_queue_depth` deep, or a request waits longer than
+    `queue_timeout`, AdmissionRejectedError is raised. A request never waits
+    past its own deadline (X-Request-Timeout); it gets DeadlineExceededError.
+    """
+    def __init__(
+        self,
+        default_max_inflight: int = 8,
+        model_limits: Optional[Dict[str, int]] = None,
+        max_queue_depth: int = 100,
+        queue_timeout: float = 30.0,
+        project_weights: Optional[Dict[UUID, float]] = None,
+    ):
+        self.default_max_inflight = default_max_inflight
+        self.model_limits = model_limits or {}
+        self.max_queue_depth = max_queue_depth
+        self.queue_timeout = queue_timeout
+        self.project_weights = project_weights or {}
+        self._queues: Dict[str, _ModelQueue] = {}
+        self._sequence = itertools.count()
+
+    def _queue(self, model: str) -> _ModelQueue:
+        queue = self._queues.get(model)
+        if queue is None:
+            queue = _ModelQueue(self.model_limits.get(model, self.default_max_inflight))
+            self._queues[model] = queue
+        return queue
+
+    async def acquire(self, model: str, project_id: UUID) -> None:
+        queue = self._queue(model)
+        if queue.inflight < queue.max_inflight and queue.waiting == 0:
+            queue.inflight += 1
+            queue.record_wait(0.0)
+            return
+
+        if queue.waiting >= self.max_queue_depth:
+            queue.rejected += 1
+            raise AdmissionRejectedError(
+                f"Too many queued requests for model '{model}'",
+                model=model,
+                reason="queue_full",
+                retry_after=1.0,
+            )
+
+        # No point queueing for longer than the caller is willing to wait overall
+        timeout = self.queue_timeout
+        left = check_deadline()
+        deadline_bound = left is not None and left < timeout
+        if deadline_bound:
+            timeout = left
+
+        weight = self.project_weights.get(project_id, 1.0)
+        tag = max(queue.virtual_time, queue.last_finish.get(project_id, 0.0)) + 1.0 / weight
+        queue.last_finish[project_id] = tag
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(queue.heap, (tag, next(self._sequence), future))
+        queue.waiting += 1
+
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(future, timeout=timeout)
+        except asyncio.TimeoutError:
+            queue.rejected += 1
+            if deadline_bound:
+                raise DeadlineExceededError(f"Request deadline exceeded waiting for a slot on model '{model}'")
+            raise AdmissionRejectedError(
+                f"Timed out waiting for a slot on model '{model}'",
+                model=model,
+                reason="queue_timeout",
+                retry_after=self.queue_timeout,
+            )
+        except asyncio.CancelledError:
+            # Granted just before the caller went away: hand the slot on
+            if future.done() and not future.cancelled():
+                self.release(model)
+            raise
+        finally:
+            if not future.done() or future.cancelled():
+                queue.waiting -= 1
+        queue.record_wait(time.monotonic() - started)
+
+    def release(self, model: str) -> None:
+        queue = self._queue(model)
+        queue.inflight -= 1
+        while queue.heap and queue.inflight < queue.max_inflight:
+            tag, _, future = heapq.heappop(queue.heap)
+            if future.done():
+                continue
+            queue.virtual_time = tag
+            queue.waiting -= 1
+            queue.inflight += 1
+            future.set_result(None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            model: {
+                "inflight": queue.inflight,
+                "max_inflight": queue.max_inflight,
+                "queue_depth": queue.waiting,
+                "admitted": queue.admitted,
+                "rejected": queue.rejected,
+                "avg_wait_ms": round(queue.total_wait / queue.admitted * 1000, 2) if queue.admitted else 0.0,
+                "max_wait_ms": round(queue.max_wait * 1000, 2),
+            }
+            for model, queue in self._queues.items()
+        }
+
+def parse_model_limits(raw: str) -> Dict[str, int]:
+    """Parses `model=limit,model=limit` (model names may contain ':')."""
+    limits = {}
+    for item in filter(None, (part.strip() for part in raw.split(","))):
+        model, _, limit = item.rpartition("=")
+        limits[model] = int(limit)
+    return limits
+
+def parse_project_weights(raw: str) -> Dict[UUID, float]:
+    """Parses `project_id=weight,project_id=weight`; unlisted projects weigh 1."""
+    weights = {}
+    for item in filter(None, (part.strip() for part in raw.split(","))):
+        project_id, _, weight = item.partition("=")
+        weights[UUID(project_id.strip())] = float(weight)
+    return weights
+
+def create_scheduler_from_env() -> Optional[FairScheduler]:
+    if os.getenv("SCHEDULER_ENABLED", "true").lower() != "true":
+        return None
+    return FairScheduler(
+        default_max_inflight=int(os.getenv("SCHEDULER_DEFAULT_MAX_INFLIGHT", "8")),
+        model_limits=parse_model_limits(os.getenv("SCHEDULER_MODEL_LIMITS", "")),
+        max_queue_depth=int(os.getenv("SCHEDULER_MAX_QUEUE_DEPTH", "100")),
+        queue_timeout=float(os.getenv("SCHEDULER_QUEUE_TIMEOUT", "30")),
+        project_weights=parse_project_weights(os.getenv("SCHEDULER_PROJECT_WEIGHTS", "")),
+    )
+
+# Process-wide scheduler shared by both chat use cases
+admission_scheduler = create_scheduler_from_env()
@@ -1,97 +1,392 @@
+from datetime import datetime, timedelta
 from typing import List, Optional, Dict, Any
 from uuid import UUID
-from sqlmodel import Session, select
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from app.core.domain.project import Project
 from app.core.domain.request_log import RequestLog
 from app.core.domain.model_exposure import ModelExposure
-from app.core.ports.repositories import ProjectRepository, LogRepository, ModelExposureRepository
+from app.core.domain.routing_version import RoutingVersion
+from app.core.domain.auth_version import AuthVersion
+from app.core.domain.request_rollup import (
+    RequestRollup, ADDITIVE_COLUMNS, HISTOGRAM_COLUMNS, LATENCY_BUCKETS_MS, bucket_start, rollup_logs
+)
+from app.infrastructure.adapters.routing_table import routing_table
+from app.core.domain.latency_sketch import LatencySketch
+from app.core.domain.chat_job import ChatJob, JOB_QUEUED, JOB_RUNNING
+from app.core.sketch import DDSketch
+from app.core.ports.repositories import (
+    ProjectRepository, LogRepository, ModelExposureRepository, LatencySketchRepository, ChatJobRepository
+)
+
+async def bump_version(session: AsyncSession, counter) -> int:
+    """Atomically increments a single-row version counter within the caller's transaction."""
+    from sqlalchemy import update
+
+    result = await session.exec(update(counter).where(counter.id == 1).values(version=counter.version + 1))
+    if result.rowcount == 0:
+        session.add(counter(id=1, version=1))
+        return 1
+    return (await session.exec(select(counter.version).where(counter.id == 1))).one()
 
 class SQLProjectRepository(ProjectRepository):
-    def __init__(self, session: Session):
+    def __init__(self, session: AsyncSession):
         self.session = session
         
-    def get_by_id(self, project_id: UUID) -> Optional[Project]:
-        return self.session.get(Project, project_id)
+    async def get_by_id(self, project_id: UUID) -> Optional[Project]:
+        return await self.session.get(Project, project_id)
         
-    def get_by_api_key(self, api_key: str) -> Optional[Project]:
+    async def get_by_api_key(self, api_key: str) -> Optional[Project]:
         statement = select(Project).where(Project.api_key == api_key)
-        return self.session.exec(statement).first()
+        return (await self.session.exec(statement)).first()
         
-    def save(self, project: Project) -> Project:
+    async def save(self, project: Project) -> Project:
         self.session.add(project)
-        self.session.commit()
-        self.session.refresh(project)
+        # Other workers drop their cached API key lookups when this moves
+        await bump_version(self.session, AuthVersion)
+        await self.session.commit()
+        await self.session.refresh(project)
         return project
 
-    def list_all(self) -> List[Project]:
+    async def list_all(self) -> List[Project]:
         statement = select(Project)
-        return list(self.session.exec(statement).all())
+        return list((await self.session.exec(statement)).all())
 
-    def delete(self, project_id: UUID) -> bool:
-        project = self.session.get(Project, project_id)
+    async def delete(self, project_id: UUID) -> bool:
+        project = await self.session.get(Project, project_id)
         if not project:
             return False
-        self.session.delete(project)
-        self.session.commit()
+        await self.session.delete(project)
+        await bump_version(self.session, AuthVersion)
+        await self.session.commit()
         return True
 
+def rollup_upsert_statement(dialect_name: str):
+    """INSERT of rollup deltas that adds them to any existing row for the same bucket."""
+    if dialect_name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+
+    table = RequestRollup.__table__
+    statement = insert(table)
+    return statement.on_conflict_do_update(
+        index_elements=[column.name for column in table.primary_key.columns],
+        set_={name: table.c[name] + statement.excluded[name] for name in ADDITIVE_COLUMNS},
+    )
+
+def backfill_request_rollups(connection, chunk_size: int = 5000) -> int:
+    """
+    Folds every stored request log into the rollups, in keyset-paginated
+    chunks (sync connection). Run once, when the rollup table is created,
+    so request logs written before rollups existed still count in /admin/stats.
+    """
+    from sqlalchemy import select as sa_select, tuple_
+
+    columns = RequestLog.__table__.c
+    upsert = rollup_upsert_statement(connection.dialect.name)
+    query = sa_select(
+        columns.id, columns.timestamp, columns.project_id, columns.model, columns.status,
+        columns.latency_ms, columns.tokens_input, columns.tokens_output,
+    ).order_by(columns.timestamp, columns.id).limit(chunk_size)
+    folded = 0
+    last = None
+    while True:
+        page = query if last is None else query.where(tuple_(columns.timestamp, columns.id) > last)
+        rows = connection.execute(page).all()
+        if not rows:
+            return folded
+        connection.execute(upsert, [rollup.model_dump() for rollup in rollup_logs(rows)])
+        folded += len(rows)
+        last = (rows[-1].timestamp, rows[-1].id)
+
 class SQLLogRepository(LogRepository):
-    def __init__(self, session: Session):
+    def __init__(self, session: AsyncSession):
         self.session = session
         
-    def save(self, log: RequestLog) -> RequestLog:
+    async def save(self, log: RequestLog) -> RequestLog:
         self.session.add(log)
-        self.session.commit()
-        self.session.refresh(log)
+        await self._upsert_rollups([log])
+        await self.session.commit()
+        await self.session.refresh(log)
         return log
+
+    async def save_many(self, logs: List[RequestLog]) -> int:
+        from sqlalchemy import insert
         
-    def get_by_project(self, project_id: UUID, limit: int = 100) -> List[RequestLog]:
+        if not logs:
+            return 0
+        # Single executemany INSERT, no per-row refresh
+        await self.session.exec(insert(RequestLog), params=[log.model_dump() for log in logs])
+        # Rollups are updated in the same transaction so they never drift from the raw rows
+        await self._upsert_rollups(logs)
+        await self.session.commit()
+        return len(logs)
+
+    async def _upsert_rollups(self, logs: List[RequestLog]) -> None:
+        statement = rollup_upsert_statement(self.session.bind.dialect.name)
+        await self.session.exec(statement, params=[rollup.model_dump() for rollup in rollup_logs(logs)])
+        
+    async def get_by_project(self, project_id: UUID, limit: int = 100) -> List[RequestLog]:
         statement = select(RequestLog).where(RequestLog.project_id == project_id).limit(limit)
-        return list(self.session.exec(statement).all())
+        return list((await self.session.exec(statement)).all())
 
-    def get_global_stats(self) -> Dict[str, Any]:
+    async def get_model_traffic(self, since: datetime) -> Dict[str, int]:
+        from sqlalchemy import func
+
+        R = RequestRollup
+        statement = (
+            select(R.model, func.sum(R.count))
+            .where(R.granularity == "minute", R.bucket_start >= bucket_start(since, "minute"))
+            .group_by(R.model)
+        )
+        return {model: count for model, count in (await self.session.exec(statement)).all()}
+
+    async def get_global_stats(
+        self,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        granularity: str = "hour",
+    ) -> Dict[str, Any]:
         from sqlalchemy import func
         
-        # Total requests
-        total_stmt = select(func.count(RequestLog.id))
-        total = self.session.exec(total_stmt).one()
-        
-        # Avg latency
-        avg_lat_stmt = select(func.avg(RequestLog.latency_ms))
-        avg_latency = self.session.exec(avg_lat_stmt).one() or 0
+        # Reads the pre-aggregated rollups: cost grows with buckets, not requests
+        R = RequestRollup
+        filters = [R.granularity == granularity]
+        if since:
+            filters.append(R.bucket_start >= bucket_start(since, granularity))
+        if until:
+            filters.append(R.bucket_start <= until)
+        requests = func.sum(R.count)
+
+        totals_stmt = select(
+            requests,
+            func.sum(R.latency_sum_ms),
+            func.sum(R.tokens_input_sum),
+            func.sum(R.tokens_output_sum),
+            *[func.sum(getattr(R, column)) for column in HISTOGRAM_COLUMNS],
+        ).where(*filters)
+        total, latency_sum, tokens_input, tokens_output, *histogram = (await self.session.exec(totals_stmt)).one()
+        total = total or 0
         
         # Top models
-        top_models_stmt = select(RequestLog.model, func.count(RequestLog.id)).group_by(RequestLog.model).order_by(func.count(RequestLog.id).desc()).limit(5)
-        top_models = self.session.exec(top_models_stmt).all()
+        top_models_stmt = select(R.model, requests).where(*filters).group_by(R.model).order_by(requests.desc()).limit(5)
+        top_models = (await self.session.exec(top_models_stmt)).all()
         
         # Projects activity
-        top_projects_stmt = select(RequestLog.project_id, func.count(RequestLog.id)).group_by(RequestLog.project_id).order_by(func.count(RequestLog.id).desc()).limit(5)
-        top_projects = self.session.exec(top_projects_stmt).all()
+        top_projects_stmt = select(R.project_id, requests).where(*filters).group_by(R.project_id).order_by(requests.desc()).limit(5)
+        top_projects = (await self.session.exec(top_projects_stmt)).all()
+
+        status_stmt = select(R.status, requests).where(*filters).group_by(R.status)
+        statuses = (await self.session.exec(status_stmt)).all()
+
+        series_stmt = select(R.bucket_start, requests, func.sum(R.latency_sum_ms)).where(*filters).group_by(R.bucket_start).order_by(R.bucket_start)
+        series = (await self.session.exec(series_stmt)).all()
         
         return {
             "total_requests": total,
-            "avg_latency_ms": round(float(avg_latency), 2),
+            "avg_latency_ms": round(latency_sum / total, 2) if total else 0.0,
             "top_models": [{"name": m, "count": c} for m, c in top_models],
-            "top_projects": [{"id": str(p), "count": c} for p, c in top_projects]
+            "top_projects": [{"id": str(p), "count": c} for p, c in top_projects],
+            "tokens_input": tokens_input or 0,
+            "tokens_output": tokens_output or 0,
+            "status_counts": {str(status): c for status, c in statuses},
+            "latency_histogram": [
+                {"le_ms": bound, "count": c or 0}
+                for bound, c in zip(list(LATENCY_BUCKETS_MS) + [None], histogram)
+            ],
+            "granularity": granularity,
+            "series": [
+                {"bucket_start": b.isoformat(), "count": c, "avg_latency_ms": round(lat / c, 2) if c else 0.0}
+                for b, c, lat in series
+            ],
+        }
+
+class SQLLatencySketchRepository(LatencySketchRepository):
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def save_many(self, sketches: List[LatencySketch]) -> None:
+        if not sketches:
+            return
+        if self.session.bind.dialect.name == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+
+        table = LatencySketch.__table__
+        statement = insert(table)
+        statement = statement.on_conflict_do_update(
+            index_elements=[column.name for column in table.primary_key.columns],
+            set_={"count": statement.excluded.count, "sketch": statement.excluded.sketch},
+        )
+        await self.session.exec(statement, params=[row.model_dump() for row in sketches])
+        await self.session.commit()
+
+    async def get_percentiles(
+        self,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        granularity: str = "hour",
+    ) -> Dict[str, Any]:
+        S = LatencySketch
+        statement = select(S).where(S.granularity == granularity)
+        if since:
+            statement = statement.where(S.bucket_start >= bucket_start(since, granularity))
+        if until:
+            statement = statement.where(S.bucket_start <= until)
+
+        overall: Optional[DDSketch] = None
+        merged: Dict[tuple, DDSketch] = {}
+        for row in (await self.session.exec(statement)).all():
+            sketch = DDSketch.from_dict(row.sketch)
+            key = (row.project_id, row.model, row.endpoint)
+            if key in merged:
+                merged[key].merge(sketch)
+            else:
+                merged[key] = sketch
+            if overall is None:
+                overall = DDSketch(sketch.relative_accuracy)
+            overall.merge(sketch)
+
+        def summarize(sketch: DDSketch) -> Dict[str, Any]:
+            return {
+                "count": sketch.count,
+                **{name: round(sketch.quantile(q), 1) for name, q in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99))},
+            }
+
+        by_key = [
+            {"project_id": str(project_id), "model": model, "endpoint": endpoint, **summarize(sketch)}
+            for (project_id, model, endpoint), sketch in merged.items()
+        ]
+        by_key.sort(key=lambda item: item["count"], reverse=True)
+        return {
+            "overall": summarize(overall) if overall and overall.count else None,
+            "by_key": by_key,
         }
 
 class SQLModelExposureRepository(ModelExposureRepository):
-    def __init__(self, session: Session):
+    def __init__(self, session: AsyncSession):
         self.session = session
         
-    def get_by_project(self, project_id: UUID) -> List[ModelExposure]:
+    async def get_by_project(self, project_id: UUID) -> List[ModelExposure]:
         statement = select(ModelExposure).where(ModelExposure.project_id == project_id)
-        return list(self.session.exec(statement).all())
+        return list((await self.session.exec(statement)).all())
         
-    def get_by_logical_name(self, project_id: UUID, logical_name: str) -> Optional[ModelExposure]:
+    async def get_by_logical_name(self, project_id: UUID, logical_name: str) -> Optional[ModelExposure]:
         statement = select(ModelExposure).where(
             ModelExposure.project_id == project_id,
             ModelExposure.logical_name == logical_name
         )
-        return self.session.exec(statement).first()
+        return (await self.session.exec(statement)).first()
         
-    def save(self, model_exposure: ModelExposure) -> ModelExposure:
+    async def list_backend_models(self) -> List[str]:
+        statement = select(ModelExposure.backend_model).distinct()
+        return list((await self.session.exec(statement)).all())
+
+    async def save(self, model_exposure: ModelExposure) -> ModelExposure:
         self.session.add(model_exposure)
-        self.session.commit()
-        self.session.refresh(model_exposure)
+        # Atomic increment in the same transaction as the exposure write
+        version = await bump_version(self.session, RoutingVersion)
+        await self.session.commit()
+        await self.session.refresh(model_exposure)
+        # Patch this worker's routing table; other workers pick up the new version on sync
+        routing_table.apply(model_exposure, version)
         return model_exposure
+
+class SQLChatJobRepository(ChatJobRepository):
+    # Runnable jobs looked at per claim; more than one so racing workers can skip past each other
+    CLAIM_CANDIDATES = 5
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def create(self, job: ChatJob) -> ChatJob:
+        self.session.add(job)
+        await self.session.commit()
+        await self.session.refresh(job)
+        return job
+
+    async def get(self, job_id: UUID) -> Optional[ChatJob]:
+        return await self.session.get(ChatJob, job_id, populate_existing=True)
+
+    async def claim(self, owner: str, lease_seconds: float) -> Optional[ChatJob]:
+        from sqlalchemy import and_, or_, update
+
+        J = ChatJob
+        now = datetime.utcnow()
+        runnable = or_(
+            and_(J.status == JOB_QUEUED, J.available_at <= now),
+            and_(J.status == JOB_RUNNING, J.lease_expires_at < now),
+        )
+        candidates = select(J.id).where(runnable).order_by(J.created_at).limit(self.CLAIM_CANDIDATES)
+        for job_id in (await self.session.exec(candidates)).all():
+            # Compare-and-set, so each job is leased by exactly one worker (no row locks needed)
+            claimed = await self.session.exec(
+                update(J).where(J.id == job_id, runnable).values(
+                    status=JOB_RUNNING,
+                    lease_owner=owner,
+                    lease_expires_at=now + timedelta(seconds=lease_seconds),
+                    attempts=J.attempts + 1,
+                    started_at=now,
+                )
+            )
+            await self.session.commit()
+            if claimed.rowcount == 1:
+                return await self.get(job_id)
+        return None
+
+    async def _update_leased(self, job_id: UUID, owner: str, **values) -> bool:
+        from sqlalchemy import update
+
+        J = ChatJob
+        statement = update(J).where(J.id == job_id, J.status == JOB_RUNNING, J.lease_owner == owner).values(**values)
+        updated = await self.session.exec(statement)
+        await self.session.commit()
+        return updated.rowcount == 1
+
+    async def extend_lease(self, job_id: UUID, owner: str, lease_seconds: float) -> bool:
+        return await self._update_leased(
+            job_id, owner, lease_expires_at=datetime.utcnow() + timedelta(seconds=lease_seconds)
+        )
+
+    async def release(self, job_id: UUID, owner: str, available_at: datetime, error: str) -> bool:
+        return await self._update_leased(
+            job_id, owner,
+            status=JOB_QUEUED, available_at=available_at, error=error, lease_owner=None, lease_expires_at=None,
+            attempts=ChatJob.attempts - 1,
+        )
+
+    async def finish(
+        self,
+        job_id: UUID,
+        owner: str,
+        status: str,
+        expires_at: datetime,
+        result: Optional[Dict[str, Any]] = None,
+        error: Optional[str] = None,
+    ) -> bool:
+        return await self._update_leased(
+            job_id, owner,
+            status=status, result=result, error=error, finished_at=datetime.utcnow(), expires_at=expires_at,
+            lease_owner=None, lease_expires_at=None,
+        )
+
+    async def mark_callback(self, job_id: UUID, delivered: bool) -> None:
+        from sqlalchemy import update
+
+        await self.session.exec(update(ChatJob).where(ChatJob.id == job_id).values(callback_delivered=delivered))
+        await self.session.commit()
+
+    async def purge_expired(self) -> int:
+        from sqlalchemy import delete
+
+        deleted = await self.session.exec(delete(ChatJob).where(ChatJob.expires_at < datetime.utcnow()))
+        await self.session.commit()
+        return deleted.rowcount
+
+    async def count_by_status(self) -> Dict[str, int]:
+        from sqlalchemy import func
+
+        statement = select(ChatJob.status, func.count()).group_by(ChatJob.status)
+        return {status: count for status, count in (await self.session.exec(statement)).all()}
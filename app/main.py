@@ -1,11 +1,26 @@
 """LLM Gateway Service - Main Application Entry Point"""
 
+import os
+import asyncio
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.infrastructure.adapters.database import create_db_and_tables
+from app.infrastructure.adapters.database import create_db_and_tables, engine, async_session_factory
 from app.infrastructure.adapters.logging import configure_logging
 from app.infrastructure.adapters.middleware import RequestLoggingMiddleware
+from app.infrastructure.adapters.access_log import access_log
+from app.infrastructure.adapters.ollama_http_adapter import create_http_client
+from app.infrastructure.adapters.backend_pool import BackendPool, create_llm_service_from_env
+from app.infrastructure.adapters.resilience import create_resilient_service_from_env
+from app.infrastructure.adapters.residency import create_residency_manager_from_env
+from app.infrastructure.adapters.model_inventory import create_model_inventory_from_env
+from app.infrastructure.adapters.routing_table import routing_table, run_sync_loop
+from app.infrastructure.adapters.project_cache import project_cache
+from app.infrastructure.adapters.log_writer import BatchingLogWriter
+from app.infrastructure.adapters.sql_repositories import SQLLatencySketchRepository
+from app.infrastructure.adapters.latency_sketches import latency_sketches, run_flush_loop
+from app.infrastructure.adapters.job_queue import create_job_runner_from_env
+from app.infrastructure.adapters.metrics import observe_request_logs, run_refresh_loop, mark_worker_dead
 
 # Configure Logging
 configure_logging()
@@ -13,8 +28,80 @@ configure_logging()
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Initialize database tables
-    create_db_and_tables()
+    await create_db_and_tables()
+    
+    # Load logical -> physical model routes in bulk and keep them in sync across workers
+    async with async_session_factory() as session:
+        await routing_table.load(session)
+    routing_sync = asyncio.create_task(
+        run_sync_loop(routing_table, async_session_factory, float(os.getenv("ROUTING_SYNC_INTERVAL", "5")))
+    )
+    # Project writes on other workers clear this worker's API key cache
+    auth_sync = asyncio.create_task(
+        run_sync_loop(
+            project_cache, async_session_factory, float(os.getenv("AUTH_CACHE_SYNC_INTERVAL", "2")), label="Auth cache"
+        )
+    )
+    
+    # Request logs are written in batches off the request path
+    app.state.log_writer = BatchingLogWriter(
+        engine,
+        batch_size=int(os.getenv("LOG_WRITER_BATCH_SIZE", "500")),
+        flush_interval_ms=int(os.getenv("LOG_WRITER_FLUSH_INTERVAL_MS", "200")),
+        max_queue_size=int(os.getenv("LOG_WRITER_MAX_QUEUE_SIZE", "10000")),
+        drop_policy=os.getenv("LOG_WRITER_DROP_POLICY", "drop_newest"),
+        observers=[latency_sketches.record_many, observe_request_logs],
+    )
+    app.state.log_writer.start()
+    access_log.start()
+    sketch_flush = asyncio.create_task(
+        run_flush_loop(latency_sketches, async_session_factory, float(os.getenv("LATENCY_SKETCH_FLUSH_INTERVAL", "10")))
+    )
+    
+    metrics_refresh = asyncio.create_task(
+        run_refresh_loop(app, float(os.getenv("METRICS_REFRESH_INTERVAL", "5")))
+    )
+    
+    # One LLM adapter (and keep-alive connection pool) per process; a pool when several hosts are configured
+    upstream = create_llm_service_from_env(create_http_client())
+    if isinstance(upstream, BackendPool):
+        await upstream.start()
+    # Keeps hot models loaded on their hosts (first warm-up runs in the background)
+    app.state.residency = create_residency_manager_from_env(upstream, async_session_factory)
+    if app.state.residency:
+        if isinstance(upstream, BackendPool):
+            upstream.residency = app.state.residency
+        app.state.residency.start()
+    # Backend model catalogue for /v1/models, refreshed off the request path
+    app.state.model_inventory = create_model_inventory_from_env(upstream)
+    if app.state.model_inventory:
+        app.state.model_inventory.start()
+    # Circuit breakers, retries, deadlines and hedging around every upstream call
+    app.state.llm_service = create_resilient_service_from_env(upstream)
+    # Workers for /v1/chat/jobs, decoupled from request lifetimes
+    app.state.job_runner = create_job_runner_from_env(async_session_factory, app.state.llm_service, app.state.log_writer)
+    if app.state.job_runner:
+        app.state.job_runner.start()
     yield
+    
+    # Drain pooled upstream connections on shutdown
+    routing_sync.cancel()
+    auth_sync.cancel()
+    sketch_flush.cancel()
+    metrics_refresh.cancel()
+    if app.state.job_runner:
+        await app.state.job_runner.close()
+    if app.state.residency:
+        await app.state.residency.aclose()
+    if app.state.model_inventory:
+        await app.state.model_inventory.aclose()
+    await app.state.llm_service.aclose()
+    await app.state.log_writer.close()
+    await access_log.close()
+    async with async_session_factory() as session:
+        await latency_sketches.flush(SQLLatencySketchRepository(session))
+    await engine.dispose()
+    mark_worker_dead()
 
 # Create FastAPI app instance
 app = FastAPI(
@@ -27,9 +114,9 @@ app = FastAPI(
 )
 
 # Add Middleware
-app.add_middleware(RequestLoggingMiddleware)
+app.add_middleware(RequestLoggingMiddleware, sink=access_log)
 
-from app.entrypoints.api import chat_router, models_router, admin_router
+from app.entrypoints.api import chat_router, models_router, admin_router, metrics_router
 
 # Configure CORS
 app.add_middleware(
@@ -44,6 +131,7 @@ app.add_middleware(
 app.include_router(chat_router.router)
 app.include_router(models_router.router)
 app.include_router(admin_router.router)
+app.include_router(metrics_router.router)
 
 
 @app.get("/")
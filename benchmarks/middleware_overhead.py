@@ -0,0 +1,110 @@
+"""
+Microbenchmark: per-request overhead of RequestLoggingMiddleware.
+
+Compares the pure ASGI middleware with an equivalent BaseHTTPMiddleware
+(same metrics and access record) and with no middleware, calling the ASGI
+app directly so no HTTP client or server cost is included.
+
+    python -m benchmarks.middleware_overhead --requests 20000
+"""
+
+import argparse
+import asyncio
+import time
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+from starlette.middleware.base import BaseHTTPMiddleware
+from app.infrastructure.adapters.access_log import AccessLogSink, AccessRecord
+from app.infrastructure.adapters.metrics import HTTP_INFLIGHT, HTTP_LATENCY, HTTP_REQUESTS
+from app.infrastructure.adapters.middleware import RequestLoggingMiddleware
+
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/v1/ping")
+    async def ping():
+        return {"status": "ok"}
+
+    @app.get("/v1/stream")
+    async def stream():
+        async def body():
+            for _ in range(8):
+                yield b"data: chunk\n\n"
+        return StreamingResponse(body(), media_type="text/event-stream")
+
+    return app
+
+
+class BaseHTTPLoggingMiddleware(BaseHTTPMiddleware):
+    """The previous implementation's shape, doing the same bookkeeping."""
+    def __init__(self, app, sink: AccessLogSink):
+        super().__init__(app)
+        self.sink = sink
+
+    async def dispatch(self, request: Request, call_next):
+        start = time.perf_counter()
+        HTTP_INFLIGHT.inc()
+        try:
+            response = await call_next(request)
+        finally:
+            HTTP_INFLIGHT.dec()
+        elapsed = time.perf_counter() - start
+        route = getattr(request.scope.get("route"), "path", "unmatched")
+        HTTP_REQUESTS.labels(route, request.method, str(response.status_code)).inc()
+        HTTP_LATENCY.labels(route, str(response.status_code)).observe(elapsed)
+        self.sink.record(AccessRecord(
+            request.method, request.url.path, route, response.status_code,
+            getattr(request.state, "project_id", None), elapsed * 1000, elapsed * 1000, 0,
+        ))
+        return response
+
+
+async def drive(app, path: str, requests: int) -> float:
+    """Returns the mean time per request in microseconds."""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "", "query_string": b"",
+        "headers": [(b"host", b"bench")], "client": ("127.0.0.1", 1), "server": ("bench", 80),
+    }
+
+    never = asyncio.Event()
+
+    def make_receive():
+        messages = [{"type": "http.request", "body": b"", "more_body": False}]
+
+        async def receive():
+            if messages:
+                return messages.pop()
+            # Streaming responses listen for a disconnect until they finish
+            await never.wait()
+        return receive
+
+    async def send(message):
+        pass
+
+    for _ in range(min(requests // 10, 1000)):  # warm up
+        await app(dict(scope), make_receive(), send)
+    start = time.perf_counter()
+    for _ in range(requests):
+        await app(dict(scope), make_receive(), send)
+    return (time.perf_counter() - start) / requests * 1e6
+
+
+async def main(requests: int) -> None:
+    variants = {
+        "none": build_app(),
+        "base_http": BaseHTTPLoggingMiddleware(build_app(), sink=AccessLogSink()),
+        "pure_asgi": RequestLoggingMiddleware(build_app(), sink=AccessLogSink()),
+    }
+    for path in ("/v1/ping", "/v1/stream"):
+        results = {name: await drive(app, path, requests) for name, app in variants.items()}
+        baseline = results["none"]
+        for name, micros in results.items():
+            print(f"{path:<12} {name:<10} {micros:8.1f} us/request  (+{micros - baseline:6.1f} us)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=20000)
+    asyncio.run(main(parser.parse_args().requests))
@@ -0,0 +1,203 @@
+"""
+Local stand-in for an Ollama backend, for load tests and benchmarks.
+
+Serves `/api/chat` (streaming NDJSON and non-streaming), `/api/tags`,
+`/api/show`, `/api/ps` and load-only `/api/generate` with a configurable time to first
+token, token rate, model load time and error injection.
+Responses carry Ollama's timing fields (`total_duration` etc.), which the
+benchmark runner uses to separate backend time from gateway overhead.
+
+    python -m benchmarks.mock_ollama --port 11435 --ttft-ms 50 --tokens-per-second 200
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+from app.core.serialization import dumps
+from app.infrastructure.adapters.ollama_http_adapter import keep_alive_seconds
+
+
+class MockConfig:
+    def __init__(
+        self,
+        ttft_ms: float = 50,
+        tokens_per_second: float = 200,
+        tokens: int = 64,
+        error_rate: float = 0.0,
+        stream_error_rate: float = 0.0,
+        models: Optional[List[str]] = None,
+        seed: Optional[int] = None,
+        load_ms: float = 0,
+        keep_alive: float = 300,
+    ):
+        self.ttft_ms = ttft_ms
+        self.tokens_per_second = tokens_per_second
+        # Response length when the request doesn't set options.num_predict
+        self.tokens = tokens
+        # Share of requests failing with HTTP 500 before any output
+        self.error_rate = error_rate
+        # Share of streams that emit an error line halfway through
+        self.stream_error_rate = stream_error_rate
+        self.models = models or ["llama3"]
+        self.random = random.Random(seed)
+        # Paid by the first request to a model that is not loaded
+        self.load_ms = load_ms
+        # Seconds a model stays loaded after its last request, unless the request sets keep_alive
+        self.keep_alive = keep_alive
+
+
+def create_app(config: MockConfig) -> Starlette:
+    # Loaded model -> wall clock time it gets unloaded
+    loaded: Dict[str, float] = {}
+    load_lock = asyncio.Lock()
+
+    async def load(model: str, keep_alive: Any) -> int:
+        """Loads `model` if needed (one load at a time) and returns the load time in ns."""
+        started = time.perf_counter()
+        async with load_lock:
+            if loaded.get(model, 0) <= time.time():
+                await asyncio.sleep(config.load_ms / 1000)
+            loaded[model] = time.time() + keep_alive_seconds(keep_alive, config.keep_alive)
+        return int((time.perf_counter() - started) * 1e9)
+
+    async def chat(request: Request):
+        payload = await request.json()
+        model = payload.get("model", config.models[0])
+        if config.random.random() < config.error_rate:
+            return JSONResponse({"error": "injected failure"}, status_code=500)
+
+        num_tokens = int((payload.get("options") or {}).get("num_predict") or config.tokens)
+        prompt_tokens = sum(len(str(m.get("content", "")).split()) for m in payload.get("messages", []))
+        load_ns = await load(model, payload.get("keep_alive"))
+        started = time.perf_counter() - load_ns / 1e9
+
+        async def emit_tokens():
+            """Yields token indexes on the configured schedule (TTFT, then a steady rate)."""
+            first_token_at = started + load_ns / 1e9 + config.ttft_ms / 1000
+            for index in range(num_tokens):
+                delay = first_token_at + index / config.tokens_per_second - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                yield index
+
+        def final_fields() -> Dict[str, Any]:
+            total_ns = int((time.perf_counter() - started) * 1e9)
+            return {
+                "done": True,
+                "done_reason": "stop",
+                "total_duration": total_ns,
+                "load_duration": load_ns,
+                "prompt_eval_count": prompt_tokens,
+                "prompt_eval_duration": int(config.ttft_ms * 1e6),
+                "eval_count": num_tokens,
+                "eval_duration": max(0, total_ns - int(config.ttft_ms * 1e6)),
+            }
+
+        if payload.get("stream", True):
+            fail_at = num_tokens // 2 if config.random.random() < config.stream_error_rate else None
+
+            async def body():
+                async for index in emit_tokens():
+                    if index == fail_at:
+                        yield dumps({"error": "injected stream failure"}) + b"\n"
+                        return
+                    yield dumps({
+                        "model": model,
+                        "created_at": _now(),
+                        "message": {"role": "assistant", "content": f"tok{index} "},
+                        "done": False,
+                    }) + b"\n"
+                yield dumps({"model": model, "created_at": _now(), "message": {"role": "assistant", "content": ""},
+                             **final_fields()}) + b"\n"
+            return StreamingResponse(body(), media_type="application/x-ndjson")
+
+        content = [f"tok{index} " async for index in emit_tokens()]
+        return JSONResponse({
+            "model": model,
+            "created_at": _now(),
+            "message": {"role": "assistant", "content": "".join(content)},
+            **final_fields(),
+        })
+
+    async def tags(request: Request):
+        return JSONResponse({"models": [{"name": name, "model": name, "size": 0} for name in config.models]})
+
+    async def show(request: Request):
+        payload = await request.json()
+        name = payload.get("model") or payload.get("name")
+        if name not in config.models:
+            return JSONResponse({"error": f"model '{name}' not found"}, status_code=404)
+        return JSONResponse({
+            "details": {"format": "gguf", "family": "llama", "parameter_size": "8.0B", "quantization_level": "Q4_0"},
+            "model_info": {"general.architecture": "llama", "llama.context_length": 8192},
+        })
+
+    async def generate(request: Request):
+        # Only the load-only form (no prompt) the gateway uses for warm-ups
+        payload = await request.json()
+        load_ns = await load(payload["model"], payload.get("keep_alive"))
+        return JSONResponse({
+            "model": payload["model"], "created_at": _now(), "response": "",
+            "done": True, "done_reason": "load", "load_duration": load_ns,
+        })
+
+    async def ps(request: Request):
+        now = time.time()
+        return JSONResponse({"models": [
+            {
+                "name": name, "model": name, "size": 0, "size_vram": 0,
+                "expires_at": datetime.fromtimestamp(expires_at, timezone.utc).isoformat(),
+            }
+            for name, expires_at in loaded.items() if expires_at > now
+        ]})
+
+    return Starlette(routes=[
+        Route("/api/chat", chat, methods=["POST"]),
+        Route("/api/generate", generate, methods=["POST"]),
+        Route("/api/tags", tags),
+        Route("/api/show", show, methods=["POST"]),
+        Route("/api/ps", ps),
+    ])
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Mock Ollama backend")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--ttft-ms", type=float, default=50)
+    parser.add_argument("--tokens-per-second", type=float, default=200)
+    parser.add_argument("--tokens", type=int, default=64)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--stream-error-rate", type=float, default=0.0)
+    parser.add_argument("--models", default="llama3", help="Comma-separated model names")
+    parser.add_argument("--load-ms", type=float, default=0, help="Cold model load time")
+    parser.add_argument("--keep-alive", type=float, default=300, help="Seconds an idle model stays loaded")
+    args = parser.parse_args()
+
+    import uvicorn
+    config = MockConfig(
+        ttft_ms=args.ttft_ms,
+        tokens_per_second=args.tokens_per_second,
+        tokens=args.tokens,
+        error_rate=args.error_rate,
+        stream_error_rate=args.stream_error_rate,
+        models=args.models.split(","),
+        load_ms=args.load_ms,
+        keep_alive=args.keep_alive,
+    )
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
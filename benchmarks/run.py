@@ -0,0 +1,326 @@
+"""
+Load-test scenarios against a gateway backed by the mock Ollama server.
+
+Starts benchmarks.mock_ollama and the gateway (uvicorn) as subprocesses on
+a throwaway SQLite database, seeds tenants, runs the selected scenarios and
+writes one JSON result file. Gateway overhead is each request's end-to-end
+latency minus the backend's reported `total_duration`.
+
+    python -m benchmarks.run                                  # all scenarios
+    python -m benchmarks.run --scenarios small_chats --scale 0.2
+    python -m benchmarks.run --baseline benchmarks/results/previous.json
+
+With --baseline, exits with status 1 if throughput dropped or p99 overhead
+grew by more than --tolerance compared with the baseline file.
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import asyncio
+import argparse
+import platform
+import secrets
+import subprocess
+import tempfile
+from datetime import datetime, timezone
+from typing import Any, Dict, List, NamedTuple, Optional
+import httpx
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+MODEL = "llama3"
+
+# Gateway settings that would otherwise make the gateway's own limits the bottleneck
+GATEWAY_ENV = {
+    "SCHEDULER_DEFAULT_MAX_INFLIGHT": "4096",
+    "SCHEDULER_MAX_QUEUE_DEPTH": "10000",
+    "OLLAMA_HTTP2": "false",
+    "OLLAMA_MAX_CONNECTIONS": "2000",
+    "OLLAMA_MAX_KEEPALIVE_CONNECTIONS": "500",
+    "SSE_HEARTBEAT_INTERVAL": "0",
+}
+
+
+class Scenario(NamedTuple):
+    name: str
+    description: str
+    stream: bool
+    requests: int
+    concurrency: int
+    tenants: int
+    max_tokens: int
+    invalid_key_ratio: float = 0.0
+
+
+SCENARIOS = {
+    scenario.name: scenario for scenario in [
+        Scenario("small_chats", "Many short non-streaming chats from one tenant", False, 2000, 64, 1, 8),
+        Scenario("long_streams", "Concurrent long SSE streams", True, 128, 64, 4, 512),
+        Scenario("multi_tenant_burst", "All tenants fire at once", False, 2000, 256, 100, 16),
+        Scenario(
+            "auth_heavy", "Every request uses a different key, 20% of them invalid", False, 2000, 64, 1000, 1,
+            invalid_key_ratio=0.2,
+        ),
+    ]
+}
+
+
+class Sample(NamedTuple):
+    status: int
+    latency_ms: float
+    ttfb_ms: float
+    backend_ms: Optional[float]
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 3)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def rss_bytes(pid: int) -> Optional[int]:
+    """Resident memory of a process and its children (Linux /proc only)."""
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            rss = next(int(line.split()[1]) * 1024 for line in status if line.startswith("VmRSS:"))
+        with open(f"/proc/{pid}/task/{pid}/children") as children:
+            return rss + sum(rss_bytes(int(child)) or 0 for child in children.read().split())
+    except (OSError, StopIteration):
+        return None
+
+
+async def wait_until_up(url: str, timeout: float = 30) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                await client.get(url)
+                return
+            except httpx.TransportError:
+                await asyncio.sleep(0.2)
+    raise RuntimeError(f"{url} did not come up within {timeout}s")
+
+
+async def seed_tenants(count: int) -> List[str]:
+    """Creates `count` projects with effectively unlimited rate limits; returns their API keys."""
+    from app.infrastructure.adapters.database import async_session_factory, create_db_and_tables
+    from app.core.domain.project import Project
+
+    await create_db_and_tables()
+    keys = [secrets.token_urlsafe(24) for _ in range(count)]
+    async with async_session_factory() as session:
+        session.add_all([
+            Project(name=f"bench-{index}", api_key=key, rate_limit_per_minute=10 ** 9, allowed_models=[MODEL])
+            for index, key in enumerate(keys)
+        ])
+        await session.commit()
+    return keys
+
+
+async def one_request(client: httpx.AsyncClient, scenario: Scenario, key: str, index: int) -> Sample:
+    body = {
+        "model": MODEL,
+        # Unique content so identical-request coalescing doesn't skip the backend
+        "messages": [{"role": "user", "content": f"benchmark request {index}"}],
+        "max_tokens": scenario.max_tokens,
+    }
+    headers = {"X-API-Key": key}
+    started = time.perf_counter()
+    ttfb = None
+    backend_ms = None
+    try:
+        if scenario.stream:
+            async with client.stream("POST", "/v1/chat/stream", json=body, headers=headers) as response:
+                async for line in response.aiter_lines():
+                    if ttfb is None:
+                        ttfb = time.perf_counter()
+                    if '"total_duration"' in line:
+                        backend_ms = json.loads(line[len("data: "):])["total_duration"] / 1e6
+            status = response.status_code
+        else:
+            response = await client.post("/v1/chat", json=body, headers=headers)
+            ttfb = time.perf_counter()
+            status = response.status_code
+            if status == 200:
+                backend_ms = response.json().get("total_duration", 0) / 1e6
+    except httpx.HTTPError:
+        status = 0
+    finished = time.perf_counter()
+    return Sample(status, (finished - started) * 1000, ((ttfb or finished) - started) * 1000, backend_ms)
+
+
+async def run_scenario(scenario: Scenario, base_url: str, keys: List[str], gateway_pid: int) -> Dict[str, Any]:
+    limits = httpx.Limits(max_connections=scenario.concurrency, max_keepalive_connections=scenario.concurrency)
+    timeout = httpx.Timeout(120.0)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=timeout) as client:
+        semaphore = asyncio.Semaphore(scenario.concurrency)
+        tenant_keys = keys[:scenario.tenants]
+        rss_before = rss_bytes(gateway_pid)
+        rss_peak = rss_before or 0
+        sampling = True
+
+        async def sample_memory():
+            nonlocal rss_peak
+            while sampling:
+                rss_peak = max(rss_peak, rss_bytes(gateway_pid) or 0)
+                await asyncio.sleep(0.05)
+
+        async def bounded(index: int) -> Sample:
+            async with semaphore:
+                if scenario.invalid_key_ratio and index % round(1 / scenario.invalid_key_ratio) == 0:
+                    key = "invalid-" + secrets.token_hex(8)
+                else:
+                    key = tenant_keys[index % len(tenant_keys)]
+                return await one_request(client, scenario, key, index)
+
+        sampler = asyncio.create_task(sample_memory())
+        started = time.perf_counter()
+        samples = await asyncio.gather(*(bounded(index) for index in range(scenario.requests)))
+        duration = time.perf_counter() - started
+        sampling = False
+        await sampler
+
+    ok = [sample for sample in samples if 200 <= sample.status < 300]
+    statuses: Dict[str, int] = {}
+    for sample in samples:
+        statuses[str(sample.status)] = statuses.get(str(sample.status), 0) + 1
+    overhead = [sample.latency_ms - sample.backend_ms for sample in ok if sample.backend_ms is not None]
+    return {
+        "name": scenario.name,
+        "description": scenario.description,
+        "config": scenario._asdict(),
+        "duration_s": round(duration, 3),
+        "throughput_rps": round(len(samples) / duration, 2),
+        "status_counts": statuses,
+        "latency_ms": {"p50": percentile([s.latency_ms for s in samples], 0.5),
+                       "p99": percentile([s.latency_ms for s in samples], 0.99)},
+        "ttfb_ms": {"p50": percentile([s.ttfb_ms for s in ok], 0.5), "p99": percentile([s.ttfb_ms for s in ok], 0.99)},
+        "overhead_ms": {"p50": percentile(overhead, 0.5), "p99": percentile(overhead, 0.99)},
+        "memory_per_connection_bytes": (
+            int((rss_peak - rss_before) / scenario.concurrency) if rss_before is not None else None
+        ),
+    }
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Lists regressions beyond `tolerance` (relative) against a previous result file."""
+    previous = {scenario["name"]: scenario for scenario in baseline["scenarios"]}
+    regressions = []
+    for scenario in results["scenarios"]:
+        before = previous.get(scenario["name"])
+        if not before:
+            continue
+        if scenario["throughput_rps"] < before["throughput_rps"] * (1 - tolerance):
+            regressions.append(
+                f"{scenario['name']}: throughput {before['throughput_rps']} -> {scenario['throughput_rps']} rps"
+            )
+        old_p99, new_p99 = before["overhead_ms"]["p99"], scenario["overhead_ms"]["p99"]
+        # 1 ms of slack keeps sub-millisecond noise from failing the comparison
+        if old_p99 is not None and new_p99 is not None and new_p99 > old_p99 * (1 + tolerance) + 1:
+            regressions.append(f"{scenario['name']}: p99 overhead {old_p99} -> {new_p99} ms")
+    return regressions
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def main(args: argparse.Namespace) -> int:
+    scenarios = [SCENARIOS[name] for name in args.scenarios.split(",")]
+    scenarios = [
+        scenario._replace(requests=max(scenario.concurrency, int(scenario.requests * args.scale)))
+        for scenario in scenarios
+    ]
+    workdir = tempfile.mkdtemp(prefix="gateway-bench-")
+    mock_port, gateway_port = free_port(), free_port()
+    env = {
+        **os.environ,
+        **GATEWAY_ENV,
+        "DATABASE_URL": f"sqlite:///{workdir}/bench.db",
+        "OLLAMA_BASE_URL": f"http://127.0.0.1:{mock_port}",
+    }
+    # Seeding imports the app's database module, which reads DATABASE_URL on import
+    os.environ["DATABASE_URL"] = env["DATABASE_URL"]
+    keys = await seed_tenants(max(scenario.tenants for scenario in scenarios))
+
+    mock = subprocess.Popen([
+        sys.executable, "-m", "benchmarks.mock_ollama", "--port", str(mock_port),
+        "--ttft-ms", str(args.ttft_ms), "--tokens-per-second", str(args.tokens_per_second),
+        "--error-rate", str(args.error_rate),
+    ])
+    gateway = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(gateway_port),
+         "--workers", str(args.workers), "--log-level", "warning"],
+        env=env, stdout=subprocess.DEVNULL,
+    )
+    try:
+        base_url = f"http://127.0.0.1:{gateway_port}"
+        await wait_until_up(f"http://127.0.0.1:{mock_port}/api/tags")
+        await wait_until_up(f"{base_url}/v1/health")
+        results = {
+            "revision": git_revision(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "settings": {
+                "workers": args.workers, "ttft_ms": args.ttft_ms,
+                "tokens_per_second": args.tokens_per_second, "error_rate": args.error_rate,
+                "scale": args.scale, "gateway_env": GATEWAY_ENV,
+            },
+            "scenarios": [],
+        }
+        for scenario in scenarios:
+            result = await run_scenario(scenario, base_url, keys, gateway.pid)
+            results["scenarios"].append(result)
+            print(
+                f"{scenario.name:<20} {result['throughput_rps']:>9} rps  "
+                f"overhead p50={result['overhead_ms']['p50']}ms p99={result['overhead_ms']['p99']}ms  "
+                f"statuses={result['status_counts']}"
+            )
+    finally:
+        gateway.terminate()
+        mock.terminate()
+        gateway.wait()
+        mock.wait()
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{results['revision'] or 'local'}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as fh:
+        json.dump(results, fh, indent=2)
+    print(f"Results written to {output}")
+
+    if args.baseline:
+        with open(args.baseline) as fh:
+            regressions = compare(results, json.load(fh), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gateway load-test scenarios")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="Comma-separated scenario names")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiplier for each scenario's request count")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--ttft-ms", type=float, default=50)
+    parser.add_argument("--tokens-per-second", type=float, default=500)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--output", help="Result file (default: benchmarks/results/<time>-<revision>.json)")
+    parser.add_argument("--baseline", help="Previous result file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.15)
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -1,23 +1,23 @@
-from app.infrastructure.adapters.database import engine, create_db_and_tables
+import asyncio
+from app.infrastructure.adapters.database import async_session_factory, create_db_and_tables
 from app.infrastructure.adapters.sql_repositories import SQLProjectRepository, SQLModelExposureRepository
 from app.core.domain.project import Project
 from app.core.domain.model_exposure import ModelExposure
-from sqlmodel import Session
 import secrets
 
-def seed_data():
+async def seed_data():
     """
     Seeds initial data: one project and one model exposure.
     """
-    create_db_and_tables()
+    await create_db_and_tables()
     
-    with Session(engine) as session:
+    async with async_session_factory() as session:
         project_repo = SQLProjectRepository(session)
         exposure_repo = SQLModelExposureRepository(session)
         
         # Check if we already have projects
         from sqlmodel import select
-        existing = session.exec(select(Project)).first()
+        existing = (await session.exec(select(Project))).first()
         if existing:
             print(f"Database already seeded. Project API Key: {existing.api_key}")
             return
@@ -30,7 +30,7 @@ def seed_data():
             api_key=api_key,
             allowed_models=["llama3"]
         )
-        project_repo.save(project)
+        await project_repo.save(project)
         
         # Create a default model mapping
         exposure = ModelExposure(
@@ -39,7 +39,7 @@ def seed_data():
             backend_model="llama3",
             config={"temperature": 0.2}
         )
-        exposure_repo.save(exposure)
+        await exposure_repo.save(exposure)
         
         print("Database seeded successfully!")
         print(f"Project ID: {project.id}")
@@ -47,4 +47,4 @@ def seed_data():
         print(f"Mapped Model: 'law-assistant' -> 'llama3'")
 
 if __name__ == "__main__":
-    seed_data()
+    asyncio.run(seed_data())
@@ -1,35 +1,134 @@
 import pytest
+import pytest_asyncio
 import os
-from sqlmodel import SQLModel, create_engine, Session, StaticPool
-from fastapi.testclient import TestClient
+import json
+from typing import List, Optional
+from unittest.mock import MagicMock, AsyncMock
+import httpx
+from httpx import AsyncClient, ASGITransport
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import SQLModel, StaticPool
+from sqlmodel.ext.asyncio.session import AsyncSession
+from benchmarks.mock_ollama import MockConfig, create_app
 from app.main import app
 from app.infrastructure.adapters.database import get_session
+from app.entrypoints.api.dependencies import get_llm_service, get_log_sink
+from app.infrastructure.adapters.project_cache import project_cache
+from app.infrastructure.adapters.routing_table import routing_table
+from app.infrastructure.adapters.rate_limiter import rate_limiter
+from app.infrastructure.adapters.response_cache import response_cache
 from app.core.domain.project import Project
+from app.core.domain.request_log import RequestLog
+from app.infrastructure.adapters.ollama_http_adapter import OllamaHTTPAdapter
+
+class RecordingLogSink:
+    """Collects request logs in memory so tests can assert on them."""
+    def __init__(self):
+        self.logs: List[RequestLog] = []
+
+    def save(self, log: RequestLog) -> RequestLog:
+        self.logs.append(log)
+        return log
+
+    def save_many(self, logs: List[RequestLog]) -> None:
+        self.logs.extend(logs)
+
+class FakeClock:
+    """Manually advanced stand-in for the `clock` callables adapters accept."""
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+def mock_ollama_host(url: str, models: Optional[List[str]] = None, ttft_ms: float = 0, tokens: int = 3, **config) -> OllamaHTTPAdapter:
+    """Adapter talking to an in-process mock Ollama (benchmarks/mock_ollama.py) through ASGI."""
+    mock = create_app(MockConfig(ttft_ms=ttft_ms, tokens_per_second=10000, tokens=tokens, models=models, **config))
+    return OllamaHTTPAdapter(base_url=url, client=httpx.AsyncClient(transport=httpx.ASGITransport(app=mock)))
+
+def unreachable_host(url: str) -> OllamaHTTPAdapter:
+    """Adapter whose every request fails with a connection error."""
+    def refuse(request):
+        raise httpx.ConnectError("connection refused", request=request)
+    return OllamaHTTPAdapter(base_url=url, client=httpx.AsyncClient(transport=httpx.MockTransport(refuse)))
+
+@pytest.fixture(autouse=True)
+def clear_process_caches():
+    # Auth cache, routing table, rate limit buckets and response cache are process-wide;
+    # keep tests isolated from each other
+    project_cache.clear()
+    routing_table.clear()
+    rate_limiter.store.clear()
+    response_cache.clear()
+    yield
+    project_cache.clear()
+    routing_table.clear()
+    rate_limiter.store.clear()
+    response_cache.clear()
 
 # Use in-memory SQLite for testing
-@pytest.fixture(name="session")
-def session_fixture():
-    engine = create_engine(
-        "sqlite://",
+@pytest_asyncio.fixture(name="engine")
+async def engine_fixture():
+    engine = create_async_engine(
+        "sqlite+aiosqlite://",
         connect_args={"check_same_thread": False},
         poolclass=StaticPool,
     )
-    SQLModel.metadata.create_all(engine)
-    with Session(engine) as session:
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    yield engine
+    await engine.dispose()
+
+@pytest_asyncio.fixture(name="session")
+async def session_fixture(engine):
+    async with AsyncSession(engine, expire_on_commit=False) as session:
         yield session
 
-@pytest.fixture(name="client")
-def client_fixture(session: Session):
-    def get_session_override():
+@pytest.fixture(name="mock_llm")
+def mock_llm_fixture():
+    # Stand-in for the lifespan-managed LLM adapter (no real network calls)
+    mock_llm = MagicMock()
+    mock_llm.achat = AsyncMock(return_value={})
+    mock_llm.alist_models = AsyncMock(return_value=[])
+
+    async def astream_chat_raw(**kwargs):
+        # Tests script decoded chunks through `astream_chat`
+        async for chunk in mock_llm.astream_chat(**kwargs):
+            yield json.dumps(chunk).encode("utf-8")
+
+    mock_llm.astream_chat_raw = astream_chat_raw
+    return mock_llm
+
+@pytest.fixture(name="clock")
+def clock_fixture():
+    return FakeClock()
+
+@pytest.fixture(name="mock_host")
+def mock_host_fixture():
+    return mock_ollama_host
+
+@pytest.fixture(name="down_host")
+def down_host_fixture():
+    return unreachable_host
+
+@pytest.fixture(name="log_sink")
+def log_sink_fixture():
+    return RecordingLogSink()
+
+@pytest_asyncio.fixture(name="client")
+async def client_fixture(session: AsyncSession, mock_llm: MagicMock, log_sink: RecordingLogSink):
+    async def get_session_override():
         return session
-    
+
     app.dependency_overrides[get_session] = get_session_override
-    client = TestClient(app)
-    yield client
+    app.dependency_overrides[get_llm_service] = lambda: mock_llm
+    app.dependency_overrides[get_log_sink] = lambda: log_sink
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        yield client
     app.dependency_overrides.clear()
 
-@pytest.fixture(name="mock_project")
-def mock_project_fixture(session: Session):
+@pytest_asyncio.fixture(name="mock_project")
+async def mock_project_fixture(session: AsyncSession):
     project = Project(
         name="Test Project",
         api_key="test-api-key",
@@ -37,6 +136,6 @@ def mock_project_fixture(session: Session):
         allowed_models=["llama3"]
     )
     session.add(project)
-    session.commit()
-    session.refresh(project)
+    await session.commit()
+    await session.refresh(project)
     return project
@@ -1,54 +1,251 @@
 import pytest
-from fastapi.testclient import TestClient
-from unittest.mock import patch
+from httpx import AsyncClient
+from unittest.mock import MagicMock, AsyncMock, patch
 from app.core.domain.project import Project
 
-def test_health_check(client: TestClient):
-    response = client.get("/v1/health")
+@pytest.mark.asyncio
+async def test_health_check(client: AsyncClient):
+    response = await client.get("/v1/health")
     assert response.status_code == 200
     assert response.json()["status"] == "healthy"
 
-def test_chat_endpoint_requires_auth(client: TestClient):
-    response = client.post("/v1/chat", json={"model": "test", "messages": []})
+@pytest.mark.asyncio
+async def test_chat_endpoint_requires_auth(client: AsyncClient):
+    response = await client.post("/v1/chat", json={"model": "test", "messages": []})
     assert response.status_code == 401
     assert "Missing API Key" in response.json()["detail"]
 
-def test_chat_endpoint_valid_auth(client: TestClient, mock_project: Project):
-    # Mock the LLM adapter to avoid real network calls
-    with patch("app.entrypoints.api.chat_router.OllamaFreeAPIAdapter") as mock_adapter_class:
-        mock_adapter = mock_adapter_class.return_value
-        mock_adapter.chat.return_value = {"choices": [{"message": {"content": "response"}}]}
-        
-        response = client.post(
-            "/v1/chat",
-            json={"model": "llama3", "messages": [{"role": "user", "content": "hi"}]},
-            headers={"X-API-Key": mock_project.api_key}
-        )
-        
-        assert response.status_code == 200
-        assert response.json()["choices"][0]["message"]["content"] == "response"
-
-def test_stream_chat_valid_auth(client: TestClient, mock_project: Project):
-    # Mock the LLM adapter to avoid real network calls
-    with patch("app.entrypoints.api.chat_router.OllamaFreeAPIAdapter") as mock_adapter_class:
-        mock_adapter = mock_adapter_class.return_value
-        # Mocking a generator for the stream
-        def mock_stream(**kwargs):
-            yield {"message": {"content": "Hello"}}
-            yield {"message": {"content": " friend"}}
-            
-        mock_adapter.stream_chat.side_effect = mock_stream
-        
-        response = client.post(
-            "/v1/chat/stream",
-            json={"model": "llama3", "messages": [{"role": "user", "content": "hi"}]},
-            headers={"X-API-Key": mock_project.api_key}
-        )
-        
-        assert response.status_code == 200
-        assert response.headers["content-type"] == "text/event-stream; charset=utf-8"
-        
-        content = response.content.decode("utf-8")
-        assert 'data: {"message": {"content": "Hello"}}' in content
-        assert 'data: {"message": {"content": " friend"}}' in content
-        assert 'data: [DONE]' in content
+@pytest.mark.asyncio
+async def test_chat_endpoint_valid_auth(client: AsyncClient, mock_project: Project, mock_llm: MagicMock, log_sink):
+    # The LLM adapter is overridden in conftest to avoid real network calls
+    mock_llm.achat = AsyncMock(return_value={"choices": [{"message": {"content": "response"}}]})
+
+    response = await client.post(
+        "/v1/chat",
+        json={"model": "llama3", "messages": [{"role": "user", "content": "hi"}]},
+        headers={"X-API-Key": mock_project.api_key}
+    )
+
+    assert response.status_code == 200
+    assert response.json()["choices"][0]["message"]["content"] == "response"
+    assert [log.status for log in log_sink.logs] == [200]
+
+@pytest.mark.asyncio
+async def test_stream_chat_valid_auth(client: AsyncClient, mock_project: Project, mock_llm: MagicMock):
+    # Mocking a generator for the stream
+    async def mock_stream(**kwargs):
+        yield {"message": {"content": "Hello"}}
+        yield {"message": {"content": " friend"}}
+
+    mock_llm.astream_chat.side_effect = mock_stream
+
+    response = await client.post(
+        "/v1/chat/stream",
+        json={"model": "llama3", "messages": [{"role": "user", "content": "hi"}]},
+        headers={"X-API-Key": mock_project.api_key}
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "text/event-stream; charset=utf-8"
+
+    content = response.content.decode("utf-8")
+    assert 'data: {"message": {"content": "Hello"}}' in content
+    assert 'data: {"message": {"content": " friend"}}' in content
+    assert 'data: [DONE]' in content
+
+    from app.infrastructure.adapters.access_log import access_log
+    entry = access_log._buffer[-1]
+    assert (entry.route, entry.status, entry.project_id) == ("/v1/chat/stream", 200, mock_project.id)
+    assert entry.bytes_sent == len(response.content)
+
+@pytest.mark.asyncio
+async def test_lifespan_creates_and_closes_shared_llm_service(engine):
+    from app.main import app
+    from app.infrastructure.adapters.ollama_http_adapter import OllamaHTTPAdapter
+    from sqlmodel.ext.asyncio.session import AsyncSession
+
+    # Run the lifespan against the in-memory test database
+    with patch("app.main.create_db_and_tables", AsyncMock()), \
+         patch("app.main.engine", engine), \
+         patch("app.main.async_session_factory", lambda: AsyncSession(engine)):
+        async with app.router.lifespan_context(app):
+            llm_service = app.state.llm_service.inner
+            assert isinstance(llm_service, OllamaHTTPAdapter)
+            assert not llm_service.client.is_closed
+
+    assert llm_service.client.is_closed
+
+@pytest.mark.asyncio
+async def test_toggle_project_invalidates_auth_cache(client: AsyncClient, mock_project: Project):
+    headers = {"X-API-Key": mock_project.api_key}
+    assert (await client.get("/v1/models", headers=headers)).status_code == 200
+
+    response = await client.patch(
+        f"/admin/projects/{mock_project.id}/toggle",
+        headers={"X-Admin-Key": "admin-secret-key"}
+    )
+    assert response.status_code == 200
+
+    response = await client.get("/v1/models", headers=headers)
+    assert response.status_code == 403
+
+@pytest.mark.asyncio
+async def test_project_rate_limit_returns_429_with_headers(client: AsyncClient, session, mock_project: Project):
+    mock_project.rate_limit_per_minute = 1
+    session.add(mock_project)
+    await session.commit()
+    headers = {"X-API-Key": mock_project.api_key}
+
+    first = await client.get("/v1/models", headers=headers)
+    assert first.status_code == 200
+    assert first.headers["X-RateLimit-Limit"] == "1"
+    assert first.headers["X-RateLimit-Remaining"] == "0"
+
+    second = await client.get("/v1/models", headers=headers)
+    assert second.status_code == 429
+    assert int(second.headers["Retry-After"]) >= 1
+
+@pytest.mark.asyncio
+async def test_chat_response_cache_hit_is_logged_as_cached(client: AsyncClient, mock_project: Project, mock_llm: MagicMock, log_sink):
+    mock_llm.achat = AsyncMock(return_value={"message": {"content": "deterministic"}})
+    payload = {"model": "llama3", "messages": [{"role": "user", "content": "hi"}], "temperature": 0, "cache": True}
+    headers = {"X-API-Key": mock_project.api_key}
+
+    first = await client.post("/v1/chat", json=payload, headers=headers)
+    second = await client.post("/v1/chat", json=payload, headers=headers)
+
+    assert first.headers["X-Cache"] == "MISS"
+    assert second.headers["X-Cache"] == "HIT"
+    assert second.json() == first.json()
+    mock_llm.achat.assert_awaited_once()
+    assert [log.cached for log in log_sink.logs] == [False, True]
+
+    uncached = await client.post("/v1/chat", json={**payload, "cache": None}, headers=headers)
+    assert "X-Cache" not in uncached.headers
+
+@pytest.mark.asyncio
+async def test_identical_concurrent_chats_share_one_upstream_call(client: AsyncClient, mock_project: Project, mock_llm: MagicMock, log_sink):
+    import asyncio
+    release = asyncio.Event()
+
+    async def slow_chat(**kwargs):
+        await release.wait()
+        return {"message": {"content": "once"}}
+
+    mock_llm.achat = AsyncMock(side_effect=slow_chat)
+    payload = {"model": "llama3", "messages": [{"role": "user", "content": "same"}]}
+    headers = {"X-API-Key": mock_project.api_key}
+
+    requests = [asyncio.create_task(client.post("/v1/chat", json=payload, headers=headers)) for _ in range(3)]
+    while mock_llm.achat.await_count == 0:
+        await asyncio.sleep(0.01)
+    await asyncio.sleep(0.05)
+    release.set()
+    responses = await asyncio.gather(*requests)
+
+    assert [r.status_code for r in responses] == [200, 200, 200]
+    assert mock_llm.achat.await_count == 1
+    assert sorted(log.coalesced for log in log_sink.logs) == [False, True, True]
+
+@pytest.mark.asyncio
+async def test_admin_stats_rejects_unknown_granularity(client: AsyncClient):
+    headers = {"X-Admin-Key": "admin-secret-key"}
+    assert (await client.get("/admin/stats", headers=headers)).json()["total_requests"] == 0
+    response = await client.get("/admin/stats", params={"granularity": "week"}, headers=headers)
+    assert response.status_code == 422
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_exposes_http_metrics_by_route(client: AsyncClient):
+    await client.get("/v1/health")
+    response = await client.get("/metrics")
+
+    assert response.status_code == 200
+    assert 'gateway_http_requests_total{method="GET",route="/v1/health",status="200"}' in response.text
+    assert "gateway_log_queue_depth" in response.text
+
+@pytest.mark.asyncio
+async def test_chat_deadline_errors_map_to_504(client: AsyncClient, mock_project: Project, mock_llm: MagicMock, log_sink):
+    from app.core.exceptions import DeadlineExceededError
+    mock_llm.achat = AsyncMock(side_effect=DeadlineExceededError("Request deadline exceeded"))
+    body = {"model": "llama3", "messages": [{"role": "user", "content": "hi"}]}
+    headers = {"X-API-Key": mock_project.api_key}
+
+    invalid = await client.post("/v1/chat", json=body, headers={**headers, "X-Request-Timeout": "soon"})
+    response = await client.post("/v1/chat", json=body, headers={**headers, "X-Request-Timeout": "0.5"})
+
+    assert invalid.status_code == 422
+    assert response.status_code == 504
+    assert [log.status for log in log_sink.logs] == [504]
+
+@pytest.mark.asyncio
+async def test_batch_chat_streams_ndjson_results_and_logs_in_bulk(client: AsyncClient, mock_project: Project, mock_llm: MagicMock, log_sink):
+    import json
+    from app.core.exceptions import DeadlineExceededError
+
+    async def chat(model, messages, **kwargs):
+        if messages[0]["content"] == "slow":
+            raise DeadlineExceededError("Request deadline exceeded")
+        return {"message": {"content": messages[0]["content"].upper()}}
+
+    mock_llm.achat = AsyncMock(side_effect=chat)
+    items = [{"model": "llama3", "messages": [{"role": "user", "content": text}]} for text in ("a", "slow", "b")]
+
+    response = await client.post("/v1/chat/batch", json={"items": items, "concurrency": 2}, headers={"X-API-Key": mock_project.api_key})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    records = {record["index"]: record for record in map(json.loads, response.text.splitlines())}
+    assert records[0] == {"index": 0, "status": 200, "response": {"message": {"content": "A"}}}
+    assert records[1]["status"] == 504
+    assert records[2]["response"]["message"]["content"] == "B"
+    assert sorted(log.status for log in log_sink.logs) == [200, 200, 504]
+    assert {log.endpoint for log in log_sink.logs} == {"/v1/chat/batch"}
+
+@pytest.mark.asyncio
+async def test_chat_job_submit_poll_and_fetch(client: AsyncClient, engine, mock_project: Project, mock_llm: MagicMock, log_sink):
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+    from sqlmodel.ext.asyncio.session import AsyncSession
+    from app.infrastructure.adapters.job_queue import JobRunner
+
+    mock_llm.achat = AsyncMock(return_value={"message": {"content": "later"}})
+    headers = {"X-API-Key": mock_project.api_key}
+    body = {"model": "llama3", "messages": [{"role": "user", "content": "hi"}]}
+
+    rejected = await client.post("/v1/chat/jobs", json={**body, "callback_url": "file:///etc/passwd"}, headers=headers)
+    loopback = await client.post("/v1/chat/jobs", json={**body, "callback_url": "http://127.0.0.1:8000/admin"}, headers=headers)
+    submitted = await client.post("/v1/chat/jobs", json=body, headers=headers)
+    location = submitted.headers["Location"]
+
+    assert rejected.status_code == 422 and loopback.status_code == 422
+    assert submitted.status_code == 202 and submitted.json()["status"] == "queued"
+    assert (await client.get(f"{location}/result", headers=headers)).status_code == 409
+
+    runner = JobRunner(async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False), mock_llm, log_sink)
+    assert await runner.run_once()
+
+    assert (await client.get(location, headers=headers)).json()["status"] == "succeeded"
+    assert (await client.get(f"{location}/result", headers=headers)).json() == {"message": {"content": "later"}}
+    assert (await client.get(location, headers={"X-API-Key": "wrong"})).status_code == 401
+
+@pytest.mark.asyncio
+async def test_models_list_includes_inventory_and_honours_etag(client: AsyncClient, session, mock_project: Project):
+    from app.main import app
+    from app.core.domain.model_exposure import ModelExposure
+    from app.entrypoints.api.dependencies import get_model_inventory
+    mock_project.rate_limit_per_minute = 10
+    session.add(mock_project)
+    session.add(ModelExposure(project_id=mock_project.id, logical_name="chat", backend_model="llama3"))
+    await session.commit()
+    inventory = MagicMock()
+    inventory.describe = AsyncMock(return_value={"llama3": {"available": True, "context_length": 8192, "backends": ["http://a"]}})
+    app.dependency_overrides[get_model_inventory] = lambda: inventory
+    headers = {"X-API-Key": mock_project.api_key}
+
+    first = await client.get("/v1/models", headers=headers)
+    [model] = first.json()["data"]
+    assert (model["available"], model["context_length"]) == (True, 8192)
+    assert "backends" not in model
+
+    second = await client.get("/v1/models", headers={**headers, "If-None-Match": f"W/{first.headers['ETag']}"})
+    assert second.status_code == 304 and second.headers["ETag"] == first.headers["ETag"]
+    assert "X-RateLimit-Remaining" in second.headers
@@ -0,0 +1,117 @@
+import json
+from datetime import datetime, timedelta
+import httpx
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.core.domain.chat_job import ChatJob, JOB_QUEUED, JOB_RUNNING, JOB_SUCCEEDED
+from app.core.domain.project import Project
+from app.core.exceptions import AdmissionRejectedError
+from app.infrastructure.adapters.callback_policy import CallbackPolicy
+from app.infrastructure.adapters.job_queue import JobRunner
+from app.infrastructure.adapters.sql_repositories import SQLChatJobRepository
+
+def make_runner(engine, llm, log_sink, **kwargs) -> JobRunner:
+    return JobRunner(async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False), llm, log_sink, **kwargs)
+
+def resolving_to(address: str) -> CallbackPolicy:
+    async def resolve(host: str, port: int):
+        return [address]
+    return CallbackPolicy(resolve=resolve)
+
+async def submit(session: AsyncSession, project: Project, **fields) -> ChatJob:
+    return await SQLChatJobRepository(session).create(
+        ChatJob(project_id=project.id, model="llama3", messages=[{"role": "user", "content": "hi"}], **fields)
+    )
+
+@pytest.mark.asyncio
+async def test_runner_executes_job_and_posts_callback(engine, session: AsyncSession, mock_project: Project, log_sink):
+    delivered, targets = [], []
+
+    def callback(request: httpx.Request) -> httpx.Response:
+        delivered.append(json.loads(request.content))
+        targets.append((str(request.url), request.headers["Host"]))
+        return httpx.Response(204)
+
+    llm = MagicMock()
+    llm.achat = AsyncMock(return_value={"message": {"content": "done"}})
+    runner = make_runner(
+        engine, llm, log_sink,
+        callback_client=httpx.AsyncClient(transport=httpx.MockTransport(callback)),
+        callback_policy=resolving_to("93.184.216.34"),
+    )
+    job = await submit(session, mock_project, callback_url="http://hooks/done")
+
+    assert await runner.run_once()
+    assert not await runner.run_once()
+
+    job = await SQLChatJobRepository(session).get(job.id)
+    assert (job.status, job.result, job.attempts, job.callback_delivered) == (JOB_SUCCEEDED, {"message": {"content": "done"}}, 1, True)
+    assert job.expires_at > datetime.utcnow() + timedelta(hours=23)
+    assert delivered[0]["id"] == str(job.id) and delivered[0]["result"] == job.result
+    assert [log.endpoint for log in log_sink.logs] == ["/v1/chat/jobs"]
+    # Delivered to the vetted address, not a fresh lookup of the name
+    assert targets == [("http://93.184.216.34/done", "hooks")]
+
+@pytest.mark.asyncio
+async def test_callback_to_a_private_address_is_refused(engine, session: AsyncSession, mock_project: Project, log_sink):
+    callback = MagicMock(return_value=httpx.Response(204))
+    llm = MagicMock()
+    llm.achat = AsyncMock(return_value={"message": {"content": "done"}})
+    # The name passed validation at submit time but now points at the metadata service
+    runner = make_runner(
+        engine, llm, log_sink,
+        callback_client=httpx.AsyncClient(transport=httpx.MockTransport(callback)),
+        callback_policy=resolving_to("169.254.169.254"),
+    )
+    job = await submit(session, mock_project, callback_url="http://hooks/done")
+
+    assert await runner.run_once()
+
+    job = await SQLChatJobRepository(session).get(job.id)
+    assert (job.status, job.callback_delivered) == (JOB_SUCCEEDED, False)
+    callback.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_lapsed_lease_hands_the_job_to_another_worker(engine, session: AsyncSession, mock_project: Project):
+    job = await submit(session, mock_project)
+    repo = SQLChatJobRepository(session)
+
+    first = await repo.claim("worker-a", lease_seconds=30)
+    assert first.status == JOB_RUNNING
+    assert await repo.claim("worker-b", lease_seconds=30) is None
+
+    assert await repo.extend_lease(job.id, "worker-a", lease_seconds=-1)  # Simulate the lease lapsing
+    second = await repo.claim("worker-b", lease_seconds=30)
+    assert (second.lease_owner, second.attempts) == ("worker-b", 2)
+    # The original worker can no longer record an outcome
+    assert not await repo.finish(job.id, "worker-a", JOB_SUCCEEDED, datetime.utcnow())
+
+@pytest.mark.asyncio
+async def test_backpressure_requeues_the_job_until_its_retry_hint(engine, session: AsyncSession, mock_project: Project, log_sink):
+    llm = MagicMock()
+    llm.achat = AsyncMock(side_effect=AdmissionRejectedError("Queue full", model="llama3", reason="queue_full", retry_after=30))
+    runner = make_runner(engine, llm, log_sink)
+    job = await submit(session, mock_project)
+
+    assert await runner.run_once()
+    assert not await runner.run_once()  # Not due again yet
+
+    job = await SQLChatJobRepository(session).get(job.id)
+    assert (job.status, job.attempts, job.error) == (JOB_QUEUED, 0, "Queue full")
+    assert job.available_at > datetime.utcnow() + timedelta(seconds=20)
+    assert runner.stats()["requeued"] == 1
+
+@pytest.mark.asyncio
+async def test_expired_results_are_purged(session: AsyncSession, mock_project: Project):
+    repo = SQLChatJobRepository(session)
+    expired = await submit(session, mock_project)
+    kept = await submit(session, mock_project)
+    for job, ttl in ((expired, -1), (kept, 60)):
+        await repo.claim("worker", lease_seconds=30)
+        await repo.finish(job.id, "worker", JOB_SUCCEEDED, datetime.utcnow() + timedelta(seconds=ttl))
+
+    assert await repo.purge_expired() == 1
+    assert await repo.get(expired.id) is None
+    assert await repo.count_by_status() == {JOB_SUCCEEDED: 1}
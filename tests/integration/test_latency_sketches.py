@@ -0,0 +1,45 @@
+import pytest
+from datetime import datetime, timedelta
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.core.domain.project import Project
+from app.core.domain.request_log import RequestLog
+from app.infrastructure.adapters.latency_sketches import LatencySketchRecorder
+from app.infrastructure.adapters.sql_repositories import SQLLatencySketchRepository
+
+def make_logs(project: Project, latencies):
+    now = datetime.utcnow()
+    return [
+        RequestLog(project_id=project.id, timestamp=now, model="llama3", endpoint="/v1/chat", latency_ms=latency, status=200)
+        for latency in latencies
+    ]
+
+@pytest.mark.asyncio
+async def test_percentiles_merge_sketches_from_all_workers(session: AsyncSession, mock_project: Project):
+    repo = SQLLatencySketchRepository(session)
+    worker_a = LatencySketchRecorder("worker-a")
+    worker_b = LatencySketchRecorder("worker-b")
+    worker_a.record_many(make_logs(mock_project, range(1, 51)))
+    worker_b.record_many(make_logs(mock_project, range(51, 101)))
+
+    await worker_a.flush(repo)
+    await worker_b.flush(repo)
+    # A second flush overwrites the worker's own rows instead of double counting
+    worker_a.record_many(make_logs(mock_project, [100]))
+    await worker_a.flush(repo)
+
+    percentiles = await repo.get_percentiles(granularity="minute")
+    assert percentiles["overall"]["count"] == 101
+    assert percentiles["overall"]["p50"] == pytest.approx(51, rel=0.02)
+    assert percentiles["overall"]["p99"] == pytest.approx(100, rel=0.02)
+    assert percentiles["by_key"][0]["model"] == "llama3"
+
+    window = await repo.get_percentiles(since=datetime.utcnow() + timedelta(hours=2))
+    assert window == {"overall": None, "by_key": []}
+
+def test_recorder_ignores_logs_for_forgotten_buckets():
+    recorder = LatencySketchRecorder("worker", grace=timedelta(0))
+    recorder._forget_closed_buckets(datetime.utcnow())
+    old = make_logs(Project(name="Old", api_key="old-key"), [10])[0]
+    old.timestamp -= timedelta(hours=3)
+    recorder.record_many([old])
+    assert recorder.late == 2
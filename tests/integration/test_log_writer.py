@@ -0,0 +1,37 @@
+import pytest
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.core.domain.project import Project
+from app.core.domain.request_log import RequestLog
+from app.infrastructure.adapters.log_writer import BatchingLogWriter, DROP_OLDEST
+
+def make_log(project: Project, latency_ms: int = 10) -> RequestLog:
+    return RequestLog(project_id=project.id, model="llama3", endpoint="/v1/chat", latency_ms=latency_ms, status=200)
+
+@pytest.mark.asyncio
+async def test_writer_flushes_queued_logs_in_bulk_on_close(engine, session: AsyncSession, mock_project: Project):
+    writer = BatchingLogWriter(engine, batch_size=50, flush_interval_ms=50)
+    writer.start()
+
+    for _ in range(120):
+        writer.save(make_log(mock_project))
+    writer.save_many([make_log(mock_project) for _ in range(30)])
+    await writer.close()
+
+    rows = (await session.exec(select(RequestLog))).all()
+    assert len(rows) == 150
+    assert writer.stats() == {"queued": 0, "written": 150, "dropped": 0, "failed": 0}
+
+@pytest.mark.asyncio
+async def test_writer_drop_policy_when_queue_is_full(engine, session: AsyncSession, mock_project: Project):
+    # Not started: nothing drains the queue
+    writer = BatchingLogWriter(engine, max_queue_size=2, drop_policy=DROP_OLDEST)
+
+    for latency in (1, 2, 3):
+        writer.save(make_log(mock_project, latency_ms=latency))
+
+    assert writer.dropped == 1
+    writer.start()
+    await writer.close()
+    latencies = sorted(row.latency_ms for row in (await session.exec(select(RequestLog))).all())
+    assert latencies == [2, 3]
@@ -0,0 +1,57 @@
+import asyncio
+import httpx
+import pytest
+from app.infrastructure.adapters.backend_pool import BackendPool
+from app.infrastructure.adapters.model_inventory import ModelInventoryCache
+
+@pytest.mark.asyncio
+async def test_describes_models_across_the_pool(mock_host):
+    pool = BackendPool([mock_host("http://a", ["llama3"]), mock_host("http://b", ["llama3", "phi3"])])
+    await pool.probe()
+    inventory = ModelInventoryCache(pool)
+    assert await inventory.refresh()
+
+    described = await inventory.describe(["llama3", "phi3:latest", "missing"])
+
+    assert described["llama3"]["available"] and described["llama3"]["context_length"] == 8192
+    assert described["phi3:latest"]["quantization"] == "Q4_0"
+    assert [backend["url"] for backend in described["llama3"]["backends"]] == ["http://a", "http://b"]
+    assert described["missing"] == {"available": False}
+
+@pytest.mark.asyncio
+async def test_serves_stale_catalogue_while_revalidating(mock_host, clock):
+    host = mock_host("http://a", ["llama3"])
+    inventory = ModelInventoryCache(host, ttl=30, max_stale=600, clock=clock)
+    assert await inventory.refresh()
+    host.alist_models = lambda: asyncio.sleep(0, result=[{"name": "phi3:latest", "model": "phi3:latest"}])
+
+    clock.now += 60
+    assert "llama3:latest" in await inventory.get()  # Stale copy returned at once
+    await inventory._refresh_task
+    assert list(await inventory.get()) == ["phi3:latest"]
+
+    async def unreachable():
+        raise httpx.ConnectError("down")
+
+    host.alist_models = unreachable
+    clock.now += 1000  # Past max_stale: the read waits for the refresh, which fails
+    assert list(await inventory.get()) == ["phi3:latest"]
+    assert inventory.stats()["failures"] == 1
+
+@pytest.mark.asyncio
+async def test_reads_do_not_wait_for_the_first_load(mock_host):
+    host = mock_host("http://a", ["llama3"])
+    loading = asyncio.Event()
+
+    async def slow_listing():
+        await loading.wait()
+        return [{"name": "llama3:latest", "model": "llama3:latest"}]
+
+    host.alist_models = slow_listing
+    inventory = ModelInventoryCache(host)
+
+    assert await asyncio.wait_for(inventory.get(), 1) == {}
+    assert await asyncio.wait_for(inventory.describe(["llama3"]), 1) == {}
+    loading.set()
+    await inventory._refresh_task  # The single background load started by the reads
+    assert "llama3" in await inventory.describe(["llama3"])
@@ -1,11 +1,17 @@
 import pytest
-from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 from uuid import uuid4
+from sqlalchemy import inspect
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import SQLModel
+from app.infrastructure.adapters.database import add_missing_columns
 from app.infrastructure.adapters.sql_repositories import SQLProjectRepository, SQLModelExposureRepository
 from app.core.domain.project import Project
 from app.core.domain.model_exposure import ModelExposure
+from app.infrastructure.adapters.project_cache import TTLProjectCache
 
-def test_project_repository_save_and_get(session: Session):
+@pytest.mark.asyncio
+async def test_project_repository_save_and_get(session: AsyncSession):
     repo = SQLProjectRepository(session)
     project = Project(
         name="Internal App",
@@ -13,14 +19,15 @@ def test_project_repository_save_and_get(session: Session):
         allowed_models=["gpt-4"]
     )
     
-    saved = repo.save(project)
-    retrieved = repo.get_by_id(saved.id)
-    retrieved_by_key = repo.get_by_api_key("secret-key")
+    saved = await repo.save(project)
+    retrieved = await repo.get_by_id(saved.id)
+    retrieved_by_key = await repo.get_by_api_key("secret-key")
     
     assert retrieved.name == "Internal App"
     assert retrieved_by_key.id == saved.id
 
-def test_model_exposure_repository(session: Session, mock_project: Project):
+@pytest.mark.asyncio
+async def test_model_exposure_repository(session: AsyncSession, mock_project: Project):
     repo = SQLModelExposureRepository(session)
     exposure = ModelExposure(
         project_id=mock_project.id,
@@ -29,9 +36,45 @@ def test_model_exposure_repository(session: Session, mock_project: Project):
         config={"temp": 0.5}
     )
     
-    repo.save(exposure)
-    all_exp = repo.get_by_project(mock_project.id)
-    one_exp = repo.get_by_logical_name(mock_project.id, "assistant")
+    await repo.save(exposure)
+    all_exp = await repo.get_by_project(mock_project.id)
+    one_exp = await repo.get_by_logical_name(mock_project.id, "assistant")
     
     assert len(all_exp) == 1
     assert one_exp.backend_model == "llama2"
+
+@pytest.mark.asyncio
+async def test_add_missing_columns_upgrades_tables_created_by_older_versions(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'old.db'}")
+    project_id = uuid4().hex
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+        # Recreate modelexposure as it was before the per-model limit and cache flags existed
+        await conn.exec_driver_sql("DROP TABLE modelexposure")
+        await conn.exec_driver_sql(
+            "CREATE TABLE modelexposure (id CHAR(32) PRIMARY KEY, project_id CHAR(32), logical_name VARCHAR, backend_model VARCHAR, config JSON)"
+        )
+        await conn.exec_driver_sql(
+            f"INSERT INTO modelexposure VALUES ('{uuid4().hex}', '{project_id}', 'chat', 'llama3', '{{}}')"
+        )
+        assert await conn.run_sync(add_missing_columns) == ["modelexposure.rate_limit_per_minute", "modelexposure.cache_responses"]
+        assert await conn.run_sync(add_missing_columns) == []
+        columns = await conn.run_sync(lambda sync_conn: {c["name"] for c in inspect(sync_conn).get_columns("modelexposure")})
+        row = (await conn.exec_driver_sql("SELECT rate_limit_per_minute, cache_responses FROM modelexposure")).one()
+    await engine.dispose()
+
+    assert {"rate_limit_per_minute", "cache_responses"} <= columns
+    assert tuple(row) == (None, 0)
+
+@pytest.mark.asyncio
+async def test_project_write_clears_other_workers_auth_cache(session: AsyncSession, mock_project: Project):
+    other_worker = TTLProjectCache()
+    await other_worker.sync(session)
+    other_worker.put(mock_project.api_key, mock_project)
+
+    mock_project.is_active = False
+    await SQLProjectRepository(session).save(mock_project)
+
+    assert await other_worker.sync(session) is True
+    assert other_worker.get(mock_project.api_key) == (False, None)
+    assert await other_worker.sync(session) is False
@@ -0,0 +1,52 @@
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.core.domain.model_exposure import ModelExposure
+from app.core.domain.project import Project
+from app.core.domain.request_log import RequestLog
+from app.infrastructure.adapters.backend_pool import BackendPool
+from app.infrastructure.adapters.residency import ResidencyManager
+from app.infrastructure.adapters.sql_repositories import SQLLogRepository, SQLModelExposureRepository
+
+def manager_for(engine, llm_service, **kwargs) -> ResidencyManager:
+    return ResidencyManager(llm_service, async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False), **kwargs)
+
+@pytest.mark.asyncio
+async def test_warms_exposed_and_busy_models_once(engine, session: AsyncSession, mock_project: Project, mock_host):
+    await SQLModelExposureRepository(session).save(ModelExposure(project_id=mock_project.id, logical_name="chat", backend_model="llama3"))
+    await SQLLogRepository(session).save_many([
+        RequestLog(project_id=mock_project.id, model="mistral", endpoint="/v1/chat", latency_ms=10, status=200)
+        for _ in range(3)
+    ])
+    host = mock_host("http://a", ["llama3:latest", "mistral:latest", "phi3:latest"], load_ms=20)
+    manager = manager_for(engine, host, max_models_per_host=2)
+
+    await manager.run_cycle()
+    await manager.run_cycle()
+
+    stats = manager.stats()
+    assert stats["hot_models"] == ["mistral:latest", "llama3:latest"]
+    [host_stats] = stats["hosts"]
+    assert sorted(host_stats["resident"]) == ["llama3:latest", "mistral:latest"]
+    assert host_stats["warmups"] == 2  # The second cycle found both still loaded
+    assert host_stats["load_ms"]["mistral:latest"] >= 20
+    assert manager.is_resident("http://a", "llama3")
+
+@pytest.mark.asyncio
+async def test_pool_prefers_hosts_with_the_model_loaded(engine, mock_host):
+    pool = BackendPool([mock_host("http://a", ["llama3"]), mock_host("http://b", ["llama3"])], replicas_per_model=2)
+    await pool.probe()
+    manager = manager_for(engine, pool)
+    pool.residency = manager
+    cold, warm = pool.rank("llama3")  # Without residency data the order is by load
+    cold.outstanding = 5
+
+    await pool.achat("llama3", [{"role": "user", "content": "hi"}])  # Loads the model on `warm`
+    assert pool.pick("llama3") is warm
+    await manager.refresh()
+    assert manager.is_resident(warm.url, "llama3") and not manager.is_resident(cold.url, "llama3")
+
+    cold.outstanding = 0
+    assert pool.pick("llama3") is warm  # Loaded beats less loaded
+    manager.observe(cold.url, "llama3", {"load_duration": 2_000_000_000})
+    assert manager.hosts[cold.url].cold_starts == 1
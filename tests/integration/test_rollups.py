@@ -0,0 +1,83 @@
+import pytest
+from datetime import datetime
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import select, SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.core.domain.project import Project
+from app.core.domain.request_log import RequestLog
+from app.core.domain.request_rollup import RequestRollup
+from app.infrastructure.adapters.database import migrate_schema
+from app.infrastructure.adapters.sql_repositories import SQLLogRepository, backfill_request_rollups
+
+def make_log(project: Project, minute: int, latency_ms: int, model: str = "llama3", status: int = 200) -> RequestLog:
+    return RequestLog(
+        project_id=project.id,
+        timestamp=datetime(2024, 5, 1, 10, minute, 30),
+        model=model,
+        endpoint="/v1/chat",
+        latency_ms=latency_ms,
+        status=status,
+        tokens_output=10,
+    )
+
+@pytest.mark.asyncio
+async def test_save_many_accumulates_rollups_across_batches(session: AsyncSession, mock_project: Project):
+    repo = SQLLogRepository(session)
+    await repo.save_many([make_log(mock_project, 1, 40), make_log(mock_project, 1, 300)])
+    await repo.save_many([make_log(mock_project, 1, 60), make_log(mock_project, 2, 100, model="mistral", status=500)])
+
+    rollup = (await session.exec(select(RequestRollup).where(
+        RequestRollup.granularity == "minute",
+        RequestRollup.model == "llama3",
+    ))).one()
+    assert (rollup.count, rollup.latency_sum_ms, rollup.tokens_output_sum) == (3, 400, 30)
+    assert (rollup.latency_le_50, rollup.latency_le_100, rollup.latency_le_500) == (1, 1, 1)
+
+@pytest.mark.asyncio
+async def test_global_stats_read_from_rollups(session: AsyncSession, mock_project: Project):
+    repo = SQLLogRepository(session)
+    await repo.save_many([
+        make_log(mock_project, 1, 100),
+        make_log(mock_project, 1, 200),
+        make_log(mock_project, 5, 600, model="mistral", status=500),
+    ])
+
+    stats = await repo.get_global_stats()
+    assert stats["total_requests"] == 3
+    assert stats["avg_latency_ms"] == 300.0
+    assert stats["top_models"][0] == {"name": "llama3", "count": 2}
+    assert stats["top_projects"] == [{"id": str(mock_project.id), "count": 3}]
+    assert stats["status_counts"] == {"200": 2, "500": 1}
+
+    minutes = await repo.get_global_stats(since=datetime(2024, 5, 1, 10, 2), granularity="minute")
+    assert minutes["total_requests"] == 1
+    assert [point["count"] for point in minutes["series"]] == [1]
+
+@pytest.mark.asyncio
+async def test_schema_upgrade_backfills_rollups_from_existing_logs(tmp_path, mock_project: Project):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'old.db'}")
+    logs = [make_log(mock_project, minute, 100 * minute) for minute in range(1, 8)]
+    async with engine.begin() as conn:
+        # A database from before rollups existed, with request logs already in it
+        await conn.run_sync(SQLModel.metadata.create_all)
+        await conn.run_sync(lambda sync_conn: RequestRollup.__table__.drop(sync_conn))
+        await conn.execute(insert(RequestLog), [log.model_dump() for log in logs])
+        assert await conn.run_sync(migrate_schema) == ["backfilled rollups from 7 request logs"]
+        assert await conn.run_sync(migrate_schema) == []  # Only when the rollup table is new
+
+    async with AsyncSession(engine) as session:
+        stats = await SQLLogRepository(session).get_global_stats()
+    await engine.dispose()
+    assert stats["total_requests"] == 7
+    assert stats["avg_latency_ms"] == 400.0
+
+@pytest.mark.asyncio
+async def test_backfill_pages_through_logs_sharing_a_timestamp(engine, session: AsyncSession, mock_project: Project):
+    await session.exec(insert(RequestLog), params=[make_log(mock_project, 1, 10).model_dump() for _ in range(5)])
+    await session.commit()
+
+    async with engine.begin() as conn:
+        assert await conn.run_sync(lambda sync_conn: backfill_request_rollups(sync_conn, chunk_size=2)) == 5
+
+    assert (await SQLLogRepository(session).get_global_stats())["total_requests"] == 5
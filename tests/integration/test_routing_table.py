@@ -0,0 +1,60 @@
+import pytest
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.core.domain.project import Project
+from app.core.domain.model_exposure import ModelExposure
+from app.core.domain.routing_version import RoutingVersion
+from app.infrastructure.adapters.routing_table import ModelRoutingTable, CachedModelExposureRepository, routing_table
+from app.infrastructure.adapters.sql_repositories import SQLModelExposureRepository
+
+@pytest.mark.asyncio
+async def test_routing_table_bulk_load_and_resolve(session: AsyncSession, mock_project: Project):
+    repo = SQLModelExposureRepository(session)
+    await repo.save(ModelExposure(project_id=mock_project.id, logical_name="assistant", backend_model="llama3", config={"temperature": 0}))
+
+    table = ModelRoutingTable()
+    await table.load(session)
+
+    route = table.resolve(mock_project.id, "assistant")
+    assert route.backend_model == "llama3"
+    assert route.config == {"temperature": 0}
+    assert table.version == 1
+    assert table.resolve(mock_project.id, "missing") is None
+
+@pytest.mark.asyncio
+async def test_save_patches_loaded_table_incrementally(session: AsyncSession, mock_project: Project):
+    await routing_table.load(session)
+    repo = CachedModelExposureRepository(routing_table, SQLModelExposureRepository(session))
+
+    await repo.save(ModelExposure(project_id=mock_project.id, logical_name="fast", backend_model="llama3:8b"))
+
+    assert routing_table.version == 1
+    assert (await repo.get_by_logical_name(mock_project.id, "fast")).backend_model == "llama3:8b"
+    assert [e.logical_name for e in await repo.get_by_project(mock_project.id)] == ["fast"]
+
+@pytest.mark.asyncio
+async def test_sync_reloads_when_another_worker_bumped_version(session: AsyncSession, mock_project: Project):
+    table = ModelRoutingTable()
+    await table.load(session)
+    assert await table.sync(session) is False
+
+    # Simulate a write made by a different process
+    session.add(ModelExposure(project_id=mock_project.id, logical_name="remote", backend_model="mistral"))
+    session.add(RoutingVersion(id=1, version=7))
+    await session.commit()
+
+    assert await table.sync(session) is True
+    assert table.version == 7
+    assert table.resolve(mock_project.id, "remote").backend_model == "mistral"
+
+@pytest.mark.asyncio
+async def test_renamed_exposure_stops_resolving_under_its_old_name(session: AsyncSession, mock_project: Project):
+    await routing_table.load(session)
+    repo = CachedModelExposureRepository(routing_table, SQLModelExposureRepository(session))
+    exposure = await repo.save(ModelExposure(project_id=mock_project.id, logical_name="old", backend_model="llama3"))
+
+    exposure.logical_name = "new"
+    await repo.save(exposure)
+
+    assert await repo.get_by_logical_name(mock_project.id, "old") is None
+    assert (await repo.get_by_logical_name(mock_project.id, "new")).backend_model == "llama3"
+    assert routing_table.stats()["routes"] == 1
@@ -0,0 +1,46 @@
+import asyncio
+import pytest
+from uuid import uuid4
+from httpx import AsyncClient, ASGITransport
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+from app.infrastructure.adapters.access_log import AccessLogSink, AccessRecord
+from app.infrastructure.adapters.middleware import RequestLoggingMiddleware
+
+PROJECT_ID = uuid4()
+api = FastAPI()
+
+@api.get("/v1/stream")
+async def stream(request: Request):
+    request.state.project_id = PROJECT_ID
+
+    async def body():
+        yield b"first "
+        await asyncio.sleep(0.05)
+        yield b"last"
+    return StreamingResponse(body())
+
+@pytest.mark.asyncio
+async def test_middleware_records_full_stream_lifecycle():
+    sink = AccessLogSink()
+    app = RequestLoggingMiddleware(api, sink=sink)
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.get("/v1/stream")
+        await client.get("/other")
+
+    assert response.text == "first last"
+    assert sink.stats()["queued"] == 1
+    entry = sink._buffer[0]
+    assert (entry.route, entry.status, entry.project_id, entry.bytes_sent) == ("/v1/stream", 200, PROJECT_ID, 10)
+    assert entry.last_byte_ms - entry.first_byte_ms >= 40
+
+def test_sink_drops_oldest_when_full():
+    sink = AccessLogSink(max_queue_size=2)
+    for status in (200, 201, 202):
+        sink.record(AccessRecord("GET", "/v1/x", "/v1/x", status, None, 1.0, 2.0, 0))
+
+    assert [entry.status for entry in sink._buffer] == [201, 202]
+    assert sink.dropped == 1
+    assert sink.flush() == 2
+    assert sink.stats()["queued"] == 0
@@ -0,0 +1,64 @@
+import pytest
+from app.infrastructure.adapters.affinity import AffinityTable, conversation_fingerprint
+from app.infrastructure.adapters.backend_pool import BackendPool
+
+SYSTEM = {"role": "system", "content": "You are a lawyer."}
+
+def test_fingerprint_is_stable_across_turns():
+    turn_1 = [SYSTEM, {"role": "user", "content": "Can I break my lease?"}]
+    turn_2 = turn_1 + [{"role": "assistant", "content": "It depends."}, {"role": "user", "content": "On what?"}]
+    other = [SYSTEM, {"role": "user", "content": "Is this contract valid?"}]
+
+    assert conversation_fingerprint("llama3", turn_1) == conversation_fingerprint("llama3", turn_2)
+    assert conversation_fingerprint("llama3", turn_1) != conversation_fingerprint("llama3", other)
+    assert conversation_fingerprint("llama3", turn_1) != conversation_fingerprint("mistral", turn_1)
+    assert conversation_fingerprint("llama3", [SYSTEM]) is None
+
+def test_table_is_bounded_and_expires_entries(clock):
+    table = AffinityTable(max_entries=2, ttl=60, clock=clock)
+    for fingerprint in ("a", "b", "c"):
+        table.put(fingerprint, "http://host")
+
+    assert table.get("a") is None and table.get("c") == "http://host"
+    clock.now += 60
+    assert table.get("c") is None
+
+def test_prompt_savings_only_count_turns_on_the_pinned_host():
+    table = AffinityTable()
+    table.observe_turn("conversation", "http://a", {"prompt_eval_count": 20, "eval_count": 5})
+    assert table.prompt_tokens_reused == 0  # First turn: nothing was cached
+
+    # The backend kept the 25-token context and only evaluated the new message
+    table.observe_turn("conversation", "http://a", {"prompt_eval_count": 10, "prompt_eval_duration": 10_000_000, "eval_count": 5})
+    assert (table.prompt_tokens_reused, table.prompt_eval_ms_saved) == (25, 25.0)
+
+    # A turn that landed elsewhere evaluated everything again
+    table.observe_turn("conversation", "http://b", {"prompt_eval_count": 50, "prompt_eval_duration": 50_000_000, "eval_count": 5})
+    assert table.prompt_tokens_reused == 25
+    assert table.get("conversation") == "http://b"
+
+@pytest.mark.asyncio
+async def test_conversation_sticks_to_its_host_and_spills_when_saturated(mock_host):
+    pool = BackendPool(
+        [mock_host("http://a"), mock_host("http://b")], replicas_per_model=2, affinity=AffinityTable(max_outstanding=2)
+    )
+    messages = [SYSTEM, {"role": "user", "content": "Can I break my lease?"}]
+    await pool.achat("llama3", messages)
+    home = pool.affinity.get(conversation_fingerprint("llama3:latest", messages))
+    home_backend, other_backend = sorted(pool.backends, key=lambda backend: backend.url != home)
+
+    # Load alone would pick the other host; affinity keeps the conversation home
+    home_backend.outstanding = 1
+    messages += [{"role": "assistant", "content": "tok0 tok1 "}, {"role": "user", "content": "Why?"}]
+    assert pool.pick("llama3", messages) is home_backend
+
+    home_backend.outstanding = 2
+    assert pool.pick("llama3", messages) is other_backend
+    home_backend.outstanding = 0
+    await pool._achat_on(other_backend, "llama3", messages)
+    assert pool.pick("llama3", messages) is other_backend
+    await pool.achat("llama3", messages)
+
+    # Ranking again (as retries and hedges do) does not count as routing
+    pool.targets("llama3", messages)
+    assert (pool.affinity.routed, pool.affinity.spilled) == (1, 1)
@@ -0,0 +1,70 @@
+import httpx
+import pytest
+from app.infrastructure.adapters.backend_pool import BackendPool
+
+MESSAGES = [{"role": "user", "content": "hi"}]
+
+@pytest.mark.asyncio
+async def test_routes_models_to_hosts_that_have_them_and_sticks_to_one(mock_host):
+    pool = BackendPool(
+        [mock_host("http://a", ["llama3:latest", "mistral:latest"]), mock_host("http://b", ["mistral:latest"])],
+        replicas_per_model=1,
+    )
+    await pool.probe()
+
+    assert {pool.pick("llama3").url for _ in range(5)} == {"http://a"}
+    assert len({pool.pick("mistral").url for _ in range(5)}) == 1
+    assert {m["name"] for m in await pool.alist_models()} == {"llama3:latest", "mistral:latest"}
+
+@pytest.mark.asyncio
+async def test_least_outstanding_spreads_across_replicas(mock_host):
+    pool = BackendPool([mock_host("http://a", tokens=50), mock_host("http://b", tokens=50)], replicas_per_model=2)
+    await pool.probe()
+
+    first = pool.astream_chat_raw("llama3", MESSAGES)
+    await first.__anext__()  # Holds one request open on the first host
+    busy = [b for b in pool.backends if b.outstanding == 1]
+
+    assert len(busy) == 1
+    assert pool.pick("llama3") is not busy[0]
+    await first.aclose()
+    assert sum(b.outstanding for b in pool.backends) == 0
+
+@pytest.mark.asyncio
+async def test_failing_host_serves_out_its_ejection_even_if_probes_answer(mock_host, down_host, clock):
+    pool = BackendPool(
+        [down_host("http://down"), mock_host("http://up")], replicas_per_model=2, failure_threshold=2, clock=clock
+    )
+    down, up = pool.backends
+    up.outstanding = 5  # Busy enough that the idle broken host is picked first
+
+    for _ in range(2):
+        with pytest.raises(httpx.ConnectError):
+            await pool.achat("llama3", MESSAGES)
+
+    assert not down.available(clock.now)
+    response = await pool.achat("llama3", MESSAGES)
+    assert response["done"]
+    assert pool.stats()["backends"][0]["ejections"] == 1
+
+    # Listing models is no proof the host can run them: the ejection stands
+    down.adapter = mock_host("http://down")
+    await pool.probe()
+    assert not down.available(clock.now)
+    clock.now += 30
+    assert down.available(clock.now)
+
+@pytest.mark.asyncio
+async def test_routes_to_ejected_hosts_when_no_healthy_one_is_left(mock_host, down_host, clock):
+    pool = BackendPool([down_host("http://a"), down_host("http://b")], clock=clock)
+
+    assert len(await pool.probe()) == 2
+    assert pool.pick("llama3").url in ("http://a", "http://b")
+    with pytest.raises(httpx.ConnectError):
+        await pool.alist_models()
+
+    # Hosts ejected by the probe come back as soon as they answer it
+    a, b = pool.backends
+    a.adapter = mock_host("http://a")
+    assert len(await pool.probe()) == 1
+    assert a.available(clock.now) and not b.available(clock.now)
@@ -0,0 +1,48 @@
+import pytest
+from app.infrastructure.adapters.callback_policy import CallbackPolicy, CallbackRejectedError, is_public_address
+
+def policy(addresses, **kwargs) -> CallbackPolicy:
+    async def resolve(host: str, port: int):
+        return addresses
+    return CallbackPolicy(resolve=resolve, **kwargs)
+
+@pytest.mark.parametrize("address", ["127.0.0.1", "169.254.169.254", "10.0.0.5", "192.168.1.1", "::1", "fe80::1", "::ffff:127.0.0.1"])
+def test_internal_addresses_are_not_public(address):
+    assert not is_public_address(address)
+
+@pytest.mark.asyncio
+async def test_accepts_public_hosts_and_returns_the_vetted_address():
+    assert await policy(["93.184.216.34"]).check("https://hooks.example.com/done") == "93.184.216.34"
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("url", ["file:///etc/passwd", "gopher://hooks/x", "http:///nohost"])
+async def test_rejects_non_http_urls(url):
+    with pytest.raises(CallbackRejectedError):
+        await policy(["93.184.216.34"]).check(url)
+
+@pytest.mark.asyncio
+async def test_rejects_hosts_with_any_internal_address():
+    # One private record is enough; the connection could land on it
+    with pytest.raises(CallbackRejectedError):
+        await policy(["93.184.216.34", "10.0.0.5"]).check("http://hooks.example.com/done")
+
+@pytest.mark.asyncio
+async def test_allowlist_matches_exact_names_and_subdomain_wildcards():
+    allowed = policy(["93.184.216.34"], allowed_hosts=["hooks.example.com", "*.partner.io"])
+
+    assert await allowed.check("http://hooks.example.com/a")
+    assert await allowed.check("http://eu.partner.io/a")
+    for url in ("http://evil.com/a", "http://partner.io.evil.com/a", "http://xpartner.io/a"):
+        with pytest.raises(CallbackRejectedError):
+            await allowed.check(url)
+
+@pytest.mark.asyncio
+async def test_allow_private_skips_resolution():
+    assert await policy([], allow_private=True).check("http://localhost:9000/done") is None
+
+def test_pinned_request_keeps_the_original_host():
+    pinned = CallbackPolicy.pinned("https://user:pw@hooks.example.com:8443/done?x=1", "2606:2800::1")
+
+    assert pinned["url"] == "https://user:pw@[2606:2800::1]:8443/done?x=1"
+    assert pinned["headers"] == {"Host": "hooks.example.com:8443"}
+    assert pinned["extensions"] == {"sni_hostname": "hooks.example.com"}
@@ -1,10 +1,12 @@
+import asyncio
 import pytest
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, AsyncMock
 from uuid import uuid4
 from app.core.use_cases.chat import ChatWithModelUseCase
 from app.core.domain.model_exposure import ModelExposure
 
-def test_chat_use_case_with_mapped_model():
+@pytest.mark.asyncio
+async def test_chat_use_case_with_mapped_model():
     # Arrange
     project_id = uuid4()
     logical_name = "law-assistant"
@@ -12,51 +14,119 @@ def test_chat_use_case_with_mapped_model():
     messages = [{"role": "user", "content": "hello"}]
     
     mock_llm = MagicMock()
-    mock_llm.chat.return_value = {"message": "hi"}
+    mock_llm.achat = AsyncMock(return_value={"message": "hi"})
     
     mock_exposure_repo = MagicMock()
-    mock_exposure_repo.get_by_logical_name.return_value = ModelExposure(
+    mock_exposure_repo.get_by_logical_name = AsyncMock(return_value=ModelExposure(
         project_id=project_id,
         logical_name=logical_name,
         backend_model=backend_model,
         config={"temperature": 0.1}
-    )
+    ))
     
     mock_log_repo = MagicMock()
     
     use_case = ChatWithModelUseCase(mock_llm, mock_exposure_repo, mock_log_repo)
     
     # Act
-    response = use_case.execute(project_id, logical_name, messages)
+    response = await use_case.execute(project_id, logical_name, messages)
     
     # Assert
     assert response == {"message": "hi"}
-    mock_llm.chat.assert_called_once_with(
+    mock_llm.achat.assert_awaited_once_with(
         model=backend_model, 
         messages=messages, 
         temperature=0.1
     )
     mock_log_repo.save.assert_called_once()
 
-def test_chat_use_case_fallback_when_no_mapping():
+@pytest.mark.asyncio
+async def test_chat_use_case_fallback_when_no_mapping():
     # Arrange
     project_id = uuid4()
     logical_name = "direct-model"
     messages = [{"role": "user", "content": "hello"}]
     
     mock_llm = MagicMock()
+    mock_llm.achat = AsyncMock(return_value={})
     mock_exposure_repo = MagicMock()
-    mock_exposure_repo.get_by_logical_name.return_value = None
+    mock_exposure_repo.get_by_logical_name = AsyncMock(return_value=None)
     mock_log_repo = MagicMock()
     
     use_case = ChatWithModelUseCase(mock_llm, mock_exposure_repo, mock_log_repo)
     
     # Act
-    use_case.execute(project_id, logical_name, messages, top_p=0.9)
+    await use_case.execute(project_id, logical_name, messages, top_p=0.9)
     
     # Assert
-    mock_llm.chat.assert_called_once_with(
+    mock_llm.achat.assert_awaited_once_with(
         model=logical_name, 
         messages=messages, 
         top_p=0.9
     )
+
+@pytest.mark.asyncio
+async def test_stream_closed_by_client_aborts_upstream_and_logs_499():
+    from app.core.use_cases.chat import StreamChatWithModelUseCase
+    from app.infrastructure.adapters.scheduler import FairScheduler
+
+    upstream_closed = False
+
+    async def raw_stream(**kwargs):
+        nonlocal upstream_closed
+        try:
+            yield b'{"message":{"content":"a"}}'
+            yield b'{"message":{"content":"b"}}'
+            await asyncio.Event().wait()
+        finally:
+            upstream_closed = True
+
+    mock_llm = MagicMock()
+    mock_llm.astream_chat_raw = raw_stream
+    mock_exposure_repo = MagicMock()
+    mock_exposure_repo.get_by_logical_name = AsyncMock(return_value=None)
+    mock_log_repo = MagicMock()
+    scheduler = FairScheduler(default_max_inflight=1)
+
+    use_case = StreamChatWithModelUseCase(mock_llm, mock_exposure_repo, mock_log_repo, scheduler=scheduler)
+    frames = await use_case.execute(uuid4(), "llama3", [])
+    assert await frames.__anext__() == b'data: {"message":{"content":"a"}}\n\n'
+    await frames.__anext__()
+    await frames.aclose()
+
+    assert upstream_closed
+    assert scheduler.stats()["llama3"]["inflight"] == 0
+    log = mock_log_repo.save.call_args.args[0]
+    assert (log.status, log.tokens_output) == (499, 2)
+
+@pytest.mark.asyncio
+async def test_stream_closed_before_iteration_releases_its_slot():
+    from app.core.use_cases.chat import StreamChatWithModelUseCase
+    from app.infrastructure.adapters.coalescer import SingleFlightCoalescer
+    from app.infrastructure.adapters.scheduler import FairScheduler
+
+    async def raw_stream(**kwargs):
+        await asyncio.Event().wait()
+        yield b""
+
+    mock_llm = MagicMock()
+    mock_llm.astream_chat_raw = raw_stream
+    mock_exposure_repo = MagicMock()
+    mock_exposure_repo.get_by_logical_name = AsyncMock(return_value=None)
+    mock_log_repo = MagicMock()
+    scheduler = FairScheduler(default_max_inflight=1)
+    coalescer = SingleFlightCoalescer()
+
+    for use_case in (
+        StreamChatWithModelUseCase(mock_llm, mock_exposure_repo, mock_log_repo, scheduler=scheduler),
+        StreamChatWithModelUseCase(mock_llm, mock_exposure_repo, mock_log_repo, scheduler=scheduler, coalescer=coalescer),
+    ):
+        # The response never started, so the body is dropped unread
+        frames = await use_case.execute(uuid4(), "llama3", [])
+        await frames.aclose()
+        await frames.aclose()
+        await asyncio.sleep(0.01)  # Let a cancelled shared stream run its done callbacks
+
+        assert scheduler.stats()["llama3"]["inflight"] == 0
+    assert [call.args[0].status for call in mock_log_repo.save.call_args_list] == [499, 499]
+    assert coalescer.stats()["inflight_streams"] == 0
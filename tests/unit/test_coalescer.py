@@ -0,0 +1,167 @@
+import asyncio
+import pytest
+from app.core.deadline import remaining, set_deadline
+from app.core.exceptions import DeadlineExceededError
+from app.infrastructure.adapters.coalescer import SingleFlightCoalescer
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_upstream_call():
+    coalescer = SingleFlightCoalescer()
+    calls = 0
+    release = asyncio.Event()
+
+    async def upstream():
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return {"message": "shared"}
+
+    first = asyncio.create_task(coalescer.run("key", upstream))
+    second = asyncio.create_task(coalescer.run("key", upstream))
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await first == ({"message": "shared"}, False)
+    assert await second == ({"message": "shared"}, True)
+    assert calls == 1
+    assert coalescer.stats()["inflight_calls"] == 0
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_does_not_cancel_shared_call():
+    coalescer = SingleFlightCoalescer()
+    release = asyncio.Event()
+
+    async def upstream():
+        await release.wait()
+        return {"ok": True}
+
+    leader = asyncio.create_task(coalescer.run("key", upstream))
+    follower = asyncio.create_task(coalescer.run("key", upstream))
+    await asyncio.sleep(0)
+    leader.cancel()
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await follower == ({"ok": True}, True)
+    with pytest.raises(asyncio.CancelledError):
+        await leader
+
+@pytest.mark.asyncio
+async def test_late_stream_joiner_replays_from_start():
+    coalescer = SingleFlightCoalescer()
+    gate = asyncio.Event()
+    done = []
+
+    async def upstream():
+        yield {"n": 1}
+        await gate.wait()
+        yield {"n": 2}
+
+    first, shared_first = coalescer.stream("key", upstream, on_done=lambda: done.append(True))
+    assert await first.__anext__() == {"n": 1}
+
+    second, shared_second = coalescer.stream("key", upstream)
+    gate.set()
+    assert [chunk async for chunk in first] == [{"n": 2}]
+    assert [chunk async for chunk in second] == [{"n": 1}, {"n": 2}]
+    assert (shared_first, shared_second) == (False, True)
+    await asyncio.sleep(0)  # done callbacks run on the next loop iteration
+    assert done == [True]
+
+@pytest.mark.asyncio
+async def test_stream_is_cancelled_when_last_subscriber_leaves():
+    coalescer = SingleFlightCoalescer()
+    cancelled = asyncio.Event()
+
+    async def upstream():
+        try:
+            yield {"n": 1}
+            await asyncio.Event().wait()
+        finally:
+            cancelled.set()
+
+    chunks, _ = coalescer.stream("key", upstream)
+    assert await chunks.__anext__() == {"n": 1}
+    await chunks.aclose()
+
+    await asyncio.wait_for(cancelled.wait(), timeout=1)
+    assert not coalescer.is_streaming("key")
+
+@pytest.mark.asyncio
+async def test_follower_gives_up_at_its_deadline_without_cancelling_the_leader():
+    coalescer = SingleFlightCoalescer()
+    release = asyncio.Event()
+
+    async def upstream():
+        await release.wait()
+        return {"ok": True}
+
+    async def follow():
+        set_deadline(0.01)  # Task-local: the leader has no deadline
+        return await coalescer.run("key", upstream)
+
+    leader = asyncio.create_task(coalescer.run("key", upstream))
+    await asyncio.sleep(0)
+    with pytest.raises(DeadlineExceededError):
+        await asyncio.wait_for(asyncio.create_task(follow()), 1)
+
+    release.set()
+    assert await leader == ({"ok": True}, False)
+
+@pytest.mark.asyncio
+async def test_leader_deadline_does_not_bound_the_shared_call():
+    coalescer = SingleFlightCoalescer()
+    release = asyncio.Event()
+    seen = []
+
+    async def upstream():
+        seen.append(remaining())  # Runs without the leader's deadline
+        await release.wait()
+        return {"ok": True}
+
+    async def lead():
+        set_deadline(0.01)
+        return await coalescer.run("key", upstream)
+
+    leader = asyncio.create_task(lead())
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(coalescer.run("key", upstream))
+
+    with pytest.raises(DeadlineExceededError):
+        await asyncio.wait_for(leader, 1)  # Expires while the shared call is still running
+    release.set()
+    assert await follower == ({"ok": True}, True)
+    assert seen == [None]
+
+@pytest.mark.asyncio
+async def test_shared_call_timing_out_maps_to_deadline_exceeded():
+    coalescer = SingleFlightCoalescer()
+
+    async def upstream():
+        raise asyncio.TimeoutError()
+
+    with pytest.raises(DeadlineExceededError):
+        await coalescer.run("key", upstream)
+
+@pytest.mark.asyncio
+async def test_stream_leader_deadline_does_not_end_the_shared_stream():
+    coalescer = SingleFlightCoalescer()
+    gate = asyncio.Event()
+
+    async def upstream():
+        await gate.wait()
+        yield {"n": 1}
+
+    async def lead():
+        set_deadline(0.01)
+        chunks, _ = coalescer.stream("key", upstream)
+        return [chunk async for chunk in chunks]
+
+    leader = asyncio.create_task(lead())
+    await asyncio.sleep(0)
+    follower, shared = coalescer.stream("key", upstream)
+
+    with pytest.raises(DeadlineExceededError):
+        await asyncio.wait_for(leader, 1)
+    gate.set()
+    assert shared and [chunk async for chunk in follower] == [{"n": 1}]
@@ -0,0 +1,36 @@
+from types import SimpleNamespace
+from uuid import uuid4
+from prometheus_client import REGISTRY
+from app.core.domain.request_log import RequestLog
+from app.infrastructure.adapters.metrics import observe_request_logs, refresh_runtime_metrics
+from app.infrastructure.adapters.project_cache import project_cache
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+def test_request_logs_feed_chat_metrics():
+    labels = {"model": "llama3", "endpoint": "/v1/chat/stream", "status": "200"}
+    log = RequestLog(
+        project_id=uuid4(), model="llama3", endpoint="/v1/chat/stream", latency_ms=1200, status=200,
+        ttft_ms=300, tokens_output=42,
+    )
+    requests_before = sample("gateway_chat_requests_total", **labels)
+    tokens_before = sample("gateway_chat_tokens_total", model="llama3", direction="output")
+
+    observe_request_logs([log, log])
+
+    assert sample("gateway_chat_requests_total", **labels) == requests_before + 2
+    assert sample("gateway_upstream_ttft_seconds_count", model="llama3") >= 2
+    assert sample("gateway_chat_tokens_total", model="llama3", direction="output") == tokens_before + 84
+
+def test_refresh_turns_cache_stats_into_counter_increments():
+    # Catch up with lookups made by earlier tests
+    refresh_runtime_metrics(SimpleNamespace(state=SimpleNamespace()))
+    before = sample("gateway_cache_lookups_total", cache="auth", result="miss")
+    project_cache.get("unknown-key")
+    project_cache.get("unknown-key")
+
+    refresh_runtime_metrics(SimpleNamespace(state=SimpleNamespace()))
+    refresh_runtime_metrics(SimpleNamespace(state=SimpleNamespace()))
+
+    assert sample("gateway_cache_lookups_total", cache="auth", result="miss") == before + 2
@@ -0,0 +1,41 @@
+import httpx
+import pytest
+from benchmarks.mock_ollama import MockConfig, create_app
+from benchmarks.run import compare, percentile
+from app.infrastructure.adapters.ollama_http_adapter import OllamaHTTPAdapter
+
+def adapter_for(config: MockConfig) -> OllamaHTTPAdapter:
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=create_app(config)))
+    return OllamaHTTPAdapter(base_url="http://mock", client=client)
+
+@pytest.mark.asyncio
+async def test_mock_backend_speaks_ollama_chat_api():
+    adapter = adapter_for(MockConfig(ttft_ms=0, tokens_per_second=10000, tokens=5))
+
+    response = await adapter.achat("llama3", [{"role": "user", "content": "hi there"}], max_tokens=3)
+    chunks = [chunk async for chunk in adapter.astream_chat("llama3", [{"role": "user", "content": "hi"}])]
+
+    assert response["message"]["content"] == "tok0 tok1 tok2 "
+    assert (response["eval_count"], response["prompt_eval_count"]) == (3, 2)
+    assert len(chunks) == 6
+    assert chunks[-1]["done"] and chunks[-1]["total_duration"] > 0
+    assert await adapter.alist_models() == [{"name": "llama3", "model": "llama3", "size": 0}]
+
+@pytest.mark.asyncio
+async def test_mock_backend_injects_errors():
+    adapter = adapter_for(MockConfig(ttft_ms=0, tokens_per_second=10000, error_rate=1.0))
+    with pytest.raises(httpx.HTTPStatusError):
+        await adapter.achat("llama3", [{"role": "user", "content": "hi"}])
+
+    adapter = adapter_for(MockConfig(ttft_ms=0, tokens_per_second=10000, tokens=4, stream_error_rate=1.0))
+    with pytest.raises(RuntimeError, match="injected stream failure"):
+        async for _ in adapter.astream_chat("llama3", [{"role": "user", "content": "hi"}]):
+            pass
+
+def test_compare_flags_throughput_and_overhead_regressions():
+    def result(rps, p99):
+        return {"scenarios": [{"name": "small_chats", "throughput_rps": rps, "overhead_ms": {"p50": 1, "p99": p99}}]}
+
+    assert compare(result(95, 5.5), result(100, 5), tolerance=0.1) == []
+    assert len(compare(result(80, 20), result(100, 5), tolerance=0.1)) == 2
+    assert percentile([3, 1, 2, 4], 0.5) == 3
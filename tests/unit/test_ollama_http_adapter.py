@@ -0,0 +1,64 @@
+import json
+import httpx
+import pytest
+from app.infrastructure.adapters.ollama_http_adapter import OllamaHTTPAdapter
+
+def make_adapter(handler) -> OllamaHTTPAdapter:
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return OllamaHTTPAdapter(base_url="http://ollama.test", client=client)
+
+@pytest.mark.asyncio
+async def test_achat_posts_ollama_wire_format():
+    captured = {}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        captured["url"] = str(request.url)
+        captured["body"] = json.loads(request.content)
+        return httpx.Response(200, json={"message": {"role": "assistant", "content": "hi"}, "done": True})
+
+    adapter = make_adapter(handler)
+    response = await adapter.achat("llama3", [{"role": "user", "content": "hello"}], temperature=0.2, max_tokens=16)
+
+    assert response["message"]["content"] == "hi"
+    assert captured["url"] == "http://ollama.test/api/chat"
+    assert captured["body"]["stream"] is False
+    assert captured["body"]["options"] == {"temperature": 0.2, "num_predict": 16}
+
+@pytest.mark.asyncio
+async def test_astream_chat_yields_ndjson_chunks():
+    lines = [
+        {"message": {"content": "Hel"}, "done": False},
+        {"message": {"content": "lo"}, "done": False},
+        {"done": True, "eval_count": 2},
+    ]
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        body = "\n".join(json.dumps(line) for line in lines) + "\n"
+        return httpx.Response(200, content=body.encode())
+
+    adapter = make_adapter(handler)
+    chunks = [chunk async for chunk in adapter.astream_chat("llama3", [])]
+
+    assert chunks == lines
+
+@pytest.mark.asyncio
+async def test_astream_chat_raw_passes_lines_through_and_raises_on_error():
+    def handler(request: httpx.Request) -> httpx.Response:
+        body = b'{"message":{"content":"Hi"},"done":false}\n{"error":"model unloaded"}\n'
+        return httpx.Response(200, content=body)
+
+    adapter = make_adapter(handler)
+    stream = adapter.astream_chat_raw("llama3", [])
+
+    assert await stream.__anext__() == b'{"message":{"content":"Hi"},"done":false}'
+    with pytest.raises(RuntimeError, match="model unloaded"):
+        await stream.__anext__()
+
+@pytest.mark.asyncio
+async def test_alist_models_reads_tags():
+    def handler(request: httpx.Request) -> httpx.Response:
+        assert request.url.path == "/api/tags"
+        return httpx.Response(200, json={"models": [{"name": "llama3:latest"}]})
+
+    adapter = make_adapter(handler)
+    assert await adapter.alist_models() == [{"name": "llama3:latest"}]
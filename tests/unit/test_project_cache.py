@@ -0,0 +1,49 @@
+from unittest.mock import patch
+from app.core.domain.project import Project
+from app.infrastructure.adapters.project_cache import TTLProjectCache
+
+def make_project(api_key: str = "key") -> Project:
+    return Project(name="Cached", api_key=api_key)
+
+def test_cache_returns_snapshot_and_invalidates_by_project():
+    cache = TTLProjectCache()
+    project = make_project()
+    cache.put("key", project)
+
+    hit, cached = cache.get("key")
+    assert hit and cached.id == project.id
+    assert cached is not project
+
+    cache.invalidate_project(project.id)
+    assert cache.get("key") == (False, None)
+
+def test_cache_negative_entries_expire_faster():
+    cache = TTLProjectCache(ttl_seconds=60, negative_ttl_seconds=1)
+    cache.put("bad-key", None)
+    cache.put("good-key", make_project("good-key"))
+
+    assert cache.get("bad-key") == (True, None)
+    with patch("app.infrastructure.adapters.project_cache.time.monotonic", return_value=10**9):
+        assert cache.get("bad-key") == (False, None)
+        assert cache.get("good-key") == (False, None)
+
+def test_cache_is_bounded_lru():
+    cache = TTLProjectCache(max_size=2)
+    cache.put("a", make_project("a"))
+    cache.put("b", make_project("b"))
+    cache.get("a")  # "b" becomes least recently used
+    cache.put("c", make_project("c"))
+
+    assert cache.get("a")[0]
+    assert not cache.get("b")[0]
+    assert cache.get("c")[0]
+
+def test_put_from_a_lookup_older_than_an_invalidation_is_dropped():
+    cache = TTLProjectCache()
+    project = make_project()
+    generation = cache.generation  # Lookup starts reading the database
+    cache.invalidate_project(project.id)  # Admin deactivates the project meanwhile
+
+    cache.put("key", project, generation)
+
+    assert cache.get("key") == (False, None)
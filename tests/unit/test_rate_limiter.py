@@ -0,0 +1,42 @@
+import pytest
+from uuid import uuid4
+from unittest.mock import MagicMock, AsyncMock
+from app.core.domain.model_exposure import ModelExposure
+from app.core.exceptions import RateLimitExceededError
+from app.core.use_cases.chat import ChatWithModelUseCase
+from app.infrastructure.adapters.rate_limiter import InMemoryRateLimitStore, RateLimiter, rate_limit_headers
+
+@pytest.mark.asyncio
+async def test_token_bucket_refills_over_time(clock):
+    store = InMemoryRateLimitStore(clock=clock)
+
+    assert (await store.acquire("k", 2)).allowed
+    assert (await store.acquire("k", 2)).allowed
+    denied = await store.acquire("k", 2)
+    assert not denied.allowed
+    assert denied.retry_after == pytest.approx(30.0)
+    assert rate_limit_headers(denied)["Retry-After"] == "30"
+
+    clock.now += 30  # 2/min refills one token every 30s
+    assert (await store.acquire("k", 2)).allowed
+
+@pytest.mark.asyncio
+async def test_per_model_limit_raises_before_calling_backend():
+    project_id = uuid4()
+    mock_llm = MagicMock()
+    mock_llm.achat = AsyncMock(return_value={})
+    mock_exposure_repo = MagicMock()
+    mock_exposure_repo.get_by_logical_name = AsyncMock(return_value=ModelExposure(
+        project_id=project_id,
+        logical_name="heavy",
+        backend_model="llama3.3:70b",
+        rate_limit_per_minute=1
+    ))
+    limiter = RateLimiter(InMemoryRateLimitStore())
+    use_case = ChatWithModelUseCase(mock_llm, mock_exposure_repo, MagicMock(), limiter)
+
+    await use_case.execute(project_id, "heavy", [])
+    with pytest.raises(RateLimitExceededError):
+        await use_case.execute(project_id, "heavy", [])
+
+    assert mock_llm.achat.await_count == 1
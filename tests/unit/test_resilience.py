@@ -0,0 +1,94 @@
+import asyncio
+import httpx
+import pytest
+from app.core.deadline import set_deadline
+from app.core.exceptions import CircuitOpenError, DeadlineExceededError
+from app.infrastructure.adapters.backend_pool import BackendPool
+from app.infrastructure.adapters.resilience import CircuitBreaker, ResilientLLMService, RetryBudget
+
+MESSAGES = [{"role": "user", "content": "hi"}]
+
+def resilient(inner, **kwargs) -> ResilientLLMService:
+    return ResilientLLMService(inner, backoff_base=0.001, **kwargs)
+
+@pytest.fixture(autouse=True)
+def no_deadline():
+    set_deadline(None)
+    yield
+    set_deadline(None)
+
+def test_breaker_opens_then_lets_one_trial_through(clock):
+    breaker = CircuitBreaker(failure_threshold=2, open_seconds=10, clock=clock)
+    breaker.on_failure()
+    breaker.on_failure()
+
+    assert breaker.state == "open" and not breaker.allow()
+    clock.now += 10
+    assert breaker.allow()
+    assert not breaker.allow()  # Only one half-open trial at a time
+    breaker.on_success()
+    assert breaker.state == "closed" and breaker.allow()
+
+@pytest.mark.asyncio
+async def test_retries_on_another_backend_before_the_first_token(mock_host, down_host):
+    pool = BackendPool([down_host("http://down"), mock_host("http://up")], replicas_per_model=2)
+    pool.backends[1].outstanding = 5  # Keep the broken host first in line
+    service = resilient(pool)
+
+    response = await service.achat("llama3", MESSAGES)
+    chunks = [chunk async for chunk in service.astream_chat("llama3", MESSAGES)]
+
+    assert response["done"] and chunks[-1]["done"]
+    assert service.retries == 2
+
+@pytest.mark.asyncio
+async def test_failing_backend_opens_its_circuit(down_host):
+    service = resilient(down_host("http://down"), max_retries=1, breaker_failure_threshold=2)
+
+    with pytest.raises(httpx.ConnectError):
+        await service.achat("llama3", MESSAGES)
+    with pytest.raises(CircuitOpenError):
+        await service.achat("llama3", MESSAGES)
+    assert service.stats()["breakers"][0]["state"] == "open"
+
+@pytest.mark.asyncio
+async def test_no_retry_once_a_stream_has_started(mock_host):
+    service = resilient(mock_host("http://a", stream_error_rate=1.0))
+
+    received = []
+    with pytest.raises(RuntimeError, match="injected stream failure"):
+        async for chunk in service.astream_chat("llama3", MESSAGES):
+            received.append(chunk)
+    assert len(received) == 1
+    assert service.retries == 0
+
+@pytest.mark.asyncio
+async def test_retry_budget_bounds_retries(down_host):
+    service = resilient(down_host("http://down"), max_retries=5, retry_budget=RetryBudget(ratio=0, reserve=1))
+    with pytest.raises(httpx.ConnectError):
+        await service.achat("llama3", MESSAGES)
+    assert service.retries == 1
+
+@pytest.mark.asyncio
+async def test_deadline_cuts_a_slow_backend_short(mock_host):
+    service = resilient(mock_host("http://slow", ttft_ms=2000))
+    set_deadline(0.05)
+    with pytest.raises(DeadlineExceededError):
+        await service.achat("llama3", MESSAGES)
+    with pytest.raises(DeadlineExceededError):
+        async for _ in service.astream_chat_raw("llama3", MESSAGES):
+            pass
+
+@pytest.mark.asyncio
+async def test_hedged_request_wins_over_a_stalled_backend(mock_host):
+    pool = BackendPool([mock_host("http://slow", ttft_ms=2000), mock_host("http://fast")], replicas_per_model=2)
+    pool.backends[1].outstanding = 5  # The stalled host is picked first
+    service = resilient(pool, hedge=True, hedge_min_samples=1, hedge_min_delay=0.01)
+    service._latency("llama3").add(0.01)
+
+    response = await asyncio.wait_for(service.achat("llama3", MESSAGES), 1)
+
+    assert response["done"]
+    assert (service.hedges, service.hedge_wins) == (1, 1)
+    await asyncio.sleep(0)
+    assert pool.backends[0].outstanding == 0  # The losing call was cancelled
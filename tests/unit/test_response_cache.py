@@ -0,0 +1,39 @@
+import pytest
+from uuid import uuid4
+from app.core.use_cases.chat.cache_key import canonical_request_key
+from app.infrastructure.adapters.response_cache import TieredResponseCache
+
+def test_canonical_key_ignores_dict_ordering():
+    messages = [{"role": "user", "content": "hi"}]
+    project_id = uuid4()
+    a = canonical_request_key(project_id, "llama3", {"temperature": 0, "num_ctx": 2048}, messages)
+    b = canonical_request_key(project_id, "llama3", {"num_ctx": 2048, "temperature": 0}, [{"content": "hi", "role": "user"}])
+    assert a == b
+    assert a != canonical_request_key(project_id, "llama3", {"temperature": 0.5}, messages)
+    # Another tenant sending the same prompt never shares the entry
+    assert a != canonical_request_key(uuid4(), "llama3", {"temperature": 0, "num_ctx": 2048}, messages)
+
+@pytest.mark.asyncio
+async def test_memory_tier_expires_and_is_bounded_by_bytes(clock):
+    cache = TieredResponseCache(max_bytes=60, ttl_seconds=10, clock=clock)
+    await cache.put("a", {"content": "x" * 20})
+    await cache.put("b", {"content": "y" * 20})
+    assert await cache.get("a") is None  # evicted to stay under max_bytes
+    assert await cache.get("b") == {"content": "y" * 20}
+
+    clock.now += 11
+    assert await cache.get("b") is None
+    assert cache.stats()["memory_hits"] == 1
+    assert cache.stats()["misses"] == 2
+    assert cache.stats()["evictions"] == 1
+
+@pytest.mark.asyncio
+async def test_disk_tier_survives_a_new_instance(tmp_path):
+    first = TieredResponseCache(disk_dir=str(tmp_path))
+    await first.put("key", {"message": {"content": "cached"}})
+
+    second = TieredResponseCache(disk_dir=str(tmp_path))
+    assert await second.get("key") == {"message": {"content": "cached"}}
+    assert await second.get("key") == {"message": {"content": "cached"}}
+    assert second.stats()["disk_hits"] == 1
+    assert second.stats()["memory_hits"] == 1
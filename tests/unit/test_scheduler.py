@@ -0,0 +1,113 @@
+import asyncio
+import pytest
+from uuid import uuid4
+from app.core.deadline import set_deadline
+from app.core.exceptions import AdmissionRejectedError, DeadlineExceededError
+from app.infrastructure.adapters.scheduler import FairScheduler, parse_model_limits, parse_project_weights
+
+MODEL = "llama3.3:70b"
+
+@pytest.mark.asyncio
+async def test_fair_queuing_interleaves_projects():
+    scheduler = FairScheduler(default_max_inflight=1)
+    noisy, quiet = uuid4(), uuid4()
+    order = []
+
+    await scheduler.acquire(MODEL, noisy)  # occupies the only slot
+
+    async def request(project_id, label):
+        await scheduler.acquire(MODEL, project_id)
+        order.append(label)
+        scheduler.release(MODEL)
+
+    tasks = [asyncio.create_task(request(noisy, f"noisy-{i}")) for i in range(3)]
+    await asyncio.sleep(0)
+    tasks.append(asyncio.create_task(request(quiet, "quiet")))
+    await asyncio.sleep(0)
+    assert scheduler.stats()[MODEL]["queue_depth"] == 4
+
+    scheduler.release(MODEL)
+    await asyncio.gather(*tasks)
+
+    # The quiet project's first request is not stuck behind the whole burst
+    assert order.index("quiet") == 1
+    assert scheduler.stats()[MODEL]["inflight"] == 0
+
+@pytest.mark.asyncio
+async def test_queue_full_fails_fast():
+    scheduler = FairScheduler(default_max_inflight=1, max_queue_depth=1)
+    project_id = uuid4()
+    await scheduler.acquire(MODEL, project_id)
+    waiter = asyncio.create_task(scheduler.acquire(MODEL, project_id))
+    await asyncio.sleep(0)
+
+    with pytest.raises(AdmissionRejectedError) as exc:
+        await scheduler.acquire(MODEL, project_id)
+    assert exc.value.reason == "queue_full"
+
+    scheduler.release(MODEL)
+    await waiter
+
+@pytest.mark.asyncio
+async def test_queue_timeout_and_cancellation_do_not_leak_slots():
+    scheduler = FairScheduler(default_max_inflight=1, queue_timeout=0.01)
+    project_id = uuid4()
+    await scheduler.acquire(MODEL, project_id)
+
+    with pytest.raises(AdmissionRejectedError) as exc:
+        await scheduler.acquire(MODEL, project_id)
+    assert exc.value.reason == "queue_timeout"
+
+    scheduler.queue_timeout = 10
+    waiter = asyncio.create_task(scheduler.acquire(MODEL, project_id))
+    await asyncio.sleep(0)
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+
+    scheduler.release(MODEL)
+    stats = scheduler.stats()[MODEL]
+    assert stats["inflight"] == 0
+    assert stats["queue_depth"] == 0
+
+def test_parse_model_limits_accepts_tagged_model_names():
+    assert parse_model_limits("llama3.3:70b=2, llama3=8") == {"llama3.3:70b": 2, "llama3": 8}
+
+@pytest.mark.asyncio
+async def test_weighted_project_gets_proportionally_more_slots():
+    gold, standard = uuid4(), uuid4()
+    scheduler = FairScheduler(default_max_inflight=1, project_weights={gold: 2.0})
+    order = []
+
+    await scheduler.acquire(MODEL, standard)  # occupies the only slot
+
+    async def request(project_id, label):
+        await scheduler.acquire(MODEL, project_id)
+        order.append(label)
+        scheduler.release(MODEL)
+
+    tasks = [asyncio.create_task(request(project_id, label)) for _ in range(12) for project_id, label in ((gold, "gold"), (standard, "standard"))]
+    await asyncio.sleep(0)
+    scheduler.release(MODEL)
+    await asyncio.gather(*tasks)
+
+    # While both are backlogged, the weight-2 project is admitted twice as often
+    assert order[:12].count("gold") == 8
+
+def test_parse_project_weights():
+    project_id = uuid4()
+    assert parse_project_weights(f" {project_id}=2.5 ,") == {project_id: 2.5}
+
+@pytest.mark.asyncio
+async def test_queue_wait_is_capped_by_the_request_deadline():
+    scheduler = FairScheduler(default_max_inflight=1, queue_timeout=30)
+    project_id = uuid4()
+    await scheduler.acquire(MODEL, project_id)
+
+    async def acquire_with_deadline():
+        set_deadline(0.01)  # Task-local: the test's own context is untouched
+        await scheduler.acquire(MODEL, project_id)
+
+    with pytest.raises(DeadlineExceededError):
+        await asyncio.wait_for(asyncio.create_task(acquire_with_deadline()), 1)
+    assert scheduler.stats()[MODEL]["queue_depth"] == 0
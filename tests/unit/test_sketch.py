@@ -0,0 +1,24 @@
+import random
+from app.core.sketch import DDSketch
+
+def test_quantiles_are_within_relative_accuracy():
+    rng = random.Random(42)
+    values = sorted(rng.lognormvariate(5, 1) for _ in range(5000))
+    sketch = DDSketch(relative_accuracy=0.01)
+    for value in values:
+        sketch.add(value)
+
+    for q in (0.5, 0.95, 0.99):
+        exact = values[int(q * (len(values) - 1))]
+        assert abs(sketch.quantile(q) - exact) <= exact * 0.01 + 1e-9
+
+def test_merge_equals_single_sketch_and_round_trips():
+    left, right, both = DDSketch(), DDSketch(), DDSketch()
+    for value in range(1, 500):
+        (left if value % 2 else right).add(value)
+        both.add(value)
+
+    left.merge(DDSketch.from_dict(right.to_dict()))
+    assert left.count == both.count
+    assert left.quantile(0.99) == both.quantile(0.99)
+    assert DDSketch().quantile(0.5) is None
@@ -0,0 +1,76 @@
+import asyncio
+import pytest
+from app.core.use_cases.chat.sse import encode_event, batch_frames, HEARTBEAT_EVENT
+
+async def collect(frames):
+    return [frame async for frame in frames]
+
+async def frames_from(items, delay: float = 0):
+    for item in items:
+        if delay:
+            await asyncio.sleep(delay)
+        yield item
+
+def test_encode_event_passes_raw_bytes_through():
+    assert encode_event(b'{"a":1}') == b'data: {"a":1}\n\n'
+    assert encode_event({"a": 1}) == b'data: {"a":1}\n\n'
+
+@pytest.mark.asyncio
+async def test_batch_frames_without_options_is_passthrough():
+    assert await collect(batch_frames(frames_from([b"a", b"b"]))) == [b"a", b"b"]
+
+@pytest.mark.asyncio
+async def test_batch_frames_flushes_on_byte_threshold():
+    frames = [b"x" * 10 for _ in range(5)]
+    batches = await collect(batch_frames(frames_from(frames), flush_interval_ms=1000, flush_bytes=20))
+    assert batches == [b"x" * 20, b"x" * 20, b"x" * 10]
+
+@pytest.mark.asyncio
+async def test_batch_frames_sends_heartbeat_while_upstream_is_silent():
+    batches = await collect(batch_frames(frames_from([b"late"], delay=0.05), heartbeat_interval=0.01))
+    assert batches[0] == HEARTBEAT_EVENT
+    assert batches[-1] == b"late"
+
+@pytest.mark.asyncio
+async def test_batch_frames_reraises_upstream_errors():
+    async def failing():
+        yield b"a"
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError, match="boom"):
+        await collect(batch_frames(failing(), heartbeat_interval=1))
+
+@pytest.mark.asyncio
+async def test_batch_frames_stops_and_closes_upstream_on_disconnect():
+    closed = asyncio.Event()
+
+    async def endless():
+        try:
+            yield b"first"
+            await asyncio.Event().wait()
+        finally:
+            closed.set()
+
+    async def is_disconnected():
+        return True
+
+    frames = batch_frames(endless(), is_disconnected=is_disconnected, disconnect_poll_interval=0.01)
+    assert await collect(frames) == [b"first"]
+    assert closed.is_set()
+
+@pytest.mark.asyncio
+async def test_batch_frames_closes_upstream_when_pump_is_blocked_on_full_queue():
+    closed = asyncio.Event()
+
+    async def firehose():
+        try:
+            while True:
+                yield b"x"
+        finally:
+            closed.set()
+
+    frames = batch_frames(firehose(), heartbeat_interval=1)
+    assert await frames.__anext__() == b"x"
+    await asyncio.sleep(0.01)  # Let the pump fill the queue and block on put()
+    await frames.aclose()
+    assert closed.is_set()
@@ -0,0 +1,30 @@
+from app.core.use_cases.chat.tokens import TokenEstimator, StreamUsage, usage_from_response
+
+def test_estimator_caches_message_counts():
+    estimator = TokenEstimator(max_entries=2)
+    history = [{"role": "user", "content": "Summarize the contract, please."}]
+
+    first = estimator.count_messages(history)
+    assert first > 4
+    assert estimator.count_messages(history + [{"role": "assistant", "content": "Sure"}]) > first
+    assert len(estimator._messages) == 2
+
+def test_usage_prefers_backend_counts():
+    response = {"message": {"content": "ok"}, "prompt_eval_count": 12, "eval_count": 40, "eval_duration": 2_000_000_000}
+    assert usage_from_response(response, [], latency_seconds=5.0) == (12, 40, 20.0)
+
+def test_usage_falls_back_to_estimates():
+    tokens_input, tokens_output, tokens_per_second = usage_from_response(
+        {"message": {"content": "one two six"}}, [{"role": "user", "content": "hi"}], latency_seconds=1.5
+    )
+    assert (tokens_input, tokens_output, tokens_per_second) == (5, 3, 2.0)
+
+def test_stream_usage_counts_raw_chunks_and_reads_final_counts():
+    usage = StreamUsage([{"role": "user", "content": "hi"}], started_at=100.0)
+    usage.feed(b'{"message":{"content":"He"},"done":false}', now=100.25)
+    usage.feed(b'{"message":{"content":"llo"},"done":false}', now=100.5)
+    assert usage.summary(now=100.75)[:2] == (5, 2)
+
+    usage.feed(b'{"done":true,"prompt_eval_count":9,"eval_count":2,"eval_duration":500000000}', now=101.0)
+    assert usage.ttft_ms == 250
+    assert usage.summary(now=101.0) == (9, 2, 4.0)